@@ -0,0 +1,92 @@
+"""Embedding throughput benchmark against a running Ollama server.
+
+Embeds the same synthetic corpus one text per request (the original sequential
+path), through the concurrent /api/embeddings fallback, and through batched
+/api/embed requests at several batch sizes. Every run uses fresh texts so the
+embedding cache never answers.
+
+Usage:
+    python benchmarks/bench_embed_batch.py [--texts 256] [--batch-sizes 1,8,32,64,128]
+"""
+
+import argparse
+import asyncio
+import itertools
+import time
+
+from lokai_agent.config import settings
+from lokai_agent.llm.ollama_client import OllamaClient
+
+_run_ids = itertools.count()
+
+
+def make_corpus(count: int, words: int) -> list[str]:
+    """Build distinct texts of roughly ``words`` words each."""
+    run = next(_run_ids)
+    filler = " ".join(f"word{i % 50}" for i in range(words))
+    return [f"run {run} document {i}: {filler}" for i in range(count)]
+
+
+async def bench_sequential(client: OllamaClient, texts: list[str]) -> float:
+    """Original path: await one /api/embeddings request per text."""
+    start = time.perf_counter()
+    for text in texts:
+        await client._embed_single(text)
+    return time.perf_counter() - start
+
+
+async def bench_concurrent(client: OllamaClient, texts: list[str]) -> float:
+    """Fallback path: /api/embeddings requests bounded by embed_concurrency."""
+    start = time.perf_counter()
+    await client._embed_concurrently(texts, client._embed_single)
+    return time.perf_counter() - start
+
+
+async def bench_batched(client: OllamaClient, texts: list[str], batch_size: int) -> float:
+    """Batched path: /api/embed with ``batch_size`` texts per request."""
+    settings.embed_batch_size = batch_size
+    start = time.perf_counter()
+    await client._embed_batched(texts)
+    return time.perf_counter() - start
+
+
+async def run(args: argparse.Namespace) -> None:
+    client = OllamaClient()
+    await client.initialize()
+    settings.embed_concurrency = args.concurrency
+
+    try:
+        # Load the embedding model before timing anything
+        await client._embed_single("warm up")
+
+        def report(label: str, seconds: float) -> None:
+            print(f"{label:<28} {seconds:>8.2f} s {args.texts / seconds:>10.1f} texts/s")
+
+        print(f"{args.texts} texts of ~{args.words} words, model {client.embedding_model}\n")
+        report("sequential", await bench_sequential(client, make_corpus(args.texts, args.words)))
+        report(
+            f"concurrent (x{args.concurrency})",
+            await bench_concurrent(client, make_corpus(args.texts, args.words)),
+        )
+        for size in args.batch_sizes:
+            seconds = await bench_batched(client, make_corpus(args.texts, args.words), size)
+            report(f"batched (size {size})", seconds)
+    finally:
+        await client.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--texts", type=int, default=256)
+    parser.add_argument("--words", type=int, default=40, help="approximate words per text")
+    parser.add_argument("--concurrency", type=int, default=settings.embed_concurrency)
+    parser.add_argument(
+        "--batch-sizes",
+        type=lambda value: [int(size) for size in value.split(",")],
+        default=[1, 8, 32, 64, 128],
+    )
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
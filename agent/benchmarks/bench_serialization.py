@@ -0,0 +1,71 @@
+"""Micro-benchmark for outbound JSON-RPC message serialization.
+
+Compares the original encoding (pydantic model -> model_dump -> json.dumps -> encode)
+against the orjson fast path. Both write each message to the same kind of buffered
+binary stream and flush once, so only the encoding differs.
+
+Usage:
+    python benchmarks/bench_serialization.py [--messages 200000]
+"""
+
+import argparse
+import io
+import json
+import os
+import time
+
+from lokai_agent.rpc import serializer
+
+try:
+    from pydantic import BaseModel
+
+    class JsonRpcStreamingToken(BaseModel):
+        jsonrpc: str = "2.0"
+        id: int
+        streaming: bool = True
+        token: str
+
+except ImportError:  # pragma: no cover - pydantic is a runtime dependency
+    JsonRpcStreamingToken = None  # type: ignore[assignment,misc]
+
+
+def bench_baseline(count: int, token: str, sink: io.BufferedWriter) -> float:
+    """Original encoding: build a pydantic model per token and dump it with json."""
+    start = time.perf_counter()
+    for i in range(count):
+        if JsonRpcStreamingToken is not None:
+            message = JsonRpcStreamingToken(id=i, token=token).model_dump()
+        else:
+            message = {"jsonrpc": "2.0", "id": i, "streaming": True, "token": token}
+        sink.write(json.dumps(message).encode() + b"\n")
+    sink.flush()
+    return time.perf_counter() - start
+
+
+def bench_fast(count: int, token: str, sink: io.BufferedWriter) -> float:
+    """Fast path: encode with orjson."""
+    start = time.perf_counter()
+    for i in range(count):
+        sink.write(serializer.encode_token(i, token) + b"\n")
+    sink.flush()
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, default=200_000)
+    parser.add_argument("--token", default=" hello")
+    args = parser.parse_args()
+
+    with open(os.devnull, "wb") as sink:
+        baseline = bench_baseline(args.messages, args.token, sink)
+        fast = bench_fast(args.messages, args.token, sink)
+
+    label = "pydantic + json" if JsonRpcStreamingToken is not None else "dict + json"
+    print(f"{label:<28} {args.messages / baseline:>12,.0f} msg/s")
+    print(f"{'orjson fast path':<28} {args.messages / fast:>12,.0f} msg/s")
+    print(f"{'speedup':<28} {baseline / fast:>12.1f}x")
+
+
+if __name__ == "__main__":
+    main()
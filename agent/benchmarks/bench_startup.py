@@ -0,0 +1,111 @@
+"""Startup-time benchmark for the agent.
+
+Reports the import time of ``lokai_agent.main`` broken down by module (from
+``python -X importtime``) and the wall time until the agent answers its first
+``ping`` over stdio. Exits non-zero when the import budget is exceeded, so it can
+guard against regressions that pull heavy modules back onto the startup path.
+
+Usage:
+    python benchmarks/bench_startup.py [--top 15] [--runs 5] [--max-import-ms 400]
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+IMPORT_TARGET = "lokai_agent.main"
+
+# Modules that must stay off the startup path
+HEAVY_MODULES = ("langgraph", "langchain", "langchain_core", "langchain_community")
+
+
+def measure_imports() -> list[tuple[str, int, int]]:
+    """Import the entry point in a fresh interpreter and parse -X importtime output.
+
+    Returns:
+        (module, self_us, cumulative_us) for every imported module
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {IMPORT_TARGET}"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    entries = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, module = line[len("import time:"):].split("|")
+        entries.append((module.strip(), int(self_us), int(cumulative_us)))
+    return entries
+
+
+def measure_first_ping() -> float:
+    """Start the agent over stdio and time its first ping response, in seconds."""
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", IMPORT_TARGET],
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        assert process.stdin is not None and process.stdout is not None
+        process.stdin.write(b'{"jsonrpc": "2.0", "id": 1, "method": "ping"}\n')
+        process.stdin.flush()
+        response = json.loads(process.stdout.readline())
+        elapsed = time.perf_counter() - start
+        if response.get("result", {}).get("status") != "ok":
+            raise RuntimeError(f"Unexpected ping response: {response}")
+        return elapsed
+    finally:
+        process.kill()
+        process.wait()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--top", type=int, default=15, help="modules to list")
+    parser.add_argument("--runs", type=int, default=5, help="repetitions to average")
+    parser.add_argument("--max-import-ms", type=float, default=None, help="fail above this")
+    parser.add_argument("--skip-ping", action="store_true", help="only measure imports")
+    args = parser.parse_args()
+
+    totals = []
+    entries: list[tuple[str, int, int]] = []
+    for _ in range(args.runs):
+        entries = measure_imports()
+        totals.append(next(cum for mod, _, cum in entries if mod == IMPORT_TARGET) / 1000)
+
+    import_ms = statistics.median(totals)
+    print(f"import {IMPORT_TARGET}: {import_ms:.1f} ms (median of {args.runs})\n")
+
+    # Self time grouped by top-level package, from the last run
+    by_package: dict[str, int] = defaultdict(int)
+    for module, self_us, _ in entries:
+        by_package[module.split(".")[0]] += self_us
+
+    print(f"{'package':<32} {'self ms':>9}")
+    for package, self_us in sorted(by_package.items(), key=lambda x: -x[1])[: args.top]:
+        print(f"{package:<32} {self_us / 1000:>9.1f}")
+
+    heavy = sorted({m.split(".")[0] for m, _, _ in entries if m.split(".")[0] in HEAVY_MODULES})
+    if heavy:
+        print(f"\nWARNING: heavy modules imported at startup: {', '.join(heavy)}")
+
+    if not args.skip_ping:
+        pings = [measure_first_ping() for _ in range(args.runs)]
+        print(f"\nfirst ping answered after: {statistics.median(pings) * 1000:.1f} ms")
+
+    if args.max_import_ms is not None and import_ms > args.max_import_ms:
+        print(f"\nFAIL: import time {import_ms:.1f} ms exceeds {args.max_import_ms} ms")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""Micro-benchmark for parsing streamed LLM tokens.
+
+Replays synthetic Ollama (NDJSON) and OpenAI (SSE) streams through httpx and
+compares the original parsing loop (aiter_lines + json.loads per line) against
+the incremental orjson parsers in lokai_agent.llm.transport.
+
+Usage:
+    python benchmarks/bench_stream_parsing.py [--tokens 100000] [--chunk-size 1024]
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from collections.abc import AsyncIterator, Awaitable, Callable
+
+import httpx
+
+from lokai_agent.llm.transport import aiter_ndjson, aiter_sse
+
+
+def make_ndjson(tokens: int) -> bytes:
+    """An Ollama /api/generate stream of ``tokens`` tokens."""
+    lines = [
+        json.dumps(
+            {
+                "model": "llama3.2:3b",
+                "created_at": "2024-01-01T00:00:00Z",
+                "response": f" tok{i}",
+                "done": False,
+            }
+        )
+        for i in range(tokens)
+    ]
+    lines.append(json.dumps({"model": "llama3.2:3b", "response": "", "done": True}))
+    return ("\n".join(lines) + "\n").encode()
+
+
+def make_sse(tokens: int) -> bytes:
+    """An OpenAI chat completion stream of ``tokens`` tokens."""
+    events = [
+        "data: "
+        + json.dumps(
+            {
+                "id": "chatcmpl-1",
+                "object": "chat.completion.chunk",
+                "choices": [{"index": 0, "delta": {"content": f" tok{i}"}}],
+            }
+        )
+        for i in range(tokens)
+    ]
+    events.append("data: [DONE]")
+    return ("\n\n".join(events) + "\n\n").encode()
+
+
+def make_response(body: bytes, chunk_size: int) -> httpx.Response:
+    """A streaming response delivering ``body`` in network-sized chunks."""
+
+    async def chunks() -> AsyncIterator[bytes]:
+        for start in range(0, len(body), chunk_size):
+            yield body[start : start + chunk_size]
+
+    return httpx.Response(200, content=chunks())
+
+
+async def baseline_ndjson(response: httpx.Response) -> int:
+    count = 0
+    async for line in response.aiter_lines():
+        if line:
+            data = json.loads(line)
+            if data.get("response"):
+                count += 1
+    return count
+
+
+async def fast_ndjson(response: httpx.Response) -> int:
+    count = 0
+    async for data in aiter_ndjson(response):
+        if data.get("response"):
+            count += 1
+    return count
+
+
+async def baseline_sse(response: httpx.Response) -> int:
+    count = 0
+    async for line in response.aiter_lines():
+        if line.startswith("data: "):
+            data_str = line[6:]
+            if data_str == "[DONE]":
+                break
+            data = json.loads(data_str)
+            if data["choices"][0]["delta"].get("content"):
+                count += 1
+    return count
+
+
+async def fast_sse(response: httpx.Response) -> int:
+    count = 0
+    async for data in aiter_sse(response):
+        if data["choices"][0]["delta"].get("content"):
+            count += 1
+    return count
+
+
+async def measure(
+    parse: Callable[[httpx.Response], Awaitable[int]],
+    body: bytes,
+    chunk_size: int,
+) -> tuple[float, int]:
+    response = make_response(body, chunk_size)
+    start = time.perf_counter()
+    count = await parse(response)
+    return time.perf_counter() - start, count
+
+
+async def run(args: argparse.Namespace) -> None:
+    cases = [
+        ("ndjson", make_ndjson(args.tokens), baseline_ndjson, fast_ndjson),
+        ("sse", make_sse(args.tokens), baseline_sse, fast_sse),
+    ]
+
+    for name, body, baseline, fast in cases:
+        base_s, base_n = await measure(baseline, body, args.chunk_size)
+        fast_s, fast_n = await measure(fast, body, args.chunk_size)
+        assert base_n == fast_n == args.tokens, (base_n, fast_n)
+
+        print(f"{name}:")
+        print(f"  baseline (aiter_lines + json): {args.tokens / base_s:>12,.0f} tokens/s")
+        print(f"  transport (bytes + orjson):    {args.tokens / fast_s:>12,.0f} tokens/s")
+        print(f"  speedup:                       {base_s / fast_s:>12.1f}x")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tokens", type=int, default=100_000)
+    parser.add_argument("--chunk-size", type=int, default=1024, help="bytes per network read")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -11,9 +11,33 @@ class Settings(BaseSettings):
     ollama_host: str = Field(default="http://localhost:11439", alias="OLLAMA_HOST")
     ollama_model: str = Field(default="llama3.2:3b", alias="OLLAMA_MODEL")
     ollama_embedding_model: str = Field(default="nomic-embed-text", alias="OLLAMA_EMBEDDING_MODEL")
+    # Small model for classification and planning; the main model is used when unset
+    ollama_fast_model: str | None = Field(default=None, alias="OLLAMA_FAST_MODEL")
+    # How long Ollama keeps models loaded after a request ("30m", "-1m" for always)
+    ollama_keep_alive: str = Field(default="30m", alias="OLLAMA_KEEP_ALIVE")
+    # Structured output: "schema" sends the JSON schema as Ollama's format (Ollama
+    # 0.5+), "json" only asks for valid JSON
+    ollama_json_format: str = Field(default="schema")
+    # Load the models and prefill the system prompt at startup
+    ollama_warmup: bool = Field(default=True)
+    # Multi-turn sessions continue from Ollama's returned context until it grows past
+    # this many tokens; at most this many sessions are remembered
+    ollama_session_max_tokens: int = Field(default=1536)
+    ollama_max_sessions: int = Field(default=64)
 
     # OpenAI fallback
     openai_api_key: str | None = Field(default=None, alias="OPENAI_API_KEY")
+    openai_model: str = Field(default="gpt-3.5-turbo", alias="OPENAI_MODEL")
+    openai_fast_model: str | None = Field(default=None, alias="OPENAI_FAST_MODEL")
+    # Use HTTP/2 for OpenAI when the optional h2 package is installed
+    openai_http2: bool = Field(default=True)
+
+    # HTTP connection pools shared by the LLM clients
+    http_max_connections: int = Field(default=20)
+    http_max_keepalive_connections: int = Field(default=10)
+    http_keepalive_expiry: float = Field(default=30.0)
+    http_connect_timeout: float = Field(default=5.0)
+    http_timeout: float = Field(default=60.0)
 
     # PostgreSQL configuration
     postgres_host: str = Field(default="localhost", alias="POSTGRES_HOST")
@@ -36,6 +60,96 @@ class Settings(BaseSettings):
     max_tokens: int = Field(default=2048)
     streaming: bool = Field(default=True)
 
+    # Output budgets of the classify and plan generation profiles (see llm/profiles.py)
+    classify_max_tokens: int = Field(default=256)
+    plan_max_tokens: int = Field(default=1024)
+
+    # Streaming token coalescing: frames are flushed after this many milliseconds or
+    # once they reach the byte budget. A window of 0 sends one message per token.
+    stream_coalesce_ms: int = Field(default=16)
+    stream_coalesce_bytes: int = Field(default=512)
+
+    # Request dispatch
+    max_concurrent_requests: int = Field(default=4)
+    # Plan steps that don't depend on each other run concurrently, this many at a time
+    max_concurrent_steps: int = Field(default=4)
+
+    # Stdio transport: "auto", "newline" or "content-length" framing
+    rpc_framing: str = Field(default="auto")
+    rpc_max_message_bytes: int = Field(default=64 * 1024 * 1024)
+
+    # Outbound queue: producers wait once this many messages are pending, except
+    # streaming tokens, which are merged ("merge"), dropped ("drop") or wait ("block")
+    rpc_write_queue_size: int = Field(default=256)
+    rpc_token_overflow: str = Field(default="merge")
+
+    # LLM response cache. Responses are only cached at temperature 0 unless the caller
+    # forces it; set a path to keep the cache on disk across restarts.
+    llm_cache_enabled: bool = Field(default=True)
+    llm_cache_size: int = Field(default=512)
+    llm_cache_ttl_seconds: int = Field(default=3600)
+    llm_cache_path: str | None = Field(default=None)
+
+    # Embedding cache: an in-memory LRU plus, when a path is set, a memory-mapped file
+    # of fixed-size rows that is overwritten oldest-first once full
+    embedding_dim: int = Field(default=768)
+    embedding_cache_size: int = Field(default=2048)
+    embedding_cache_path: str | None = Field(default=None)
+    embedding_cache_disk_entries: int = Field(default=20000)
+
+    # Batched embeddings: texts per /api/embed request, and the concurrency used on
+    # Ollama versions without the batch endpoint
+    embed_batch_size: int = Field(default=64)
+    embed_batch_max_chars: int = Field(default=32000)
+    embed_concurrency: int = Field(default=4)
+
+    # Provider circuit breakers: a provider is skipped after this many consecutive
+    # failures or once its error rate over recent calls reaches the threshold, and is
+    # retried after the reset timeout. Ollama is also probed in the background: a
+    # failed probe opens its breaker, a healthy one lets a trial call through early.
+    llm_breaker_failures: int = Field(default=3)
+    llm_breaker_error_rate: float = Field(default=0.5)
+    llm_breaker_reset_seconds: float = Field(default=30.0)
+    llm_probe_interval: float = Field(default=10.0)
+    llm_probe_timeout: float = Field(default=3.0)
+
+    # Hedged requests: when a caller opts in and Ollama has produced no first token by
+    # the deadline, the fallback is started too and the first to answer wins. When
+    # adaptive, the deadline is the p95 time to first token of the Ollama model in
+    # use, and a model isn't hedged until it has llm_hedge_min_samples samples.
+    llm_hedge_deadline_ms: int = Field(default=1500)
+    llm_hedge_adaptive: bool = Field(default=True)
+    llm_hedge_min_ms: int = Field(default=250)
+    llm_hedge_min_samples: int = Field(default=5)
+
+    # Structured generations that fail schema validation are retried this many times
+    llm_json_retries: int = Field(default=2)
+
+    # Fused planning: classify and plan actionable requests in one LLM call, falling
+    # back to separate classification and planning when the result is invalid or
+    # its confidence is below the minimum
+    fused_planning: bool = Field(default=True)
+    fused_min_confidence: float = Field(default=0.7)
+
+    # Intent fast path: a message whose embedding is close enough to a labelled
+    # exemplar, and clearly closer to it than to any other category, is classified
+    # without the LLM. Confident LLM classifications become exemplars, up to the
+    # limit, and are kept in the file when a path is set.
+    intent_fast_path: bool = Field(default=True)
+    intent_similarity_threshold: float = Field(default=0.88)
+    intent_similarity_margin: float = Field(default=0.04)
+    intent_learn_confidence: float = Field(default=0.9)
+    intent_max_exemplars: int = Field(default=1000)
+    intent_exemplars_path: str | None = Field(default=None)
+
+    # Serve clients on this Unix socket instead of stdio (or pass --socket)
+    agent_socket_path: str | None = Field(default=None)
+    # Background initialization is retried this many times, waiting from the initial
+    # delay up to the maximum (doubling each time), before the agent reports "failed"
+    agent_init_attempts: int = Field(default=5)
+    agent_init_retry_delay: float = Field(default=1.0)
+    agent_init_retry_max_delay: float = Field(default=30.0)
+
     # Logging
     log_level: str = Field(default="INFO", alias="LOG_LEVEL")
 
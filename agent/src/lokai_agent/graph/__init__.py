@@ -2,5 +2,7 @@
 
 from lokai_agent.graph.state import AgentState
 from lokai_agent.graph.graph import create_agent_graph
+from lokai_agent.graph.intent_index import IntentIndex
+from lokai_agent.graph.streaming import stream_graph
 
-__all__ = ["AgentState", "create_agent_graph"]
+__all__ = ["AgentState", "IntentIndex", "create_agent_graph", "stream_graph"]
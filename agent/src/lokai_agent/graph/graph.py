@@ -1,13 +1,17 @@
 """LangGraph graph definition for the Lokai agent."""
 
-from typing import Any
+from collections.abc import Awaitable, Callable
+from typing import Any, Protocol
 
 from langgraph.graph import StateGraph, END
 import structlog
 
+from lokai_agent.config import settings
+from lokai_agent.graph.intent_index import IntentIndex
 from lokai_agent.graph.state import AgentState
 from lokai_agent.graph.nodes import (
     intent_classifier,
+    intent_planner,
     context_gatherer,
     clarification_check,
     action_planner,
@@ -16,26 +20,68 @@ from lokai_agent.graph.nodes import (
     learning_phase,
     response_generator,
 )
+from lokai_agent.llm.metrics import current_node
 from lokai_agent.llm.router import LLMRouter
 
 logger = structlog.get_logger()
 
 
-def create_agent_graph(llm_router: LLMRouter) -> StateGraph:
-    """Create the agent state machine graph."""
+class _BoundNode(Protocol):
+    """A node with its arguments bound, called by LangGraph with the state."""
+
+    def __call__(self, state: AgentState) -> Awaitable[dict[str, Any]]: ...
+
+
+def _bind(
+    node: Callable[..., Awaitable[dict[str, Any]]],
+    llm_router: LLMRouter,
+    **kwargs: Any,
+) -> _BoundNode:
+    """Bind the LLM router and any extra arguments to a node LangGraph can await."""
+
+    async def run(state: AgentState) -> dict[str, Any]:
+        # LLM calls made by the node are attributed to it in the metrics
+        token = current_node.set(node.__name__)
+        try:
+            return await node(state, llm_router, **kwargs)
+        finally:
+            current_node.reset(token)
+
+    run.__name__ = node.__name__
+    return run
+
+
+def create_agent_graph(
+    llm_router: LLMRouter,
+    intent_index: IntentIndex | None = None,
+    fused: bool | None = None,
+) -> StateGraph:
+    """Create the agent state machine graph.
+
+    Args:
+        llm_router: Router used by the nodes for generation
+        intent_index: Embedding fast path for intent classification, if enabled
+        fused: Classify and plan in one LLM call (intent_planner) instead of
+            intent_classifier followed by action_planner; defaults to the
+            fused_planning setting
+    """
+    if fused is None:
+        fused = settings.fused_planning
 
     # Create the graph
     graph = StateGraph(AgentState)
 
     # Add nodes
-    graph.add_node("intent_classifier", lambda state: intent_classifier(state, llm_router))
-    graph.add_node("context_gatherer", lambda state: context_gatherer(state, llm_router))
-    graph.add_node("clarification_check", lambda state: clarification_check(state, llm_router))
-    graph.add_node("action_planner", lambda state: action_planner(state, llm_router))
-    graph.add_node("permission_checker", lambda state: permission_checker(state, llm_router))
-    graph.add_node("action_executor", lambda state: action_executor(state, llm_router))
-    graph.add_node("learning_phase", lambda state: learning_phase(state, llm_router))
-    graph.add_node("response_generator", lambda state: response_generator(state, llm_router))
+    # The fused node keeps the intent_classifier name so node events stay the same
+    entry = intent_planner if fused else intent_classifier
+    graph.add_node("intent_classifier", _bind(entry, llm_router, intent_index=intent_index))
+    graph.add_node("context_gatherer", _bind(context_gatherer, llm_router))
+    graph.add_node("clarification_check", _bind(clarification_check, llm_router))
+    graph.add_node("action_planner", _bind(action_planner, llm_router))
+    graph.add_node("permission_checker", _bind(permission_checker, llm_router))
+    graph.add_node("action_executor", _bind(action_executor, llm_router))
+    graph.add_node("learning_phase", _bind(learning_phase, llm_router))
+    graph.add_node("response_generator", _bind(response_generator, llm_router))
 
     # Define edges
     graph.set_entry_point("intent_classifier")
@@ -48,6 +94,9 @@ def create_agent_graph(llm_router: LLMRouter) -> StateGraph:
             "clarification": "clarification_check",
             "context": "context_gatherer",
             "respond": "response_generator",
+            # Only reached with a fused plan
+            "permission": "permission_checker",
+            "execute": "action_executor",
         }
     )
 
@@ -122,6 +171,10 @@ def route_from_intent(state: AgentState) -> str:
     if intent["confidence"] < 0.6:
         return "clarification"
 
+    # A fused intent_planner run has planned already
+    if state.get("action_plan") is not None:
+        return route_from_planner(state)
+
     return "context"
 
 
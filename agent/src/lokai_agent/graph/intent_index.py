@@ -0,0 +1,351 @@
+"""Embedding fast path for intent classification."""
+
+import asyncio
+import re
+import time
+from collections import deque
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+import orjson
+import structlog
+
+from lokai_agent.graph.state import Intent
+from lokai_agent.llm.router import LLMRouter
+from lokai_agent.prompts.intent import INTENT_EXEMPLARS
+
+logger = structlog.get_logger()
+
+# Risk assumed for a category when an exemplar carries none (seed exemplars)
+_CATEGORY_RISK = {
+    "FILESYSTEM_WRITE": ("medium", True),
+    "FILESYSTEM_DELETE": ("high", True),
+    "TERMINAL_COMMAND": ("medium", True),
+    "GIT_OPERATION": ("medium", False),
+}
+
+# Categories that say nothing reusable about a message are never learned
+_UNLEARNABLE = ("CLARIFICATION_NEEDED", "OTHER")
+
+# Longer messages are usually compound requests; they always go to the LLM
+_MAX_MESSAGE_CHARS = 500
+
+# A new exemplar this similar to an existing one of the same category adds nothing
+_DUPLICATE_SIMILARITY = 0.97
+
+_URL = re.compile(r"https?://[^\s'\"`<>]+")
+_PATH = re.compile(r"(?<![\w/])(?:~|\.{1,2})?/[^\s'\"`,;]*|~(?=\s|$)")
+
+
+def _extract_entities(message: str) -> dict[str, list[str]]:
+    """Pull URLs and paths out of a message, in the LLM classifier's entity format."""
+    urls = _URL.findall(message)
+    paths = [path.rstrip(".?!") for path in _PATH.findall(_URL.sub(" ", message))]
+    return {"paths": [p for p in paths if p], "commands": [], "urls": urls, "other": []}
+
+
+def _normalize(vector: list[float]) -> np.ndarray | None:
+    array = np.asarray(vector, dtype=np.float32)
+    norm = float(np.linalg.norm(array))
+    if not norm:
+        return None
+    return array / norm
+
+
+class _Exemplar:
+    """A labelled message and its unit-length embedding."""
+
+    __slots__ = ("text", "category", "risk_level", "requires_approval", "vector", "learned")
+
+    def __init__(
+        self,
+        text: str,
+        category: str,
+        vector: np.ndarray,
+        risk_level: str | None = None,
+        requires_approval: bool | None = None,
+        learned: bool = False,
+    ) -> None:
+        default_risk, default_approval = _CATEGORY_RISK.get(category, ("low", False))
+        self.text = text
+        self.category = category
+        self.vector = vector
+        self.risk_level = risk_level or default_risk
+        self.requires_approval = (
+            default_approval if requires_approval is None else requires_approval
+        )
+        self.learned = learned
+
+
+class IntentIndex:
+    """Classifies messages by their nearest labelled exemplars, without the LLM.
+
+    The index is seeded with INTENT_EXEMPLARS and grows from confident LLM
+    classifications, which are also appended to ``path`` when one is set. A
+    message is classified locally when its most similar exemplar reaches
+    ``threshold`` and beats the best exemplar of every other category by
+    ``margin``; anything else is left to the LLM.
+
+    After ``max_failures`` consecutive embedding failures (e.g. the embedding
+    model is not pulled) the index stops embedding messages for ``retry_after``
+    seconds, so every message goes straight to the LLM.
+    """
+
+    def __init__(
+        self,
+        llm: LLMRouter,
+        threshold: float = 0.88,
+        margin: float = 0.04,
+        learn_confidence: float = 0.9,
+        max_exemplars: int = 1000,
+        path: str | None = None,
+        max_failures: int = 3,
+        retry_after: float = 300.0,
+    ) -> None:
+        self.llm = llm
+        self.threshold = threshold
+        self.margin = margin
+        self.learn_confidence = learn_confidence
+        self.max_exemplars = max_exemplars
+        self.path = Path(path) if path else None
+        self.max_failures = max_failures
+        self.retry_after = retry_after
+
+        self._exemplars: list[_Exemplar] = []
+        # Exemplar vectors as rows, and each row's category; rebuilt after changes
+        self._matrix: np.ndarray | None = None
+        self._categories: dict[str, np.ndarray] = {}
+        self._failures = 0
+        self._disabled_until = 0.0
+        self._load_task: asyncio.Task[None] | None = None
+        self._llm_times: deque[float] = deque(maxlen=100)
+        self._counts = {"lookups": 0, "hits": 0, "learned": 0}
+        self._saved = 0.0
+
+    @property
+    def enabled(self) -> bool:
+        """Whether the index is embedding messages, i.e. not backing off after failures."""
+        return time.monotonic() >= self._disabled_until
+
+    def start(self) -> None:
+        """Embed the seed and stored exemplars in the background."""
+        if not self.enabled:
+            return
+        if self._load_task is None or (self._load_task.done() and not self._exemplars):
+            self._load_task = asyncio.create_task(self._load())
+
+    async def _load(self) -> None:
+        labelled: list[tuple[str, str, str | None, bool | None]] = [
+            (text, category, None, None)
+            for category, texts in INTENT_EXEMPLARS.items()
+            for text in texts
+        ]
+        if self.path is not None:
+            labelled += await asyncio.to_thread(self._read_learned)
+
+        try:
+            vectors = await self.llm.embed_batch(
+                [text for text, *_ in labelled], return_exceptions=True
+            )
+        except Exception as e:
+            logger.warning("Intent index not loaded", error=str(e))
+            self._record_failure()
+            return
+
+        exemplars = []
+        failed = 0
+        for (text, category, risk, approval), vector in zip(labelled, vectors):
+            failed += isinstance(vector, BaseException)
+            unit = None if isinstance(vector, BaseException) else _normalize(vector)
+            if unit is not None:
+                learned = risk is not None
+                exemplars.append(_Exemplar(text, category, unit, risk, approval, learned))
+
+        if not exemplars:
+            logger.warning("Intent index not loaded", failed=failed)
+            self._record_failure()
+            return
+
+        self._failures = 0
+        # Exemplars learned while loading are kept after the stored ones
+        self._exemplars = exemplars + self._exemplars
+        self._evict()
+        self._matrix = None
+        logger.info("Intent index loaded", exemplars=len(self._exemplars), failed=failed)
+
+    def _read_learned(self) -> list[tuple[str, str, str | None, bool | None]]:
+        assert self.path is not None
+        try:
+            lines = self.path.read_bytes().splitlines()
+        except FileNotFoundError:
+            return []
+
+        learned = []
+        for line in lines[-self.max_exemplars :]:
+            try:
+                item = orjson.loads(line)
+                learned.append(
+                    (item["text"], item["category"], item["risk_level"], item["requires_approval"])
+                )
+            except (orjson.JSONDecodeError, KeyError, TypeError):
+                continue
+        return learned
+
+    def _append_learned(self, exemplar: _Exemplar) -> None:
+        assert self.path is not None
+        line = orjson.dumps({
+            "text": exemplar.text,
+            "category": exemplar.category,
+            "risk_level": exemplar.risk_level,
+            "requires_approval": exemplar.requires_approval,
+        })
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self.path.open("ab") as f:
+            f.write(line + b"\n")
+
+    def _evict(self) -> None:
+        """Drop the oldest learned exemplars beyond the limit; seeds are kept."""
+        excess = len(self._exemplars) - self.max_exemplars
+        if excess <= 0:
+            return
+        kept = []
+        for exemplar in self._exemplars:
+            if excess and exemplar.learned:
+                excess -= 1
+                continue
+            kept.append(exemplar)
+        self._exemplars = kept
+
+    def _record_failure(self) -> None:
+        self._failures += 1
+        if self._failures >= self.max_failures:
+            logger.warning(
+                "Intent index disabled after embedding failures",
+                failures=self._failures,
+                retry_after=self.retry_after,
+            )
+            self._failures = 0
+            self._disabled_until = time.monotonic() + self.retry_after
+
+    async def _embed(self, message: str) -> np.ndarray | None:
+        try:
+            vector = await self.llm.embed(message)
+        except Exception as e:
+            logger.debug("Intent index embedding failed", error=str(e))
+            self._record_failure()
+            return None
+
+        self._failures = 0
+        return _normalize(vector)
+
+    def _nearest(self, vector: np.ndarray) -> dict[str, tuple[float, _Exemplar]]:
+        """The most similar exemplar of each category."""
+        if self._matrix is None:
+            self._matrix = np.stack([exemplar.vector for exemplar in self._exemplars])
+            rows: dict[str, list[int]] = {}
+            for i, exemplar in enumerate(self._exemplars):
+                rows.setdefault(exemplar.category, []).append(i)
+            self._categories = {category: np.array(r) for category, r in rows.items()}
+
+        similarities = self._matrix @ vector
+        best: dict[str, tuple[float, _Exemplar]] = {}
+        for category, rows_of in self._categories.items():
+            i = int(rows_of[np.argmax(similarities[rows_of])])
+            best[category] = (float(similarities[i]), self._exemplars[i])
+        return best
+
+    async def classify(self, message: str) -> Intent | None:
+        """Classify a message from its nearest exemplars.
+
+        Returns:
+            The intent, or None when the match is not clear enough and the LLM
+            should decide
+        """
+        self.start()
+        if not self.enabled or not self._exemplars or len(message) > _MAX_MESSAGE_CHARS:
+            return None
+
+        start = time.perf_counter()
+        self._counts["lookups"] += 1
+        vector = await self._embed(message)
+        if vector is None:
+            return None
+
+        ranked = sorted(self._nearest(vector).values(), key=lambda item: item[0], reverse=True)
+        similarity, exemplar = ranked[0]
+        runner_up = ranked[1][0] if len(ranked) > 1 else -1.0
+        if similarity < self.threshold or similarity - runner_up < self.margin:
+            return None
+
+        elapsed = time.perf_counter() - start
+        self._counts["hits"] += 1
+        if self._llm_times:
+            self._saved += max(0.0, sum(self._llm_times) / len(self._llm_times) - elapsed)
+
+        return {
+            "category": exemplar.category,
+            "confidence": round(similarity, 3),
+            "risk_level": exemplar.risk_level,
+            "requires_approval": exemplar.requires_approval,
+            "entities": _extract_entities(message),
+            "explanation": f"Similar to {exemplar.text!r} ({similarity:.2f})",
+        }
+
+    async def learn(self, message: str, intent: Intent, seconds: float) -> None:
+        """Record an LLM classification, adding it as an exemplar when confident.
+
+        Args:
+            message: The classified message
+            intent: The LLM's classification
+            seconds: How long the LLM classification took
+        """
+        self._llm_times.append(seconds)
+
+        if (
+            intent["category"] in _UNLEARNABLE
+            or intent["confidence"] < self.learn_confidence
+            or len(message) > _MAX_MESSAGE_CHARS
+            or not self._exemplars
+            or not self.enabled
+        ):
+            return
+
+        # Usually served from the embedding cache, filled by the lookup that missed
+        vector = await self._embed(message)
+        if vector is None:
+            return
+
+        nearest = self._nearest(vector).get(intent["category"])
+        if nearest is not None and nearest[0] >= _DUPLICATE_SIMILARITY:
+            return
+
+        exemplar = _Exemplar(
+            message,
+            intent["category"],
+            vector,
+            intent["risk_level"],
+            intent["requires_approval"],
+            learned=True,
+        )
+        self._exemplars.append(exemplar)
+        self._evict()
+        self._matrix = None
+        self._counts["learned"] += 1
+
+        if self.path is not None:
+            try:
+                await asyncio.to_thread(self._append_learned, exemplar)
+            except OSError as e:
+                logger.warning("Failed to store intent exemplar", error=str(e))
+
+    def stats(self) -> dict[str, Any]:
+        """Fast path hit rate and the LLM time it saved."""
+        lookups = self._counts["lookups"]
+        return {
+            **self._counts,
+            "exemplars": len(self._exemplars),
+            "enabled": self.enabled,
+            "hit_rate": self._counts["hits"] / lookups if lookups else 0.0,
+            "latency_saved_seconds": round(self._saved, 3),
+        }
@@ -1,6 +1,7 @@
 """Graph nodes for the Lokai agent."""
 
 from lokai_agent.graph.nodes.intent_classifier import intent_classifier
+from lokai_agent.graph.nodes.intent_planner import intent_planner
 from lokai_agent.graph.nodes.context_gatherer import context_gatherer
 from lokai_agent.graph.nodes.clarification_check import clarification_check
 from lokai_agent.graph.nodes.action_planner import action_planner
@@ -11,6 +12,7 @@ from lokai_agent.graph.nodes.response_generator import response_generator
 
 __all__ = [
     "intent_classifier",
+    "intent_planner",
     "context_gatherer",
     "clarification_check",
     "action_planner",
@@ -1,14 +1,85 @@
 """Action execution node."""
 
+import asyncio
+import os
+import signal
+import time
+from contextlib import suppress
 from typing import Any
 
 import structlog
 
+from lokai_agent.config import settings
 from lokai_agent.graph.state import AgentState, ToolCall
 from lokai_agent.llm.router import LLMRouter
 
 logger = structlog.get_logger()
 
+# Tools that only read the paths they are given; anything else may change them
+READ_ONLY_TOOLS = frozenset({"filesystem_read", "filesystem_list"})
+
+
+def _step_paths(step: dict[str, Any]) -> list[str]:
+    """Absolute paths named in a step's parameters.
+
+    Read-only tools default to the current directory (e.g. filesystem_list with
+    no path), so a step naming no path is taken to read it.
+    """
+    paths: list[str] = []
+    for key, value in step.get("parameters", {}).items():
+        if "path" not in key and key not in ("source", "destination", "target"):
+            continue
+        for path in value if isinstance(value, list) else [value]:
+            if isinstance(path, str) and path:
+                paths.append(os.path.abspath(os.path.expanduser(path)))
+    if not paths and step.get("tool", "") in READ_ONLY_TOOLS:
+        paths.append(os.getcwd())
+    return paths
+
+
+def _overlaps(a: str, b: str) -> bool:
+    """Whether two absolute paths are the same or one contains the other."""
+    return a == b or os.path.commonpath([a, b]) in (a, b)
+
+
+def plan_dependencies(steps: list[dict[str, Any]]) -> list[set[int]]:
+    """Work out which earlier steps each step has to wait for.
+
+    A step waits for the steps it lists in ``depends_on`` (by step number) and
+    for every earlier step that touches an overlapping path when either of the
+    two may modify it. Steps with side effects on no known path (e.g. terminal
+    commands) wait for, and are waited on by, every other step. Steps with side
+    effects also wait for every earlier medium or high risk step, so that when
+    one of those fails (which aborts the plan) nothing after it has changed
+    anything yet.
+
+    Returns:
+        For each step, the indices of the earlier steps it depends on
+    """
+    numbers = {step.get("step_number", i + 1): i for i, step in enumerate(steps)}
+    paths = [_step_paths(step) for step in steps]
+    writes = [step.get("tool", "") not in READ_ONLY_TOOLS for step in steps]
+    critical = [step.get("risk_level") in ("medium", "high") for step in steps]
+
+    dependencies: list[set[int]] = []
+    for i, step in enumerate(steps):
+        # Only earlier steps count, so a malformed plan cannot deadlock
+        declared = {numbers.get(n) for n in step.get("depends_on") or []}
+        needs = {j for j in declared if j is not None and j < i}
+
+        for j in range(i):
+            if not (writes[i] or writes[j]):
+                continue
+            if writes[i] and critical[j]:
+                needs.add(j)
+            elif (writes[i] and not paths[i]) or (writes[j] and not paths[j]):
+                needs.add(j)
+            elif any(_overlaps(a, b) for a in paths[i] for b in paths[j]):
+                needs.add(j)
+
+        dependencies.append(needs)
+    return dependencies
+
 
 async def action_executor(state: AgentState, llm: LLMRouter) -> dict[str, Any]:
     """Execute the planned actions."""
@@ -32,61 +103,113 @@ async def action_executor(state: AgentState, llm: LLMRouter) -> dict[str, Any]:
         # Still pending
         return {"tool_calls": []}
 
-    # Execute each step in the plan
-    tool_calls: list[ToolCall] = []
-    results: list[str] = []
-
-    for step in action_plan.get("steps", []):
-        tool_name = step.get("tool", "")
-        parameters = step.get("parameters", {})
-
-        # Create tool call record
-        tool_call: ToolCall = {
-            "id": f"tool_{len(tool_calls)}_{tool_name}",
-            "name": tool_name,
-            "parameters": parameters,
-            "status": "running",
-            "result": None,
-            "error": None,
+    # Execute the steps, running those that don't depend on each other concurrently
+    steps = action_plan.get("steps", [])
+    dependencies = plan_dependencies(steps)
+    tool_calls: list[ToolCall | None] = [None] * len(steps)
+    running: dict[asyncio.Task[None], int] = {}
+    finished: set[int] = set()
+    critical_error: str | None = None
+
+    try:
+        while True:
+            # A failed critical step stops new steps; those already running finish
+            if critical_error is None:
+                for i, step in enumerate(steps):
+                    if len(running) >= settings.max_concurrent_steps:
+                        break
+                    if tool_calls[i] is None and dependencies[i] <= finished:
+                        tool_call = tool_calls[i] = _tool_call(i, step)
+                        running[asyncio.create_task(_run_step(tool_call))] = i
+
+            if not running:
+                break
+
+            done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                i = running.pop(task)
+                finished.add(i)
+                failed = tool_calls[i]
+                # Decide whether to continue or abort
+                if (
+                    failed is not None
+                    and failed["status"] == "error"
+                    and steps[i].get("risk_level") in ("medium", "high")
+                    and critical_error is None
+                ):
+                    critical_error = f"Critical step failed: {failed['error']}"
+    finally:
+        for task in running:
+            task.cancel()
+        await asyncio.gather(*running, return_exceptions=True)
+
+    # Steps never started (after a critical failure) are left out
+    executed = [tool_call for tool_call in tool_calls if tool_call is not None]
+
+    if critical_error is not None:
+        return {
+            "tool_calls": executed,
+            "error": critical_error,
         }
-        tool_calls.append(tool_call)
-
-        try:
-            # Execute the tool
-            result = await execute_tool(tool_name, parameters)
-            tool_call["status"] = "complete"
-            tool_call["result"] = result
-            results.append(f"Step {step.get('step_number', '?')}: {result}")
-
-            logger.info(
-                "Tool executed",
-                tool=tool_name,
-                status="success",
-            )
-
-        except Exception as e:
-            tool_call["status"] = "error"
-            tool_call["error"] = str(e)
-
-            logger.error(
-                "Tool execution failed",
-                tool=tool_name,
-                error=str(e),
-            )
-
-            # Decide whether to continue or abort
-            if step.get("risk_level") in ("medium", "high"):
-                return {
-                    "tool_calls": tool_calls,
-                    "error": f"Critical step failed: {e}",
-                }
+
+    results = [
+        f"Step {step.get('step_number', '?')}: {tool_call['result']}"
+        for step, tool_call in zip(steps, tool_calls)
+        if tool_call is not None and tool_call["status"] == "complete"
+    ]
 
     return {
-        "tool_calls": tool_calls,
+        "tool_calls": executed,
         "execution_results": results,
     }
 
 
+def _tool_call(index: int, step: dict[str, Any]) -> ToolCall:
+    """Create the record of a step about to run."""
+    tool_name = step.get("tool", "")
+    return {
+        "id": f"tool_{index}_{tool_name}",
+        "name": tool_name,
+        "parameters": step.get("parameters", {}),
+        "status": "running",
+        "result": None,
+        "error": None,
+        "started_at": time.time(),
+        "duration_ms": None,
+    }
+
+
+async def _run_step(tool_call: ToolCall) -> None:
+    """Execute one step, recording its outcome and timing in its tool call."""
+    tool_name = tool_call["name"]
+    start = time.perf_counter()
+
+    try:
+        # Execute the tool
+        result = await execute_tool(tool_name, tool_call["parameters"])
+        tool_call["status"] = "complete"
+        tool_call["result"] = result
+
+        logger.info(
+            "Tool executed",
+            tool=tool_name,
+            status="success",
+        )
+
+    except Exception as e:
+        tool_call["status"] = "error"
+        tool_call["error"] = str(e)
+
+        logger.error(
+            "Tool execution failed",
+            tool=tool_name,
+            error=str(e),
+        )
+
+    finally:
+        tool_call["duration_ms"] = round((time.perf_counter() - start) * 1000, 3)
+
+
 async def execute_tool(tool_name: str, parameters: dict[str, Any]) -> str:
     """Execute a specific tool. This is a placeholder for actual tool implementations."""
 
@@ -115,9 +238,11 @@ async def execute_tool(tool_name: str, parameters: dict[str, Any]) -> str:
 
 
 async def _execute_filesystem_read(path: str) -> str:
-    """Read a file."""
-    import os
+    """Read a file off the event loop, so concurrent steps aren't blocked."""
+    return await asyncio.to_thread(_read_file, path)
+
 
+def _read_file(path: str) -> str:
     expanded_path = os.path.expanduser(path)
 
     if not os.path.exists(expanded_path):
@@ -133,9 +258,11 @@ async def _execute_filesystem_read(path: str) -> str:
 
 
 async def _execute_filesystem_list(path: str) -> str:
-    """List directory contents."""
-    import os
+    """List directory contents off the event loop."""
+    return await asyncio.to_thread(_list_directory, path)
 
+
+def _list_directory(path: str) -> str:
     expanded_path = os.path.expanduser(path)
 
     if not os.path.exists(expanded_path):
@@ -149,9 +276,11 @@ async def _execute_filesystem_list(path: str) -> str:
 
 
 async def _execute_filesystem_write(path: str, content: str) -> str:
-    """Write to a file."""
-    import os
+    """Write to a file off the event loop."""
+    return await asyncio.to_thread(_write_file, path, content)
+
 
+def _write_file(path: str, content: str) -> str:
     expanded_path = os.path.expanduser(path)
 
     # Ensure directory exists
@@ -164,25 +293,37 @@ async def _execute_filesystem_write(path: str, content: str) -> str:
 
 
 async def _execute_terminal_command(command: str) -> str:
-    """Execute a terminal command."""
-    import subprocess
+    """Execute a terminal command.
 
+    The command runs as an asyncio subprocess so the event loop stays free. It gets
+    its own process group, which is killed as a whole if the surrounding request
+    is cancelled or times out, so nothing the shell started keeps running.
+    """
     # Safety check - block dangerous commands
     dangerous_patterns = ["rm -rf /", "mkfs", "dd if=", ":(){", "fork bomb"]
     for pattern in dangerous_patterns:
         if pattern in command.lower():
             raise ValueError(f"Dangerous command blocked: {command}")
 
-    result = subprocess.run(
+    process = await asyncio.create_subprocess_shell(
         command,
-        shell=True,
-        capture_output=True,
-        text=True,
-        timeout=30,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+        start_new_session=True,
     )
 
-    output = result.stdout
-    if result.stderr:
-        output += f"\nStderr: {result.stderr}"
+    try:
+        stdout, stderr = await asyncio.wait_for(process.communicate(), timeout=30)
+    except BaseException:
+        # Cancelled or timed out - don't leave the command or its children running.
+        # The shell may have exited already while its children still run.
+        with suppress(ProcessLookupError):
+            os.killpg(process.pid, signal.SIGKILL)
+        await process.wait()
+        raise
+
+    output = stdout.decode(errors="replace")
+    if stderr:
+        output += f"\nStderr: {stderr.decode(errors='replace')}"
 
     return output[:10000]  # Limit output
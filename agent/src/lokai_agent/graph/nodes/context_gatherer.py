@@ -11,16 +11,21 @@ from lokai_agent.llm.router import LLMRouter
 logger = structlog.get_logger()
 
 
-async def context_gatherer(state: AgentState, llm: LLMRouter) -> dict[str, Any]:
-    """Gather relevant context for the user's request."""
-    intent = state.get("intent")
-
-    context: dict[str, Any] = {
+def base_context() -> dict[str, Any]:
+    """Context gathered for every request, whatever the intent."""
+    return {
         "current_directory": os.getcwd(),
         "home_directory": os.path.expanduser("~"),
         "username": os.environ.get("USER", "unknown"),
     }
 
+
+async def context_gatherer(state: AgentState, llm: LLMRouter) -> dict[str, Any]:
+    """Gather relevant context for the user's request."""
+    intent = state.get("intent")
+
+    context = base_context()
+
     if not intent:
         return {"context": context}
 
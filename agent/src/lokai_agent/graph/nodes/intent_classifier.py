@@ -1,19 +1,43 @@
 """Intent classification node."""
 
-import json
+import time
 from typing import Any
 
 import structlog
 
+from lokai_agent.graph.intent_index import IntentIndex
 from lokai_agent.graph.state import AgentState, Intent
 from lokai_agent.prompts.intent import INTENT_CLASSIFICATION_PROMPT
+from lokai_agent.prompts.schemas import INTENT_SCHEMA
+from lokai_agent.llm.profiles import CLASSIFY
 from lokai_agent.llm.router import LLMRouter
+from lokai_agent.llm.structured import StructuredOutputError
 
 logger = structlog.get_logger()
 
 
-async def intent_classifier(state: AgentState, llm: LLMRouter) -> dict[str, Any]:
-    """Classify the user's intent from their message."""
+def to_intent(classification: dict[str, Any]) -> Intent:
+    """Build an Intent from a classification validated against INTENT_SCHEMA."""
+    return {
+        "category": classification["intent"],
+        "confidence": float(classification["confidence"]),
+        "risk_level": classification["risk_level"],
+        "requires_approval": classification["requires_approval"],
+        "entities": classification["entities"],
+        "explanation": classification["explanation"],
+    }
+
+
+async def intent_classifier(
+    state: AgentState,
+    llm: LLMRouter,
+    intent_index: IntentIndex | None = None,
+) -> dict[str, Any]:
+    """Classify the user's intent from their message.
+
+    Messages that closely match a known exemplar are classified by the intent
+    index without calling the LLM.
+    """
     messages = state.get("messages", [])
 
     if not messages:
@@ -29,57 +53,46 @@ async def intent_classifier(state: AgentState, llm: LLMRouter) -> dict[str, Any]
     if not user_message:
         return {"intent": None, "error": "No user message found"}
 
+    if intent_index is not None:
+        fast = await intent_index.classify(user_message)
+        if fast is not None:
+            logger.info(
+                "Intent classified from exemplars",
+                intent=fast["category"],
+                confidence=fast["confidence"],
+            )
+            return {"current_message": user_message, "intent": fast}
+
     # Format the classification prompt
     prompt = INTENT_CLASSIFICATION_PROMPT.format(message=user_message)
 
     try:
-        # Get classification from LLM
-        response = await llm.generate(prompt, use_system_prompt=False)
-
-        # Parse JSON response
-        # Find JSON in response (it might have extra text)
-        json_start = response.find("{")
-        json_end = response.rfind("}") + 1
-
-        if json_start >= 0 and json_end > json_start:
-            json_str = response[json_start:json_end]
-            classification = json.loads(json_str)
-
-            intent: Intent = {
-                "category": classification.get("intent", "OTHER"),
-                "confidence": float(classification.get("confidence", 0.5)),
-                "risk_level": classification.get("risk_level", "low"),
-                "requires_approval": classification.get("requires_approval", False),
-                "entities": classification.get("entities", {}),
-                "explanation": classification.get("explanation", ""),
-            }
+        start = time.perf_counter()
+        # Get a schema-constrained classification from the fast model; the same
+        # message always classifies the same way, so the response is cached.
+        # Classification gates every request, so it is hedged against a slow Ollama.
+        classification = await llm.generate_json(
+            prompt, INTENT_SCHEMA, cache=True, hedge=True, profile=CLASSIFY
+        )
 
-            logger.info(
-                "Intent classified",
-                intent=intent["category"],
-                confidence=intent["confidence"],
-            )
+        intent = to_intent(classification)
+
+        logger.info(
+            "Intent classified",
+            intent=intent["category"],
+            confidence=intent["confidence"],
+        )
+
+        if intent_index is not None:
+            await intent_index.learn(user_message, intent, time.perf_counter() - start)
+
+        return {
+            "current_message": user_message,
+            "intent": intent,
+        }
 
-            return {
-                "current_message": user_message,
-                "intent": intent,
-            }
-        else:
-            logger.warning("Could not parse intent classification response", response=response)
-            return {
-                "current_message": user_message,
-                "intent": {
-                    "category": "OTHER",
-                    "confidence": 0.3,
-                    "risk_level": "low",
-                    "requires_approval": False,
-                    "entities": {},
-                    "explanation": "Could not parse classification",
-                },
-            }
-
-    except json.JSONDecodeError as e:
-        logger.error("JSON decode error in intent classification", error=str(e))
+    except StructuredOutputError as e:
+        logger.error("No valid intent classification", error=str(e))
         return {
             "current_message": user_message,
             "intent": {
@@ -88,7 +101,7 @@ async def intent_classifier(state: AgentState, llm: LLMRouter) -> dict[str, Any]
                 "risk_level": "low",
                 "requires_approval": False,
                 "entities": {},
-                "explanation": f"JSON parse error: {e}",
+                "explanation": f"Could not parse classification: {e}",
             },
         }
     except Exception as e:
@@ -0,0 +1,104 @@
+"""Fused intent classification and action planning node."""
+
+import json
+import os
+import time
+from typing import Any
+
+import structlog
+
+from lokai_agent.config import settings
+from lokai_agent.graph.intent_index import IntentIndex
+from lokai_agent.graph.nodes.action_planner import to_action_plan
+from lokai_agent.graph.nodes.context_gatherer import base_context
+from lokai_agent.graph.nodes.intent_classifier import intent_classifier, to_intent
+from lokai_agent.graph.state import AgentState
+from lokai_agent.llm.profiles import PLAN
+from lokai_agent.llm.router import LLMRouter
+from lokai_agent.llm.structured import StructuredOutputError
+from lokai_agent.prompts.planning import FUSED_PLANNING_PROMPT
+from lokai_agent.prompts.schemas import INTENT_PLAN_SCHEMA
+
+logger = structlog.get_logger()
+
+
+async def intent_planner(
+    state: AgentState,
+    llm: LLMRouter,
+    intent_index: IntentIndex | None = None,
+) -> dict[str, Any]:
+    """Classify the user's intent and plan its actions in a single LLM call.
+
+    Messages the intent index recognizes skip the LLM here and are planned by
+    the action planner. When the fused output is invalid or its confidence is
+    below fused_min_confidence, the message is classified again by the
+    two-stage path (intent_classifier, then action_planner). Accepted fused
+    classifications are taught to the intent index like two-stage ones.
+    """
+    messages = state.get("messages", [])
+    user_message = next(
+        (msg["content"] for msg in reversed(messages) if msg["role"] == "user"), None
+    )
+
+    if not user_message:
+        return {"intent": None, "error": "No user message found"}
+
+    if intent_index is not None:
+        fast = await intent_index.classify(user_message)
+        if fast is not None:
+            logger.info(
+                "Intent classified from exemplars",
+                intent=fast["category"],
+                confidence=fast["confidence"],
+            )
+            return {"current_message": user_message, "intent": fast}
+
+    context = base_context()
+    try:
+        context["directory_listing"] = os.listdir(context["current_directory"])[:20]
+    except OSError:
+        context["directory_listing"] = []
+
+    prompt = FUSED_PLANNING_PROMPT.format(
+        message=user_message,
+        current_directory=context["current_directory"],
+        recent_files=json.dumps(context["directory_listing"][:5]),
+    )
+
+    try:
+        start = time.perf_counter()
+        result = await llm.generate_json(prompt, INTENT_PLAN_SCHEMA, hedge=True, profile=PLAN)
+    except StructuredOutputError as e:
+        logger.warning("Invalid fused plan, using two-stage planning", error=str(e))
+        return await intent_classifier(state, llm, intent_index=intent_index)
+    except Exception as e:
+        logger.exception("Error in fused planning", error=str(e))
+        return {"current_message": user_message, "intent": None, "error": str(e)}
+
+    intent = to_intent(result)
+    if intent["confidence"] < settings.fused_min_confidence:
+        logger.info(
+            "Low-confidence fused plan, using two-stage planning",
+            confidence=intent["confidence"],
+        )
+        return await intent_classifier(state, llm, intent_index=intent_index)
+
+    if intent_index is not None:
+        await intent_index.learn(user_message, intent, time.perf_counter() - start)
+
+    update: dict[str, Any] = {
+        "current_message": user_message,
+        "intent": intent,
+        "context": context,
+    }
+    if result["plan"] is not None:
+        update["action_plan"] = to_action_plan(result["plan"])
+
+    logger.info(
+        "Intent classified and planned",
+        intent=intent["category"],
+        confidence=intent["confidence"],
+        steps=len(result["plan"]["steps"]) if result["plan"] else 0,
+    )
+
+    return update
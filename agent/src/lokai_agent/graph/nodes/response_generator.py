@@ -1,10 +1,13 @@
 """Response generation node."""
 
+from contextlib import aclosing
 from typing import Any
 
 import structlog
 
 from lokai_agent.graph.state import AgentState
+from lokai_agent.graph.streaming import emit_event, emit_token, is_streaming
+from lokai_agent.llm.profiles import ANSWER
 from lokai_agent.llm.router import LLMRouter
 
 logger = structlog.get_logger()
@@ -117,9 +120,22 @@ Do you approve these actions?"""
         if category == "GREETING":
             response = "Hello! I'm Lokai, your desktop AI assistant. How can I help you today?"
         elif category == "QUESTION":
-            # Generate an answer using the LLM
-            message = state.get("current_message", "")
-            response = await llm.generate(message)
+            # Generate an answer using the LLM, streaming it when a client listens
+            message = state.get("current_message") or ""
+            session_id = state.get("session_id")
+            session = (state.get("client") or "", session_id) if session_id else None
+            if is_streaming():
+                parts: list[str] = []
+                stream = llm.stream(
+                    message, session=session, on_event=emit_event, profile=ANSWER
+                )
+                async with aclosing(stream) as tokens:
+                    async for token in tokens:
+                        emit_token(token)
+                        parts.append(token)
+                response = "".join(parts)
+            else:
+                response = await llm.generate(message, session=session, profile=ANSWER)
         else:
             response = "I'm not sure how to help with that. Could you please provide more details?"
     else:
@@ -19,6 +19,8 @@ class ToolCall(TypedDict):
     status: str  # "pending", "running", "complete", "error"
     result: str | None
     error: str | None
+    started_at: float | None  # Unix time the tool started
+    duration_ms: float | None
 
 
 class Intent(TypedDict):
@@ -44,6 +46,9 @@ class AgentState(TypedDict):
     """The state of the agent graph."""
     # Conversation
     messages: Annotated[list[Message], add]
+    session_id: str | None
+    # Connection the message came from; session ids are only unique per client
+    client: str | None
 
     # Current processing
     current_message: str | None
@@ -0,0 +1,77 @@
+"""Streaming execution of the agent graph."""
+
+import asyncio
+from collections.abc import AsyncIterator, Callable
+from contextvars import ContextVar
+from typing import Any
+
+import structlog
+
+logger = structlog.get_logger()
+
+# Receives tokens and events produced by graph nodes while a streaming run is active
+_token_sink: ContextVar[Callable[[Any], None] | None] = ContextVar(
+    "lokai_token_sink", default=None
+)
+
+_DONE = object()
+
+
+def is_streaming() -> bool:
+    """Check whether the current graph run streams tokens to a client."""
+    return _token_sink.get() is not None
+
+
+def emit_token(token: str) -> None:
+    """Forward a token produced inside a graph node to the streaming client."""
+    sink = _token_sink.get()
+    if sink is not None:
+        sink(token)
+
+
+def emit_event(event: str, **fields: Any) -> None:
+    """Forward an event raised inside a graph node (e.g. a provider switch) to the client."""
+    sink = _token_sink.get()
+    if sink is not None:
+        sink({"type": "event", "event": event, **fields})
+
+
+async def stream_graph(graph: Any, state: dict[str, Any]) -> AsyncIterator[Any]:
+    """Run the compiled agent graph and stream its progress.
+
+    Node transitions come from LangGraph's ``updates`` stream, and LLM tokens are
+    forwarded by nodes through emit_token() as they are generated.
+
+    Yields:
+        Tokens as plain strings, ``{"type": "node", "node": name}`` after each node
+        completes, ``{"type": "event", "event": name, ...}`` for events emitted by
+        nodes, and finally ``{"type": "result", "state": final_state}``
+    """
+    queue: asyncio.Queue[Any] = asyncio.Queue()
+
+    async def run() -> dict[str, Any]:
+        # Set inside the task so the sink is only visible to this run's nodes
+        _token_sink.set(queue.put_nowait)
+        final_state: dict[str, Any] = {}
+        try:
+            async for mode, chunk in graph.astream(state, stream_mode=["updates", "values"]):
+                if mode == "updates":
+                    for node in chunk:
+                        queue.put_nowait({"type": "node", "node": node})
+                else:
+                    final_state = chunk
+            return final_state
+        finally:
+            queue.put_nowait(_DONE)
+
+    task = asyncio.create_task(run())
+
+    try:
+        while (item := await queue.get()) is not _DONE:
+            yield item
+
+        yield {"type": "result", "state": await task}
+    finally:
+        if not task.done():
+            task.cancel()
+            await asyncio.wait({task})
@@ -0,0 +1,158 @@
+"""Response cache for LLM generations."""
+
+import asyncio
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any
+
+import orjson
+import structlog
+
+logger = structlog.get_logger()
+
+
+class ResponseCache:
+    """Size-bounded LRU cache of LLM responses with a TTL.
+
+    Entries live in memory and, when a path is given, are also written to a SQLite
+    database so they survive agent restarts. Disk lookups run on a worker thread so
+    the event loop never waits on file I/O.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 512,
+        ttl: float = 3600.0,
+        path: str | None = None,
+        max_disk_entries: int = 10000,
+    ) -> None:
+        self.max_entries = max(1, max_entries)
+        self.ttl = ttl
+        self.max_disk_entries = max_disk_entries
+        self._entries: OrderedDict[str, tuple[float, str]] = OrderedDict()
+        self._db: sqlite3.Connection | None = None
+        self._db_lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        if path:
+            self._open_db(os.path.expanduser(path))
+
+    @staticmethod
+    def make_key(
+        provider: str,
+        model: str,
+        system: str | None,
+        prompt: str,
+        params: dict[str, Any],
+    ) -> str:
+        """Build a cache key from everything that determines the output."""
+        material = orjson.dumps(
+            [provider, model, system, prompt, params],
+            option=orjson.OPT_SORT_KEYS,
+        )
+        return hashlib.sha256(material).hexdigest()
+
+    async def get(self, key: str) -> str | None:
+        """Look up a response, checking memory first and then disk."""
+        now = time.time()
+        entry = self._entries.get(key)
+
+        if entry is not None:
+            created, value = entry
+            if now - created <= self.ttl:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return value
+            del self._entries[key]
+
+        if self._db is not None:
+            row = await asyncio.to_thread(self._db_get, key)
+            if row is not None and now - row[0] <= self.ttl:
+                self._remember(key, row[0], row[1])
+                self.hits += 1
+                return row[1]
+
+        self.misses += 1
+        return None
+
+    async def set(self, key: str, value: str) -> None:
+        """Store a response."""
+        created = time.time()
+        self._remember(key, created, value)
+
+        if self._db is not None:
+            await asyncio.to_thread(self._db_set, key, created, value)
+
+    def stats(self) -> dict[str, Any]:
+        """Cache statistics."""
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "persistent": self._db is not None,
+        }
+
+    def close(self) -> None:
+        """Close the on-disk backend."""
+        if self._db is not None:
+            with self._db_lock:
+                self._db.close()
+            self._db = None
+
+    def _remember(self, key: str, created: float, value: str) -> None:
+        self._entries[key] = (created, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def _open_db(self, path: str) -> None:
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, created REAL NOT NULL, value TEXT NOT NULL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS responses_created ON responses (created)")
+            self._db.execute("DELETE FROM responses WHERE created < ?", (time.time() - self.ttl,))
+            self._db.commit()
+            logger.info("LLM response cache opened", path=path)
+        except sqlite3.Error as e:
+            logger.warning("Could not open LLM response cache, using memory only", error=str(e))
+            self._db = None
+
+    def _db_get(self, key: str) -> tuple[float, str] | None:
+        with self._db_lock:
+            if self._db is None:
+                return None
+            row = self._db.execute(
+                "SELECT created, value FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+        return (row[0], row[1]) if row else None
+
+    def _db_set(self, key: str, created: float, value: str) -> None:
+        with self._db_lock:
+            if self._db is None:
+                return
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses (key, created, value) VALUES (?, ?, ?)",
+                (key, created, value),
+            )
+            # Keep only the newest entries
+            self._db.execute(
+                "DELETE FROM responses WHERE key IN ("
+                "SELECT key FROM responses ORDER BY created DESC LIMIT -1 OFFSET ?)",
+                (self.max_disk_entries,),
+            )
+            self._db.commit()
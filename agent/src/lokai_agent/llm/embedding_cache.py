@@ -0,0 +1,186 @@
+"""Content-addressed cache for text embeddings."""
+
+import hashlib
+import mmap
+import os
+import struct
+from array import array
+from collections import OrderedDict
+from typing import Any
+
+import structlog
+
+logger = structlog.get_logger()
+
+# File header: magic, vector dimension, row capacity, next slot to write. Version 2
+# holds unit-length vectors only; older files may not and are started over.
+_MAGIC = b"LKEMB002"
+_HEADER = struct.Struct("<8sIIQ")
+_HEADER_SIZE = 32
+_DIGEST_SIZE = 32
+_EMPTY_DIGEST = bytes(_DIGEST_SIZE)
+
+
+class EmbeddingCache:
+    """Two-tier embedding cache keyed by a hash of the model and text.
+
+    The memory tier is a small LRU of ready-to-use vectors. The optional disk tier
+    is a memory-mapped file of fixed-size rows (digest + ``dim`` float32 values)
+    used as a ring: when it is full, the oldest row is overwritten. Vectors whose
+    length differs from ``dim`` are kept in memory only.
+
+    The disk tier is attached by open(), which scans the file and should run off
+    the event loop.
+    """
+
+    def __init__(
+        self,
+        dim: int = 768,
+        max_entries: int = 2048,
+        path: str | None = None,
+        disk_capacity: int = 20000,
+    ) -> None:
+        self.dim = dim
+        self.max_entries = max(1, max_entries)
+        self._memory: OrderedDict[bytes, list[float]] = OrderedDict()
+
+        self._row_size = _DIGEST_SIZE + dim * 4
+        self._capacity = max(1, disk_capacity)
+        self._next_slot = 0
+        self._slots: dict[bytes, int] = {}
+        self._file: Any = None
+        self._map: mmap.mmap | None = None
+        self._path = os.path.expanduser(path) if path else None
+
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(model: str, text: str) -> bytes:
+        """Content hash identifying an embedding."""
+        return hashlib.sha256(f"{model}\0{text}".encode()).digest()
+
+    def get(self, key: bytes) -> list[float] | None:
+        """Look up a vector, checking memory first and then the mapped file."""
+        vector = self._memory.get(key)
+        if vector is not None:
+            self._memory.move_to_end(key)
+            self.hits += 1
+            return vector
+
+        slot = self._slots.get(key)
+        if slot is not None and self._map is not None:
+            offset = self._offset(slot) + _DIGEST_SIZE
+            values = array("f")
+            values.frombytes(self._map[offset : offset + self.dim * 4])
+            vector = values.tolist()
+            self._remember(key, vector)
+            self.hits += 1
+            self.disk_hits += 1
+            return vector
+
+        self.misses += 1
+        return None
+
+    def put(self, key: bytes, vector: list[float]) -> None:
+        """Store a vector in both tiers."""
+        self._remember(key, vector)
+
+        if self._map is None or len(vector) != self.dim or key in self._slots:
+            return
+
+        slot = self._next_slot
+        offset = self._offset(slot)
+
+        # Evict whatever occupied this row before
+        previous = bytes(self._map[offset : offset + _DIGEST_SIZE])
+        if previous != _EMPTY_DIGEST and self._slots.get(previous) == slot:
+            del self._slots[previous]
+
+        self._map[offset : offset + self._row_size] = key + array("f", vector).tobytes()
+        self._slots[key] = slot
+
+        self._next_slot = (slot + 1) % self._capacity
+        self._write_header()
+
+    def stats(self) -> dict[str, Any]:
+        """Cache statistics."""
+        lookups = self.hits + self.misses
+        return {
+            "memory_entries": len(self._memory),
+            "disk_entries": len(self._slots),
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+    def close(self) -> None:
+        """Flush and unmap the disk tier."""
+        if self._map is not None:
+            self._map.flush()
+            self._map.close()
+            self._map = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _remember(self, key: bytes, vector: list[float]) -> None:
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def _offset(self, slot: int) -> int:
+        return _HEADER_SIZE + slot * self._row_size
+
+    def _write_header(self) -> None:
+        assert self._map is not None
+        self._map[: _HEADER.size] = _HEADER.pack(_MAGIC, self.dim, self._capacity, self._next_slot)
+
+    def open(self) -> None:
+        """Map the on-disk tier, if a path was configured."""
+        if self._path is None or self._map is not None:
+            return
+
+        path = self._path
+        size = _HEADER_SIZE + self._capacity * self._row_size
+
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self._file = open(path, "a+b")
+            self._file.seek(0)
+            header = self._file.read(_HEADER.size)
+
+            reset = True
+            if len(header) == _HEADER.size:
+                magic, dim, capacity, next_slot = _HEADER.unpack(header)
+                reset = magic != _MAGIC or dim != self.dim or capacity != self._capacity
+                if not reset:
+                    self._next_slot = next_slot % self._capacity
+
+            if reset:
+                # Unknown layout, a different model dimension or capacity: start over
+                self._file.truncate(0)
+                self._next_slot = 0
+            self._file.truncate(size)
+
+            self._map = mmap.mmap(self._file.fileno(), size)
+            if reset:
+                self._write_header()
+            else:
+                self._load_index()
+
+            logger.info("Embedding cache opened", path=path, entries=len(self._slots))
+        except OSError as e:
+            logger.warning("Could not open embedding cache, using memory only", error=str(e))
+            self.close()
+
+    def _load_index(self) -> None:
+        assert self._map is not None
+        for slot in range(self._capacity):
+            offset = self._offset(slot)
+            digest = bytes(self._map[offset : offset + _DIGEST_SIZE])
+            if digest != _EMPTY_DIGEST:
+                self._slots[digest] = slot
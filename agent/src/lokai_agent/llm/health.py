@@ -0,0 +1,159 @@
+"""Provider health tracking: circuit breakers with rolling error and latency stats."""
+
+import statistics
+import time
+from collections import deque
+from typing import Any
+
+import structlog
+
+logger = structlog.get_logger()
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """Circuit breaker for one LLM provider.
+
+    closed: calls flow normally. The breaker opens after ``failure_threshold``
+        consecutive failures, or when the error rate over the last ``window`` calls
+        reaches ``error_rate_threshold``.
+    open: calls are refused so routing can skip the provider immediately. After
+        ``reset_timeout`` seconds the breaker becomes half-open.
+    half_open: a single trial call is let through; success closes the breaker,
+        failure opens it again.
+
+    Background health probes report through record_probe(): a failed probe trips
+    the breaker, a healthy one makes an open breaker half-open early. Only a
+    successful call closes it.
+
+    Latencies are kept for stats() only; whether a provider is used depends on
+    the breaker state alone.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = 3,
+        error_rate_threshold: float = 0.5,
+        window: int = 20,
+        reset_timeout: float = 30.0,
+    ) -> None:
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.error_rate_threshold = error_rate_threshold
+        self.reset_timeout = reset_timeout
+
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._consecutive_failures = 0
+        self._outcomes: deque[bool] = deque(maxlen=window)
+        self._latencies: deque[float] = deque(maxlen=window)
+        self._times_opened = 0
+
+    @property
+    def state(self) -> str:
+        """Current state, moving from open to half-open once the timeout has passed."""
+        if self._state == OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+            self._transition(HALF_OPEN)
+        return self._state
+
+    @property
+    def available(self) -> bool:
+        """Whether a call would currently be admitted, without claiming a trial."""
+        state = self.state
+        return state == CLOSED or (state == HALF_OPEN and not self._trial_in_flight)
+
+    def allow(self) -> bool:
+        """Admit a call, claiming the trial slot when half-open."""
+        state = self.state
+        if state == CLOSED:
+            return True
+        if state == HALF_OPEN and not self._trial_in_flight:
+            self._trial_in_flight = True
+            return True
+        return False
+
+    def record_success(self, latency: float) -> None:
+        """Record a successful call and its latency in seconds."""
+        self._trial_in_flight = False
+        self._consecutive_failures = 0
+        self._outcomes.append(True)
+        self._latencies.append(latency)
+
+        if self._state != CLOSED:
+            self._transition(CLOSED)
+
+    def record_failure(self) -> None:
+        """Record a failed call."""
+        self._trial_in_flight = False
+        self._consecutive_failures += 1
+        self._outcomes.append(False)
+
+        if self._state == HALF_OPEN or self._should_trip():
+            self._trip()
+
+    def release(self) -> None:
+        """Give back an admitted call that ended without a verdict (e.g. cancelled)."""
+        self._trial_in_flight = False
+
+    def record_probe(self, healthy: bool) -> None:
+        """Apply the result of a background health probe.
+
+        A server that answers its health endpoint may still fail real calls, so a
+        healthy probe only lets the next call through as a trial.
+        """
+        if not healthy:
+            if self._state != OPEN:
+                self._trip()
+        elif self._state == OPEN:
+            self._transition(HALF_OPEN)
+
+    def error_rate(self) -> float:
+        """Fraction of failed calls in the rolling window."""
+        if not self._outcomes:
+            return 0.0
+        return self._outcomes.count(False) / len(self._outcomes)
+
+    def latency_quantile(self, q: float) -> float | None:
+        """Latency quantile over the rolling window, in seconds."""
+        if not self._latencies:
+            return None
+        if len(self._latencies) == 1:
+            return self._latencies[0]
+        cuts = statistics.quantiles(self._latencies, n=100, method="inclusive")
+        return cuts[min(98, max(0, round(q * 100) - 1))]
+
+    def stats(self) -> dict[str, Any]:
+        """Breaker statistics."""
+        return {
+            "state": self.state,
+            "calls": len(self._outcomes),
+            "error_rate": self.error_rate(),
+            "consecutive_failures": self._consecutive_failures,
+            "latency_p50": self.latency_quantile(0.5),
+            "latency_p95": self.latency_quantile(0.95),
+            "times_opened": self._times_opened,
+        }
+
+    def _should_trip(self) -> bool:
+        if self._consecutive_failures >= self.failure_threshold:
+            return True
+        # Only judge the error rate once the window holds enough calls
+        full = len(self._outcomes) == self._outcomes.maxlen
+        return full and self.error_rate() >= self.error_rate_threshold
+
+    def _trip(self) -> None:
+        self._opened_at = time.monotonic()
+        self._times_opened += 1
+        self._transition(OPEN)
+
+    def _transition(self, state: str) -> None:
+        if state == self._state:
+            return
+        logger.info("Circuit breaker state changed", provider=self.name, old=self._state, new=state)
+        self._state = state
+        self._trial_in_flight = False
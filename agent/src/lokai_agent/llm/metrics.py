@@ -0,0 +1,159 @@
+"""Per-call LLM telemetry: latency, token counts and throughput.
+
+Each generation is attributed to the graph node that made it (through the
+``current_node`` context variable the graph sets) and to the provider and model
+that served it. Values are kept in rolling windows and summarized on demand.
+"""
+
+import statistics
+from collections import deque
+from contextvars import ContextVar
+from typing import Any
+
+# Name of the graph node currently running, for attributing LLM calls
+current_node: ContextVar[str | None] = ContextVar("lokai_current_node", default=None)
+
+# Ollama reports durations in nanoseconds
+_NS = 1e9
+
+
+class Histogram:
+    """Rolling window of samples of one metric."""
+
+    def __init__(self, window: int = 200) -> None:
+        self._samples: deque[float] = deque(maxlen=window)
+        self.count = 0
+
+    def add(self, value: float) -> None:
+        """Add a sample."""
+        self._samples.append(value)
+        self.count += 1
+
+    def summary(self) -> dict[str, Any]:
+        """Count over all time, and mean and quantiles over the window."""
+        samples = self._samples
+        if not samples:
+            return {"count": self.count}
+
+        if len(samples) == 1:
+            p50 = p95 = p99 = samples[0]
+        else:
+            cuts = statistics.quantiles(samples, n=100, method="inclusive")
+            p50, p95, p99 = cuts[49], cuts[94], cuts[98]
+
+        return {
+            "count": self.count,
+            "mean": statistics.fmean(samples),
+            "p50": p50,
+            "p95": p95,
+            "p99": p99,
+            "max": max(samples),
+        }
+
+
+class LLMMetrics:
+    """Histograms of LLM call metrics per (node, provider, model).
+
+    Metrics recorded, where the provider reports them:
+        total_seconds: wall time of the call
+        ttft_seconds: time to the first streamed token
+        load_seconds: time Ollama spent loading the model
+        prefill_seconds / decode_seconds: prompt evaluation and generation time
+        prompt_tokens / completion_tokens: token counts
+        prefill_tokens_per_second / decode_tokens_per_second: throughput
+    """
+
+    def __init__(self, window: int = 200) -> None:
+        self.window = window
+        self._series: dict[tuple[str, str, str], dict[str, Histogram]] = {}
+
+    def record(self, provider: str, model: str, **values: float | None) -> None:
+        """Record one call's metrics, attributed to the current graph node."""
+        key = (current_node.get() or "none", provider, model)
+        series = self._series.setdefault(key, {})
+        for name, value in values.items():
+            if value is None:
+                continue
+            histogram = series.get(name)
+            if histogram is None:
+                histogram = series[name] = Histogram(self.window)
+            histogram.add(value)
+
+    def record_ollama(
+        self,
+        model: str,
+        data: dict[str, Any] | None,
+        total: float,
+        ttft: float | None = None,
+    ) -> None:
+        """Record an Ollama call from the statistics of its final response.
+
+        Args:
+            model: Model that served the call
+            data: The final /api/generate object, or None if the call ended early
+            total: Wall time of the call in seconds
+            ttft: Time to the first token in seconds, for streams
+        """
+        data = data or {}
+        prompt_tokens = data.get("prompt_eval_count")
+        completion_tokens = data.get("eval_count")
+        prefill = data.get("prompt_eval_duration", 0) / _NS or None
+        decode = data.get("eval_duration", 0) / _NS or None
+
+        self.record(
+            "ollama",
+            model,
+            total_seconds=total,
+            ttft_seconds=ttft,
+            load_seconds=data.get("load_duration", 0) / _NS or None,
+            prefill_seconds=prefill,
+            decode_seconds=decode,
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens,
+            prefill_tokens_per_second=_rate(prompt_tokens, prefill),
+            decode_tokens_per_second=_rate(completion_tokens, decode),
+        )
+
+    def record_openai(
+        self,
+        model: str,
+        usage: dict[str, Any] | None,
+        total: float,
+        ttft: float | None = None,
+    ) -> None:
+        """Record an OpenAI call from its usage block.
+
+        Decode throughput is only known for streams, as the completion tokens over
+        the time after the first token.
+        """
+        usage = usage or {}
+        completion_tokens = usage.get("completion_tokens")
+        decode = total - ttft if ttft is not None else None
+
+        self.record(
+            "openai",
+            model,
+            total_seconds=total,
+            ttft_seconds=ttft,
+            prompt_tokens=usage.get("prompt_tokens"),
+            completion_tokens=completion_tokens,
+            decode_tokens_per_second=_rate(completion_tokens, decode),
+        )
+
+    def snapshot(self) -> list[dict[str, Any]]:
+        """Summaries of every series."""
+        return [
+            {
+                "node": node,
+                "provider": provider,
+                "model": model,
+                "metrics": {name: h.summary() for name, h in sorted(series.items())},
+            }
+            for (node, provider, model), series in sorted(self._series.items())
+        ]
+
+
+def _rate(tokens: int | None, seconds: float | None) -> float | None:
+    if not tokens or not seconds:
+        return None
+    return tokens / seconds
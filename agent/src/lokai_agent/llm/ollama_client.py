@@ -1,61 +1,116 @@
 """Ollama LLM client for local model inference."""
 
-from collections.abc import AsyncIterator
-from typing import Any
+import asyncio
+import math
+import time
+from collections import OrderedDict
+from collections.abc import AsyncGenerator, Awaitable, Callable, Iterator
+from typing import TYPE_CHECKING, Any, cast
 
 import httpx
 import structlog
-from langchain_community.llms import Ollama
-from langchain_community.embeddings import OllamaEmbeddings
 
 from lokai_agent.config import settings
+from lokai_agent.llm.embedding_cache import EmbeddingCache
+from lokai_agent.llm.metrics import LLMMetrics
+from lokai_agent.llm.profiles import CLASSIFY, GenerationProfile, get_profile
+from lokai_agent.llm.transport import aiter_ndjson, create_client
+
+if TYPE_CHECKING:
+    # LangChain is slow to import, so it is only loaded when these are first used
+    from langchain_community.embeddings import OllamaEmbeddings
+    from langchain_community.llms import Ollama
 
 logger = structlog.get_logger()
 
+# An embedding, or the error that prevented computing it
+EmbeddingResult = list[float] | BaseException
+
+# A conversation: the client it belongs to and the client's session id, so that
+# clients reusing the same session id never continue each other's context
+SessionKey = tuple[str, str]
+
+
+def _chunk_texts(texts: list[str], max_count: int, max_chars: int) -> Iterator[list[str]]:
+    """Split texts into chunks bounded by item count and total characters."""
+    chunk: list[str] = []
+    chars = 0
+
+    for text in texts:
+        if chunk and (len(chunk) >= max_count or chars + len(text) > max_chars):
+            yield chunk
+            chunk, chars = [], 0
+        chunk.append(text)
+        chars += len(text)
+
+    if chunk:
+        yield chunk
+
+
+def _normalize(vector: list[float]) -> list[float]:
+    """Scale a vector to unit length, as /api/embed returns them."""
+    norm = math.sqrt(sum(x * x for x in vector))
+    return [x / norm for x in vector] if norm else vector
+
+
+def _is_missing_endpoint(error: httpx.HTTPStatusError) -> bool:
+    """Whether a 404 means the endpoint doesn't exist, rather than e.g. the model.
+
+    Ollama's handlers answer with a JSON ``error`` (such as a model that isn't
+    pulled); only unknown routes get a plain-text 404.
+    """
+    if error.response.status_code != 404:
+        return False
+    try:
+        body = error.response.json()
+    except ValueError:
+        return True
+    return not (isinstance(body, dict) and "error" in body)
+
 
 class OllamaClient:
     """Client for interacting with Ollama API."""
 
-    def __init__(self) -> None:
+    def __init__(self, metrics: LLMMetrics | None = None) -> None:
         self.base_url = settings.ollama_host
+        self.metrics = metrics
         self.model = settings.ollama_model
         self.embedding_model = settings.ollama_embedding_model
         self._client: httpx.AsyncClient | None = None
         self._llm: Ollama | None = None
         self._embeddings: OllamaEmbeddings | None = None
+        # Model and Ollama context of each session's last turn, least recent first
+        self._session_contexts: OrderedDict[SessionKey, tuple[str, list[int]]] = OrderedDict()
+        # None until the first batch reveals whether the server has /api/embed
+        self._batch_embed_supported: bool | None = None
+        self.embedding_cache = EmbeddingCache(
+            dim=settings.embedding_dim,
+            max_entries=settings.embedding_cache_size,
+            path=settings.embedding_cache_path,
+            disk_capacity=settings.embedding_cache_disk_entries,
+        )
 
     async def initialize(self) -> None:
         """Initialize the client and verify connection."""
-        self._client = httpx.AsyncClient(base_url=self.base_url, timeout=60.0)
+        if self._client is None:
+            self._client = create_client(self.base_url)
 
         # Check if Ollama is available
         if not await self.health_check():
             raise ConnectionError(f"Cannot connect to Ollama at {self.base_url}")
 
-        # Initialize LangChain components
-        self._llm = Ollama(
-            base_url=self.base_url,
-            model=self.model,
-            temperature=settings.temperature,
-        )
-
-        self._embeddings = OllamaEmbeddings(
-            base_url=self.base_url,
-            model=self.embedding_model,
-        )
+        await asyncio.to_thread(self.embedding_cache.open)
 
         logger.info("Ollama client initialized", model=self.model, host=self.base_url)
 
     async def health_check(self) -> bool:
         """Check if Ollama is available."""
+        if self._client is None:
+            self._client = create_client(self.base_url)
+
         try:
-            if not self._client:
-                async with httpx.AsyncClient(base_url=self.base_url, timeout=5.0) as client:
-                    response = await client.get("/api/tags")
-                    return response.status_code == 200
-            else:
-                response = await self._client.get("/api/tags")
-                return response.status_code == 200
+            response = await self._client.get("/api/tags", timeout=5.0)
+            return response.status_code == 200
         except Exception as e:
             logger.warning("Ollama health check failed", error=str(e))
             return False
@@ -70,83 +125,341 @@ class OllamaClient:
         data = response.json()
         return data.get("models", [])
 
-    async def generate(self, prompt: str, system: str | None = None) -> str:
-        """Generate a response from the model."""
-        if not self._client:
-            raise RuntimeError("Client not initialized")
-
+    def _generate_payload(
+        self,
+        prompt: str,
+        system: str | None,
+        stream: bool,
+        session: SessionKey | None = None,
+        profile: GenerationProfile | None = None,
+    ) -> dict[str, Any]:
+        """Build an /api/generate payload, continuing the session's context if any."""
+        profile = profile or get_profile()
         payload: dict[str, Any] = {
-            "model": self.model,
+            "model": profile.ollama_model,
             "prompt": prompt,
-            "stream": False,
+            "stream": stream,
+            "keep_alive": settings.ollama_keep_alive,
+            "options": profile.ollama_options(),
         }
 
-        if system:
+        saved = self._session_contexts.get(session) if session else None
+        # A context is only meaningful to the model that produced it
+        context = saved[1] if saved and saved[0] == profile.ollama_model else None
+        if context:
+            # The context already holds the system prompt and earlier turns, so
+            # Ollama only has to evaluate the new prompt
+            payload["context"] = context
+        elif system:
             payload["system"] = system
 
+        return payload
+
+    def _save_context(self, session: SessionKey | None, model: str, data: dict[str, Any]) -> None:
+        """Remember the context returned with a finished response for the next turn."""
+        if not session:
+            return
+
+        context = data.get("context")
+        if not context or len(context) > settings.ollama_session_max_tokens:
+            # Start over rather than let Ollama truncate the system prompt away
+            self._session_contexts.pop(session, None)
+            return
+
+        self._session_contexts[session] = (model, context)
+        self._session_contexts.move_to_end(session)
+        while len(self._session_contexts) > settings.ollama_max_sessions:
+            self._session_contexts.popitem(last=False)
+
+    def forget_session(self, session: SessionKey) -> None:
+        """Drop the stored context of a session."""
+        self._session_contexts.pop(session, None)
+
+    async def warmup(self, system: str | None = None) -> None:
+        """Load the models and prefill the system prompt ahead of the first request.
+
+        Ollama keeps the evaluated prompt prefix cached, so later requests that start
+        with the same system prompt skip most of the prefill. The fast model, when
+        configured, is loaded too.
+        """
+        if not self._client:
+            raise RuntimeError("Client not initialized")
+
+        start = time.perf_counter()
+        payloads = [self._generate_payload("Hi", system, stream=False)]
+        fast = get_profile(CLASSIFY)
+        if fast.ollama_model != payloads[0]["model"]:
+            payloads.append(self._generate_payload("Hi", None, stream=False, profile=fast))
+
+        try:
+            for payload in payloads:
+                payload["options"] = {"num_predict": 1}
+                response = await self._client.post("/api/generate", json=payload)
+                response.raise_for_status()
+
+            response = await self._client.post(
+                "/api/embed",
+                json={
+                    "model": self.embedding_model,
+                    "input": "warmup",
+                    "keep_alive": settings.ollama_keep_alive,
+                },
+            )
+            # Older servers without /api/embed load the model on first use instead
+            if response.status_code != 404:
+                response.raise_for_status()
+        except httpx.HTTPError as e:
+            logger.warning("Ollama warmup failed", error=str(e))
+            return
+
+        logger.info("Ollama models warmed up", seconds=round(time.perf_counter() - start, 2))
+
+    async def generate(
+        self,
+        prompt: str,
+        system: str | None = None,
+        session: SessionKey | None = None,
+        profile: GenerationProfile | None = None,
+    ) -> str:
+        """Generate a response from the model.
+
+        With a session, the conversation continues from the context Ollama returned
+        for that session's previous turn. The profile selects the model and its
+        output budget and sampling options.
+        """
+        if not self._client:
+            raise RuntimeError("Client not initialized")
+
+        payload = self._generate_payload(prompt, system, False, session, profile)
+
+        start = time.perf_counter()
         response = await self._client.post("/api/generate", json=payload)
         response.raise_for_status()
         data = response.json()
+        self._save_context(session, payload["model"], data)
+        if self.metrics is not None:
+            self.metrics.record_ollama(payload["model"], data, time.perf_counter() - start)
         return data.get("response", "")
 
-    async def stream(self, prompt: str, system: str | None = None) -> AsyncIterator[str]:
-        """Stream a response from the model."""
+    async def stream(
+        self,
+        prompt: str,
+        system: str | None = None,
+        session: SessionKey | None = None,
+        json_schema: dict[str, Any] | None = None,
+        profile: GenerationProfile | None = None,
+    ) -> AsyncGenerator[str, None]:
+        """Stream a response from the model.
+
+        With ``json_schema``, generation is constrained to JSON matching the schema
+        (or to any JSON when ollama_json_format is "json", for older servers).
+
+        Closing or cancelling the iterator closes the HTTP response, which drops the
+        connection so Ollama stops generating immediately.
+        """
         if not self._client:
             raise RuntimeError("Client not initialized")
 
-        payload: dict[str, Any] = {
-            "model": self.model,
-            "prompt": prompt,
-            "stream": True,
-        }
-
-        if system:
-            payload["system"] = system
+        payload = self._generate_payload(prompt, system, True, session, profile)
+        if json_schema is not None:
+            payload["format"] = json_schema if settings.ollama_json_format == "schema" else "json"
 
-        async with self._client.stream("POST", "/api/generate", json=payload) as response:
-            response.raise_for_status()
-            async for line in response.aiter_lines():
-                if line:
-                    import json
-                    data = json.loads(line)
-                    if "response" in data:
+        start = time.perf_counter()
+        first_token: float | None = None
+        final: dict[str, Any] | None = None
+        try:
+            async with self._client.stream("POST", "/api/generate", json=payload) as response:
+                response.raise_for_status()
+                async for data in aiter_ndjson(response):
+                    if data.get("response"):
+                        if first_token is None:
+                            first_token = time.perf_counter() - start
                         yield data["response"]
+                    if data.get("done"):
+                        final = data
+                        self._save_context(session, payload["model"], data)
+        finally:
+            # Streams closed early (e.g. a complete JSON object) still report TTFT
+            if self.metrics is not None and first_token is not None:
+                self.metrics.record_ollama(
+                    payload["model"], final, time.perf_counter() - start, first_token
+                )
 
     async def embed(self, text: str) -> list[float]:
-        """Generate embeddings for text."""
+        """Generate embeddings for text, served from the embedding cache when possible."""
+        result = (await self.embed_batch([text], return_exceptions=True))[0]
+        if isinstance(result, BaseException):
+            raise result
+        return result
+
+    async def embed_batch(
+        self,
+        texts: list[str],
+        return_exceptions: bool = False,
+    ) -> list[EmbeddingResult]:
+        """Generate embeddings for multiple texts.
+
+        Cached texts are served from the embedding cache and each distinct miss is
+        computed once. Misses go to the batched /api/embed endpoint in chunks
+        bounded by count and total characters; on servers without it, they are
+        embedded concurrently through /api/embeddings. Vectors are unit length
+        either way.
+
+        Args:
+            texts: Texts to embed
+            return_exceptions: Put the exception of a failed text in its slot
+                instead of raising the first failure
+
+        Returns:
+            One embedding (or exception) per text, in input order
+        """
+        keys = [EmbeddingCache.key(self.embedding_model, text) for text in texts]
+        results: dict[bytes, EmbeddingResult] = {}
+        missing: dict[bytes, str] = {}
+
+        for key, text in zip(keys, texts):
+            if key in results or key in missing:
+                continue
+            cached = self.embedding_cache.get(key)
+            if cached is not None:
+                results[key] = cached
+            else:
+                missing[key] = text
+
+        if missing:
+            computed = await self._embed_many(list(missing.values()))
+            for key, embedding in zip(missing, computed):
+                if not isinstance(embedding, BaseException) and embedding:
+                    self.embedding_cache.put(key, embedding)
+                results[key] = embedding
+
+        ordered = [results[key] for key in keys]
+        if not return_exceptions:
+            for result in ordered:
+                if isinstance(result, BaseException):
+                    raise result
+        return ordered
+
+    async def _embed_many(self, texts: list[str]) -> list[EmbeddingResult]:
+        """Embed texts through the best endpoint the server supports."""
         if not self._client:
             raise RuntimeError("Client not initialized")
 
+        if self._batch_embed_supported is not False:
+            try:
+                results = await self._embed_batched(texts)
+                self._batch_embed_supported = True
+                return results
+            except httpx.HTTPStatusError as e:
+                if not _is_missing_endpoint(e):
+                    raise
+                logger.info("Ollama has no /api/embed, embedding texts concurrently")
+                self._batch_embed_supported = False
+
+        return await self._embed_concurrently(texts, self._embed_single)
+
+    async def _embed_batched(self, texts: list[str]) -> list[EmbeddingResult]:
+        """Embed texts with /api/embed, chunked by count and total characters."""
+        results: list[EmbeddingResult] = []
+
+        for chunk in _chunk_texts(
+            texts, settings.embed_batch_size, settings.embed_batch_max_chars
+        ):
+            try:
+                results.extend(await self._post_embed(chunk))
+            except httpx.HTTPStatusError as e:
+                if _is_missing_endpoint(e):
+                    raise
+                if len(chunk) == 1 or e.response.status_code == 404:
+                    # The input itself failed, or the model is missing and every
+                    # text would fail alike
+                    results.extend([e] * len(chunk))
+                    continue
+                # Retry the chunk text by text so one bad input fails alone
+                results.extend(
+                    await self._embed_concurrently(
+                        chunk, lambda text: self._post_embed([text]), single=True
+                    )
+                )
+
+        return results
+
+    async def _embed_concurrently(
+        self,
+        texts: list[str],
+        embed_one: Callable[[str], Awaitable[Any]],
+        single: bool = False,
+    ) -> list[EmbeddingResult]:
+        """Embed texts one per request, a bounded number at a time."""
+        semaphore = asyncio.Semaphore(settings.embed_concurrency)
+
+        async def bounded(text: str) -> Any:
+            async with semaphore:
+                result = await embed_one(text)
+                return result[0] if single else result
+
+        results = await asyncio.gather(*(bounded(text) for text in texts), return_exceptions=True)
+        return cast(list[EmbeddingResult], results)
+
+    async def _post_embed(self, texts: list[str]) -> list[list[float]]:
+        assert self._client is not None
+        payload = {
+            "model": self.embedding_model,
+            "input": texts,
+            "keep_alive": settings.ollama_keep_alive,
+        }
+
+        response = await self._client.post("/api/embed", json=payload)
+        response.raise_for_status()
+        embeddings = response.json().get("embeddings", [])
+        if len(embeddings) != len(texts):
+            raise ValueError(f"Expected {len(texts)} embeddings, got {len(embeddings)}")
+        return cast(list[list[float]], embeddings)
+
+    async def _embed_single(self, text: str) -> list[float]:
+        assert self._client is not None
         payload = {
             "model": self.embedding_model,
             "prompt": text,
+            "keep_alive": settings.ollama_keep_alive,
         }
 
         response = await self._client.post("/api/embeddings", json=payload)
         response.raise_for_status()
         data = response.json()
-        return data.get("embedding", [])
-
-    async def embed_batch(self, texts: list[str]) -> list[list[float]]:
-        """Generate embeddings for multiple texts."""
-        embeddings = []
-        for text in texts:
-            embedding = await self.embed(text)
-            embeddings.append(embedding)
-        return embeddings
+        # /api/embeddings returns raw vectors; normalize them so both endpoints give
+        # the same vectors and cached entries don't depend on which one answered
+        return _normalize(data.get("embedding", []))
 
     @property
-    def llm(self) -> Ollama:
-        """Get the LangChain LLM instance."""
-        if not self._llm:
+    def llm(self) -> "Ollama":
+        """Get the LangChain LLM instance, creating it on first use."""
+        if not self._client:
             raise RuntimeError("Client not initialized")
+
+        if self._llm is None:
+            from langchain_community.llms import Ollama
+
+            self._llm = Ollama(
+                base_url=self.base_url,
+                model=self.model,
+                temperature=settings.temperature,
+            )
         return self._llm
 
     @property
-    def embeddings(self) -> OllamaEmbeddings:
-        """Get the LangChain embeddings instance."""
-        if not self._embeddings:
+    def embeddings(self) -> "OllamaEmbeddings":
+        """Get the LangChain embeddings instance, creating it on first use."""
+        if not self._client:
             raise RuntimeError("Client not initialized")
+
+        if self._embeddings is None:
+            from langchain_community.embeddings import OllamaEmbeddings
+
+            self._embeddings = OllamaEmbeddings(
+                base_url=self.base_url,
+                model=self.embedding_model,
+            )
         return self._embeddings
 
     async def close(self) -> None:
@@ -154,3 +467,4 @@ class OllamaClient:
         if self._client:
             await self._client.aclose()
             self._client = None
+        self.embedding_cache.close()
@@ -1,23 +1,32 @@
 """OpenAI client for fallback LLM inference."""
 
-from collections.abc import AsyncIterator
+import time
+from collections.abc import AsyncGenerator
 from typing import Any
 
 import httpx
 import structlog
 
 from lokai_agent.config import settings
+from lokai_agent.llm.metrics import LLMMetrics
+from lokai_agent.llm.profiles import GenerationProfile, get_profile
+from lokai_agent.llm.transport import aiter_sse, create_client
+from lokai_agent.prompts.system import CONTINUATION_PROMPT
 
 logger = structlog.get_logger()
 
+# Model families that accept a JSON schema in response_format
+STRUCTURED_OUTPUT_MODELS = ("gpt-4o", "gpt-4.1", "gpt-5", "o1", "o3", "o4")
+
 
 class OpenAIClient:
     """Client for OpenAI API as fallback."""
 
-    def __init__(self) -> None:
+    def __init__(self, metrics: LLMMetrics | None = None) -> None:
         self.api_key = settings.openai_api_key
+        self.metrics = metrics
         self.base_url = "https://api.openai.com/v1"
-        self.model = "gpt-3.5-turbo"
+        self.model = settings.openai_model
         self._client: httpx.AsyncClient | None = None
 
     async def initialize(self) -> None:
@@ -26,13 +35,13 @@ class OpenAIClient:
             logger.warning("OpenAI API key not set, fallback will not be available")
             return
 
-        self._client = httpx.AsyncClient(
-            base_url=self.base_url,
+        self._client = create_client(
+            self.base_url,
             headers={
                 "Authorization": f"Bearer {self.api_key}",
                 "Content-Type": "application/json",
             },
-            timeout=60.0,
+            http2=settings.openai_http2,
         )
         logger.info("OpenAI client initialized")
 
@@ -41,8 +50,13 @@ class OpenAIClient:
         """Check if OpenAI is available."""
         return self._client is not None and self.api_key is not None
 
-    async def generate(self, prompt: str, system: str | None = None) -> str:
-        """Generate a response from OpenAI."""
+    async def generate(
+        self,
+        prompt: str,
+        system: str | None = None,
+        profile: GenerationProfile | None = None,
+    ) -> str:
+        """Generate a response from OpenAI with the profile's model and sampling."""
         if not self._client:
             raise RuntimeError("OpenAI client not initialized")
 
@@ -53,21 +67,53 @@ class OpenAIClient:
 
         messages.append({"role": "user", "content": prompt})
 
+        params = (profile or get_profile()).openai_params()
+        start = time.perf_counter()
         response = await self._client.post(
             "/chat/completions",
-            json={
-                "model": self.model,
-                "messages": messages,
-                "temperature": settings.temperature,
-                "max_tokens": settings.max_tokens,
-            },
+            json={"messages": messages, **params},
         )
         response.raise_for_status()
         data = response.json()
+        if self.metrics is not None:
+            self.metrics.record_openai(
+                params["model"], data.get("usage"), time.perf_counter() - start
+            )
         return data["choices"][0]["message"]["content"]
 
-    async def stream(self, prompt: str, system: str | None = None) -> AsyncIterator[str]:
-        """Stream a response from OpenAI."""
+    def response_format(
+        self,
+        json_schema: dict[str, Any],
+        model: str | None = None,
+    ) -> dict[str, Any]:
+        """Build the response_format constraining output to a JSON schema.
+
+        Models without structured-output support only get JSON mode.
+        """
+        if (model or self.model).startswith(STRUCTURED_OUTPUT_MODELS):
+            return {
+                "type": "json_schema",
+                "json_schema": {"name": "response", "schema": json_schema},
+            }
+        return {"type": "json_object"}
+
+    async def stream(
+        self,
+        prompt: str,
+        system: str | None = None,
+        json_schema: dict[str, Any] | None = None,
+        prefix: str | None = None,
+        profile: GenerationProfile | None = None,
+    ) -> AsyncGenerator[str, None]:
+        """Stream a response from OpenAI.
+
+        With ``json_schema``, the output is constrained to JSON (see response_format).
+        With ``prefix``, the model continues a reply that another provider started.
+        The profile selects the model, output budget and sampling.
+
+        Closing or cancelling the iterator closes the HTTP response, which drops the
+        connection so OpenAI stops generating immediately.
+        """
         if not self._client:
             raise RuntimeError("OpenAI client not initialized")
 
@@ -77,28 +123,38 @@ class OpenAIClient:
             messages.append({"role": "system", "content": system})
 
         messages.append({"role": "user", "content": prompt})
-
-        async with self._client.stream(
-            "POST",
-            "/chat/completions",
-            json={
-                "model": self.model,
-                "messages": messages,
-                "temperature": settings.temperature,
-                "max_tokens": settings.max_tokens,
-                "stream": True,
-            },
-        ) as response:
-            response.raise_for_status()
-            async for line in response.aiter_lines():
-                if line.startswith("data: "):
-                    data_str = line[6:]
-                    if data_str == "[DONE]":
-                        break
-                    import json
-                    data = json.loads(data_str)
-                    if data["choices"][0]["delta"].get("content"):
+        if prefix:
+            messages.append({"role": "assistant", "content": prefix})
+            messages.append({"role": "user", "content": CONTINUATION_PROMPT})
+
+        payload: dict[str, Any] = {
+            "messages": messages,
+            "stream": True,
+            # The final chunk then carries the token usage
+            "stream_options": {"include_usage": True},
+            **(profile or get_profile()).openai_params(),
+        }
+        if json_schema is not None:
+            payload["response_format"] = self.response_format(json_schema, payload["model"])
+
+        start = time.perf_counter()
+        first_token: float | None = None
+        usage: dict[str, Any] | None = None
+        try:
+            async with self._client.stream("POST", "/chat/completions", json=payload) as response:
+                response.raise_for_status()
+                async for data in aiter_sse(response):
+                    if data.get("usage"):
+                        usage = data["usage"]
+                    if data["choices"] and data["choices"][0]["delta"].get("content"):
+                        if first_token is None:
+                            first_token = time.perf_counter() - start
                         yield data["choices"][0]["delta"]["content"]
+        finally:
+            if self.metrics is not None and first_token is not None:
+                self.metrics.record_openai(
+                    payload["model"], usage, time.perf_counter() - start, first_token
+                )
 
     async def close(self) -> None:
         """Close the client connection."""
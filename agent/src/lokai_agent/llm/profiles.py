@@ -0,0 +1,102 @@
+"""Generation profiles: per-call model, output budget and sampling settings."""
+
+from typing import Any
+
+from pydantic import BaseModel, ConfigDict
+
+from lokai_agent.config import settings
+
+# Profile names used by the graph nodes
+CLASSIFY = "classify"
+PLAN = "plan"
+ANSWER = "answer"
+DEFAULT = "default"
+
+
+class GenerationProfile(BaseModel):
+    """Model and sampling settings for one kind of generation."""
+
+    model_config = ConfigDict(frozen=True)
+
+    name: str
+    ollama_model: str
+    openai_model: str
+    max_tokens: int
+    temperature: float
+    stop: tuple[str, ...] = ()
+
+    def ollama_options(self) -> dict[str, Any]:
+        """Options for Ollama's /api/generate."""
+        options: dict[str, Any] = {
+            "num_predict": self.max_tokens,
+            "temperature": self.temperature,
+        }
+        if self.stop:
+            options["stop"] = list(self.stop)
+        return options
+
+    def openai_params(self) -> dict[str, Any]:
+        """Model and sampling parameters for OpenAI's chat completions."""
+        params: dict[str, Any] = {
+            "model": self.openai_model,
+            "temperature": self.temperature,
+            "max_tokens": self.max_tokens,
+        }
+        if self.stop:
+            # OpenAI accepts at most four stop sequences
+            params["stop"] = list(self.stop[:4])
+        return params
+
+    def cache_params(self) -> dict[str, Any]:
+        """Parameters that change the output, for response cache keys."""
+        return {
+            "temperature": self.temperature,
+            "max_tokens": self.max_tokens,
+            "stop": list(self.stop),
+        }
+
+
+def get_profile(name: str | None = None) -> GenerationProfile:
+    """Build a generation profile from the current settings.
+
+    classify and plan run deterministically on the fast models with small output
+    budgets; answer and the default profile use the main models with the
+    configured temperature and max_tokens.
+
+    Args:
+        name: Profile name, or None for the default profile
+
+    Returns:
+        The profile
+
+    Raises:
+        ValueError: If the profile name is unknown
+    """
+    fast_ollama = settings.ollama_fast_model or settings.ollama_model
+    fast_openai = settings.openai_fast_model or settings.openai_model
+
+    if name == CLASSIFY:
+        return GenerationProfile(
+            name=CLASSIFY,
+            ollama_model=fast_ollama,
+            openai_model=fast_openai,
+            max_tokens=settings.classify_max_tokens,
+            temperature=0.0,
+        )
+    if name == PLAN:
+        return GenerationProfile(
+            name=PLAN,
+            ollama_model=fast_ollama,
+            openai_model=fast_openai,
+            max_tokens=settings.plan_max_tokens,
+            temperature=0.0,
+        )
+    if name in (ANSWER, DEFAULT, None):
+        return GenerationProfile(
+            name=name or DEFAULT,
+            ollama_model=settings.ollama_model,
+            openai_model=settings.openai_model,
+            max_tokens=settings.max_tokens,
+            temperature=settings.temperature,
+        )
+    raise ValueError(f"Unknown generation profile: {name}")
@@ -1,25 +1,122 @@
 """LLM Router for managing multiple LLM providers with fallback."""
 
-from collections.abc import AsyncIterator
-from typing import Any
+import asyncio
+import statistics
+import time
+from collections import defaultdict, deque
+from collections.abc import AsyncGenerator, Awaitable, Callable
+from contextlib import aclosing, suppress
+from typing import Any, cast
 
+import orjson
 import structlog
 
-from lokai_agent.llm.ollama_client import OllamaClient
+from lokai_agent.config import settings
+from lokai_agent.llm.cache import ResponseCache
+from lokai_agent.llm.health import CircuitBreaker
+from lokai_agent.llm.metrics import LLMMetrics
+from lokai_agent.llm.ollama_client import EmbeddingResult, OllamaClient, SessionKey
 from lokai_agent.llm.openai_client import OpenAIClient
+from lokai_agent.llm.profiles import GenerationProfile, get_profile
+from lokai_agent.llm.singleflight import SingleFlight
+from lokai_agent.llm.structured import IncrementalValidator, StructuredOutputError
+from lokai_agent.prompts.schemas import STRUCTURED_RETRY_PROMPT
 from lokai_agent.prompts.system import SYSTEM_PROMPT
 
 logger = structlog.get_logger()
 
+# Characters of a resumed stream checked for text repeated from before the failover
+_OVERLAP_WINDOW = 200
+
+# Shorter partial overlaps are taken as coincidence rather than repeated text
+_MIN_OVERLAP = 8
+
+
+async def _skip_repeated_prefix(prefix: str, tokens: AsyncGenerator[str, None]) -> AsyncGenerator[str, None]:
+    """Drop text a resumed generation repeats from the end of what was already sent.
+
+    The start of the continuation is buffered until it is long enough to compare,
+    then any overlap with the tail of ``prefix`` is removed.
+    """
+    head = ""
+    checked = False
+    async with aclosing(tokens) as stream:
+        async for token in stream:
+            if checked:
+                yield token
+                continue
+
+            head += token
+            if len(head) >= min(_OVERLAP_WINDOW, len(prefix)):
+                checked = True
+                if text := _trim_overlap(prefix, head):
+                    yield text
+
+    if not checked and (text := _trim_overlap(prefix, head)):
+        yield text
+
+
+def _model(provider: str, profile: GenerationProfile) -> str:
+    """The model a profile selects on one provider."""
+    return profile.ollama_model if provider == "ollama" else profile.openai_model
+
+
+def _models(profile: GenerationProfile) -> str:
+    """Both models of a profile, for keys that are not tied to one provider."""
+    return f"{profile.ollama_model}|{profile.openai_model}"
+
+
+def _trim_overlap(prefix: str, text: str) -> str:
+    """Remove the longest start of ``text`` that ``prefix`` already ends with.
+
+    A repeat of the whole prefix is always removed, however short; otherwise the
+    overlap has to be at least _MIN_OVERLAP characters.
+    """
+    if prefix and text.startswith(prefix):
+        return text[len(prefix) :]
+    for size in range(min(len(prefix), len(text)), _MIN_OVERLAP - 1, -1):
+        if prefix.endswith(text[:size]):
+            return text[size:]
+    return text
+
 
 class LLMRouter:
     """Router for managing LLM providers with fallback chain."""
 
     def __init__(self) -> None:
-        self.ollama = OllamaClient()
-        self.openai = OpenAIClient()
+        self.metrics = LLMMetrics()
+        self.ollama = OllamaClient(self.metrics)
+        self.openai = OpenAIClient(self.metrics)
         self._primary_available = False
         self._fallback_available = False
+        self.breakers = {
+            provider: CircuitBreaker(
+                provider,
+                failure_threshold=settings.llm_breaker_failures,
+                error_rate_threshold=settings.llm_breaker_error_rate,
+                reset_timeout=settings.llm_breaker_reset_seconds,
+            )
+            # Embeddings get their own circuit: a missing embedding model must not
+            # take Ollama generation down with it
+            for provider in ("ollama", "openai", "embeddings")
+        }
+        self._probe_task: asyncio.Task[None] | None = None
+        self._warmup_task: asyncio.Task[None] | None = None
+        # Ollama times to first token per model: a fast classification model must not
+        # set the deadline for a large answer model
+        self._first_token_times: defaultdict[str, deque[float]] = defaultdict(
+            lambda: deque(maxlen=100)
+        )
+        self._hedge_counts = {"calls": 0, "fired": 0, "won": 0}
+        self._inflight: SingleFlight[Any] = SingleFlight()
+        self._structured_counts = {"calls": 0, "retries": 0, "failures": 0}
+        self.cache: ResponseCache | None = None
+        if settings.llm_cache_enabled:
+            self.cache = ResponseCache(
+                max_entries=settings.llm_cache_size,
+                ttl=settings.llm_cache_ttl_seconds,
+                path=settings.llm_cache_path,
+            )
 
     async def initialize(self) -> None:
         """Initialize all LLM providers."""
@@ -28,6 +125,7 @@ class LLMRouter:
             await self.ollama.initialize()
             self._primary_available = True
             logger.info("Primary LLM (Ollama) initialized")
+            self._start_warmup()
         except Exception as e:
             logger.warning("Failed to initialize Ollama", error=str(e))
             self._primary_available = False
@@ -45,71 +143,647 @@ class LLMRouter:
         if not self._primary_available and not self._fallback_available:
             raise RuntimeError("No LLM providers available")
 
+        if settings.llm_probe_interval > 0 and self._probe_task is None:
+            self._probe_task = asyncio.create_task(self._probe_loop())
+
+    def _start_warmup(self) -> None:
+        """Warm Ollama up in the background so startup isn't held up by the model load."""
+        if settings.ollama_warmup and self._warmup_task is None:
+            self._warmup_task = asyncio.create_task(self.ollama.warmup(SYSTEM_PROMPT))
+
+    def _usable(self, provider: str) -> bool:
+        """Whether a provider is configured and its circuit currently admits calls."""
+        configured = self._fallback_available if provider == "openai" else self._primary_available
+        return configured and self.breakers[provider].available
+
+    async def _call(self, provider: str, func: Callable[..., Awaitable[Any]], *args: Any) -> Any:
+        """Call a provider through its circuit breaker, recording the outcome."""
+        breaker = self.breakers[provider]
+        if not breaker.allow():
+            raise RuntimeError(f"{provider} circuit is open")
+
+        start = time.perf_counter()
+        try:
+            result = await func(*args)
+        except asyncio.CancelledError:
+            breaker.release()
+            raise
+        except Exception:
+            breaker.record_failure()
+            raise
+
+        breaker.record_success(time.perf_counter() - start)
+        return result
+
+    async def _stream_from(
+        self,
+        provider: str,
+        tokens: AsyncGenerator[str, None],
+        model: str | None = None,
+    ) -> AsyncGenerator[str, None]:
+        """Stream from a provider through its circuit breaker.
+
+        The recorded latency is the time to the first token, which is also kept
+        per model for Ollama's hedge deadline. A consumer that stops reading after
+        receiving tokens (e.g. once a JSON object is complete) counts as a success.
+        """
+        breaker = self.breakers[provider]
+        if not breaker.allow():
+            raise RuntimeError(f"{provider} circuit is open")
+
+        start = time.perf_counter()
+        first_token: float | None = None
+        try:
+            async with aclosing(tokens) as stream:
+                async for token in stream:
+                    if first_token is None:
+                        first_token = time.perf_counter() - start
+                        if provider == "ollama" and model is not None:
+                            self._first_token_times[model].append(first_token)
+                    yield token
+        except GeneratorExit:
+            if first_token is None:
+                breaker.release()
+            else:
+                breaker.record_success(first_token)
+            raise
+        except asyncio.CancelledError:
+            breaker.release()
+            raise
+        except Exception:
+            breaker.record_failure()
+            raise
+
+        if first_token is None:
+            first_token = time.perf_counter() - start
+        breaker.record_success(first_token)
+
+    async def _probe_loop(self) -> None:
+        """Periodically check Ollama so a hung or restarted server is noticed between requests."""
+        breaker = self.breakers["ollama"]
+
+        while True:
+            await asyncio.sleep(settings.llm_probe_interval)
+
+            try:
+                healthy = await asyncio.wait_for(
+                    self.ollama.health_check(), settings.llm_probe_timeout
+                )
+            except TimeoutError:
+                healthy = False
+
+            if healthy and not self._primary_available:
+                # Ollama was down at startup and has come up since
+                try:
+                    await self.ollama.initialize()
+                    self._primary_available = True
+                    logger.info("Primary LLM (Ollama) became available")
+                    self._start_warmup()
+                except Exception as e:
+                    logger.warning("Failed to initialize Ollama", error=str(e))
+                    healthy = False
+
+            if self._primary_available:
+                breaker.record_probe(healthy)
+
+    def health(self) -> dict[str, Any]:
+        """Availability and breaker statistics per provider."""
+        return {
+            "ollama": {"configured": self._primary_available, **self.breakers["ollama"].stats()},
+            "openai": {"configured": self._fallback_available, **self.breakers["openai"].stats()},
+            "embeddings": {
+                "configured": self._primary_available,
+                **self.breakers["embeddings"].stats(),
+            },
+        }
+
     async def generate(
         self,
         prompt: str,
         system: str | None = None,
         use_system_prompt: bool = True,
+        cache: bool | None = None,
+        hedge: bool = False,
+        session: SessionKey | None = None,
+        profile: str | None = None,
     ) -> str:
-        """Generate a response using available LLM with fallback."""
+        """Generate a response using available LLM with fallback.
+
+        Args:
+            prompt: User prompt
+            system: System prompt overriding the default
+            use_system_prompt: Whether to apply the default system prompt
+            cache: Force the response cache on or off; by default it is only used
+                when sampling is deterministic (temperature 0)
+            hedge: Start the same request on the fallback if Ollama has not produced
+                a first token by the hedge deadline, and keep whichever answers first
+            session: Continue this conversation's Ollama context; such responses
+                depend on earlier turns and are never cached or hedged
+            profile: Generation profile selecting the model, output budget and
+                sampling (see llm/profiles.py); the default profile when omitted
+
+        Returns:
+            Generated text
+        """
         effective_system = system or (SYSTEM_PROMPT if use_system_prompt else None)
+        gen = get_profile(profile)
+        use_cache = (
+            self.cache is not None
+            and session is None
+            and (cache if cache is not None else gen.temperature <= 0)
+        )
 
-        if self._primary_available:
+        if session is not None:
+            # Continuations depend on the session's history, so they are never shared
+            return await self._generate(prompt, effective_system, use_cache, hedge, session, gen)
+
+        # Identical concurrent calls (double submits, client retries) share one generation
+        key = self._cache_key("generate", _models(gen), effective_system, prompt, gen)
+        response = await self._inflight.do(
+            key, lambda: self._generate(prompt, effective_system, use_cache, hedge, None, gen)
+        )
+        return cast(str, response)
+
+    async def _generate(
+        self,
+        prompt: str,
+        effective_system: str | None,
+        use_cache: bool,
+        hedge: bool,
+        session: SessionKey | None,
+        profile: GenerationProfile,
+    ) -> str:
+        """Generate with caching, hedging and provider fallback."""
+        if hedge and session is None and self._usable("ollama") and self._usable("openai"):
+            return await self._hedged_generate(prompt, effective_system, use_cache, profile)
+
+        if self._usable("ollama"):
             try:
-                return await self.ollama.generate(prompt, effective_system)
+                return await self._cached(
+                    use_cache,
+                    "ollama",
+                    profile,
+                    effective_system,
+                    prompt,
+                    lambda: self._call(
+                        "ollama", self.ollama.generate, prompt, effective_system, session, profile
+                    ),
+                )
             except Exception as e:
                 logger.warning("Ollama generation failed, trying fallback", error=str(e))
 
-        if self._fallback_available:
+        if session is not None:
+            # The fallback doesn't see Ollama's context, so the next turn starts over
+            self.ollama.forget_session(session)
+
+        if self._usable("openai"):
             try:
-                return await self.openai.generate(prompt, effective_system)
+                return await self._cached(
+                    use_cache,
+                    "openai",
+                    profile,
+                    effective_system,
+                    prompt,
+                    lambda: self._call(
+                        "openai", self.openai.generate, prompt, effective_system, profile
+                    ),
+                )
             except Exception as e:
                 logger.error("OpenAI fallback failed", error=str(e))
                 raise
 
         raise RuntimeError("No LLM providers available for generation")
 
+    async def _cached(
+        self,
+        use_cache: bool,
+        provider: str,
+        profile: GenerationProfile,
+        system: str | None,
+        prompt: str,
+        call: Callable[[], Awaitable[str]],
+    ) -> str:
+        """Serve a generation from the response cache, filling it on a miss."""
+        if not use_cache or self.cache is None:
+            return await call()
+
+        key = self._cache_key(provider, _model(provider, profile), system, prompt, profile)
+        cached = await self.cache.get(key)
+        if cached is not None:
+            logger.debug("LLM response cache hit", provider=provider)
+            return cached
+
+        response = await call()
+        if response:
+            await self.cache.set(key, response)
+        return response
+
+    @staticmethod
+    def _cache_key(
+        provider: str,
+        model: str,
+        system: str | None,
+        prompt: str,
+        profile: GenerationProfile,
+        json_schema: dict[str, Any] | None = None,
+    ) -> str:
+        params = profile.cache_params()
+        if json_schema is not None:
+            params["json_schema"] = json_schema
+        return ResponseCache.make_key(provider, model, system, prompt, params)
+
+    def _provider_stream(
+        self,
+        provider: str,
+        prompt: str,
+        system: str | None,
+        profile: GenerationProfile,
+        json_schema: dict[str, Any] | None = None,
+    ) -> AsyncGenerator[str, None]:
+        """Open a token stream from one provider, guarded by its circuit breaker."""
+        if provider == "ollama":
+            tokens = self.ollama.stream(prompt, system, json_schema=json_schema, profile=profile)
+        else:
+            tokens = self.openai.stream(prompt, system, json_schema=json_schema, profile=profile)
+        return self._stream_from(provider, tokens, _model(provider, profile))
+
+    async def generate_json(
+        self,
+        prompt: str,
+        json_schema: dict[str, Any],
+        system: str | None = None,
+        use_system_prompt: bool = False,
+        cache: bool | None = None,
+        hedge: bool = False,
+        profile: str | None = None,
+    ) -> dict[str, Any]:
+        """Generate a JSON object constrained to, and validated against, a schema.
+
+        Providers are asked for schema-constrained output. Every attempt is
+        validated while it streams, so an invalid generation is abandoned as soon as
+        it goes wrong and retried, up to llm_json_retries times per provider.
+
+        Args:
+            prompt: User prompt
+            json_schema: JSON schema the object must match
+            system: System prompt overriding the default
+            use_system_prompt: Whether to apply the default system prompt
+            cache: Force the response cache on or off, as for generate()
+            hedge: Hedge the first attempt against a slow Ollama, as for generate()
+            profile: Generation profile, as for generate()
+
+        Returns:
+            The validated object
+
+        Raises:
+            StructuredOutputError: If providers answered but no attempt produced a
+                valid object. Errors that prevented any output (e.g. connection
+                failures) are re-raised as they are.
+        """
+        effective_system = system or (SYSTEM_PROMPT if use_system_prompt else None)
+        gen = get_profile(profile)
+        use_cache = self.cache is not None and (
+            cache if cache is not None else gen.temperature <= 0
+        )
+
+        if use_cache and self.cache is not None:
+            for provider in ("ollama", "openai"):
+                key = self._cache_key(
+                    provider, _model(provider, gen), effective_system, prompt, gen, json_schema
+                )
+                cached = await self.cache.get(key)
+                if cached is not None:
+                    return cast(dict[str, Any], orjson.loads(cached))
+
+        key = self._cache_key(
+            "generate_json", _models(gen), effective_system, prompt, gen, json_schema
+        )
+        provider, value = await self._inflight.do(
+            key, lambda: self._generate_json(prompt, effective_system, json_schema, hedge, gen)
+        )
+
+        if use_cache and self.cache is not None:
+            key = self._cache_key(
+                provider, _model(provider, gen), effective_system, prompt, gen, json_schema
+            )
+            await self.cache.set(key, orjson.dumps(value).decode())
+        return cast(dict[str, Any], value)
+
+    async def _generate_json(
+        self,
+        prompt: str,
+        system: str | None,
+        json_schema: dict[str, Any],
+        hedge: bool,
+        profile: GenerationProfile,
+    ) -> tuple[str, dict[str, Any]]:
+        """Run structured attempts with retries and fallback, returning the provider used.
+
+        Retries add the validation error to the prompt: resending the same request
+        would get the same answer at temperature 0.
+        """
+        self._structured_counts["calls"] += 1
+        last_error: Exception | None = None
+        invalid: StructuredOutputError | None = None
+
+        for provider in ("ollama", "openai"):
+            attempt_prompt = prompt
+            for attempt in range(settings.llm_json_retries + 1):
+                if not self._usable(provider):
+                    break
+
+                used = provider
+                validator = IncrementalValidator(json_schema)
+                try:
+                    if hedge and self._usable("ollama") and self._usable("openai"):
+                        hedge = False
+                        used, tokens = await self._hedge(prompt, system, profile, json_schema)
+                    else:
+                        tokens = self._provider_stream(
+                            provider, attempt_prompt, system, profile, json_schema
+                        )
+
+                    async with aclosing(tokens) as stream:
+                        async for token in stream:
+                            validator.feed(token)
+                            if validator.complete:
+                                # Stop generating as soon as the object is closed
+                                break
+
+                    return used, validator.finish()
+                except StructuredOutputError as e:
+                    self._structured_counts["retries"] += 1
+                    logger.warning(
+                        "Invalid structured output",
+                        provider=used,
+                        attempt=attempt + 1,
+                        error=str(e),
+                    )
+                    last_error = invalid = e
+                    attempt_prompt = STRUCTURED_RETRY_PROMPT.format(prompt=prompt, error=e)
+                except Exception as e:
+                    logger.warning("Structured generation failed", provider=used, error=str(e))
+                    last_error = e
+                    break
+
+        self._structured_counts["failures"] += 1
+        if invalid is not None:
+            raise StructuredOutputError(f"No valid structured output: {invalid}") from invalid
+        if last_error is not None:
+            # Providers failed without producing output to validate
+            raise last_error
+        raise RuntimeError("No LLM providers available for generation")
+
+    def structured_stats(self) -> dict[str, Any]:
+        """Structured generation calls, retried attempts and calls that failed."""
+        return dict(self._structured_counts)
+
+    async def _hedged_generate(
+        self,
+        prompt: str,
+        system: str | None,
+        use_cache: bool,
+        profile: GenerationProfile,
+    ) -> str:
+        """Generate through a hedged stream, caching under the provider that answered."""
+        if use_cache and self.cache is not None:
+            for provider in ("ollama", "openai"):
+                key = self._cache_key(provider, _model(provider, profile), system, prompt, profile)
+                cached = await self.cache.get(key)
+                if cached is not None:
+                    return cached
+
+        provider, tokens = await self._hedge(prompt, system, profile)
+        async with aclosing(tokens) as stream:
+            response = "".join([token async for token in stream])
+
+        if use_cache and self.cache is not None and response:
+            key = self._cache_key(provider, _model(provider, profile), system, prompt, profile)
+            await self.cache.set(key, response)
+        return response
+
+    def hedge_deadline(self, model: str) -> float | None:
+        """Seconds to wait for an Ollama model's first token before hedging.
+
+        When adaptive, this is the model's observed p95 time to first token, and
+        None (don't hedge) until llm_hedge_min_samples samples exist. Otherwise it
+        is the configured deadline.
+        """
+        if not settings.llm_hedge_adaptive:
+            deadline = settings.llm_hedge_deadline_ms / 1000
+        else:
+            samples = self._first_token_times.get(model)
+            if samples is None or len(samples) < settings.llm_hedge_min_samples:
+                return None
+            cuts = statistics.quantiles(samples, n=20, method="inclusive")
+            deadline = cuts[18]
+        return max(deadline, settings.llm_hedge_min_ms / 1000)
+
+    def coalescing_stats(self) -> dict[str, Any]:
+        """How many generate calls were served by joining an identical in-flight call."""
+        return self._inflight.stats()
+
+    def hedge_stats(self) -> dict[str, Any]:
+        """How often hedged calls fired a second request, and how often it won."""
+        calls = self._hedge_counts["calls"]
+        fired = self._hedge_counts["fired"]
+        return {
+            **self._hedge_counts,
+            "fire_rate": fired / calls if calls else 0.0,
+            "win_rate": self._hedge_counts["won"] / fired if fired else 0.0,
+            "deadlines": {model: self.hedge_deadline(model) for model in self._first_token_times},
+        }
+
+    async def _hedge(
+        self,
+        prompt: str,
+        system: str | None,
+        profile: GenerationProfile,
+        json_schema: dict[str, Any] | None = None,
+    ) -> tuple[str, AsyncGenerator[str, None]]:
+        """Race Ollama against the fallback once Ollama misses the first-token deadline.
+
+        Returns:
+            The provider that produced the first token, and its full token stream
+        """
+        self._hedge_counts["calls"] += 1
+        model = profile.ollama_model
+        start = time.perf_counter()
+        streams: dict[str, AsyncGenerator[str, None]] = {
+            "ollama": self._provider_stream("ollama", prompt, system, profile, json_schema),
+        }
+        firsts: dict[asyncio.Future[str], str] = {
+            asyncio.ensure_future(anext(streams["ollama"])): "ollama",
+        }
+        winner: str | None = None
+        first: str | None = None
+        error: BaseException | None = None
+
+        try:
+            # Without a deadline this waits for Ollama alone, which is not hedging
+            done, _ = await asyncio.wait(firsts, timeout=self.hedge_deadline(model))
+            if not done:
+                self._hedge_counts["fired"] += 1
+                logger.info("Ollama missed the first-token deadline, hedging with fallback")
+                streams["openai"] = self._provider_stream(
+                    "openai", prompt, system, profile, json_schema
+                )
+                firsts[asyncio.ensure_future(anext(streams["openai"]))] = "openai"
+
+            pending = set(firsts)
+            while pending and winner is None:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for future in done:
+                    exc = future.exception()
+                    if exc is None or isinstance(exc, StopAsyncIteration):
+                        winner = firsts[future]
+                        first = None if exc is not None else future.result()
+                        break
+                    logger.warning("Hedged request failed", provider=firsts[future], error=str(exc))
+                    error = exc
+
+            if winner is None and "openai" not in streams:
+                # Ollama failed before the deadline: plain fallback
+                winner = "openai"
+                return winner, self._provider_stream(
+                    "openai", prompt, system, profile, json_schema
+                )
+        finally:
+            for future, provider in firsts.items():
+                if provider != winner:
+                    if provider == "ollama" and not future.done():
+                        # Ollama lost the race before its first token. Its time to
+                        # first token is at least the time waited so far; leaving
+                        # it out would drag the deadline down to the fast calls.
+                        self._first_token_times[model].append(time.perf_counter() - start)
+                    future.cancel()
+                    with suppress(BaseException):
+                        await future
+                    await streams[provider].aclose()
+
+        if winner is None:
+            assert error is not None
+            raise error
+
+        if winner == "openai":
+            self._hedge_counts["won"] += 1
+
+        return winner, self._resume(first, streams[winner])
+
+    @staticmethod
+    async def _resume(first: str | None, tokens: AsyncGenerator[str, None]) -> AsyncGenerator[str, None]:
+        """Yield an already received first token followed by the rest of its stream."""
+        async with aclosing(tokens) as stream:
+            if first is None:
+                return
+            yield first
+            async for token in stream:
+                yield token
+
     async def stream(
         self,
         prompt: str,
         system: str | None = None,
         use_system_prompt: bool = True,
-    ) -> AsyncIterator[str]:
-        """Stream a response using available LLM with fallback."""
+        hedge: bool = False,
+        session: SessionKey | None = None,
+        on_event: Callable[..., None] | None = None,
+        profile: str | None = None,
+    ) -> AsyncGenerator[str, None]:
+        """Stream a response using available LLM with fallback.
+
+        If Ollama fails after producing part of the answer, the fallback continues
+        from the text already streamed instead of starting over, and ``on_event``
+        is called with ``("provider_switch", from=..., to=..., offset=...)`` so the
+        client can keep what it has shown.
+
+        With ``hedge``, the fallback is raced against Ollama once Ollama misses the
+        first-token deadline, as in generate(). With ``session``, Ollama continues
+        that conversation's context. ``profile`` selects the generation profile.
+        """
         effective_system = system or (SYSTEM_PROMPT if use_system_prompt else None)
+        gen = get_profile(profile)
 
-        if self._primary_available:
-            try:
-                async for token in self.ollama.stream(prompt, effective_system):
+        if hedge and session is None and self._usable("ollama") and self._usable("openai"):
+            _, hedged = await self._hedge(prompt, effective_system, gen)
+            async with aclosing(hedged) as tokens:
+                async for token in tokens:
                     yield token
+            return
+
+        emitted: list[str] = []
+        ollama_error: Exception | None = None
+
+        if self._usable("ollama"):
+            try:
+                stream = self._stream_from(
+                    "ollama",
+                    self.ollama.stream(prompt, effective_system, session, profile=gen),
+                    gen.ollama_model,
+                )
+                async with aclosing(stream) as tokens:
+                    async for token in tokens:
+                        emitted.append(token)
+                        yield token
                 return
             except Exception as e:
-                logger.warning("Ollama streaming failed, trying fallback", error=str(e))
+                ollama_error = e
+                logger.warning(
+                    "Ollama streaming failed, trying fallback",
+                    error=str(e),
+                    streamed_chars=sum(map(len, emitted)),
+                )
+
+        if session is not None:
+            self.ollama.forget_session(session)
+
+        if self._usable("openai"):
+            prefix = "".join(emitted)
+            if prefix and on_event is not None:
+                switch = {"from": "ollama", "to": "openai", "offset": len(prefix)}
+                on_event("provider_switch", **switch)
 
-        if self._fallback_available:
             try:
-                async for token in self.openai.stream(prompt, effective_system):
-                    yield token
+                continuation = self.openai.stream(
+                    prompt, effective_system, prefix=prefix or None, profile=gen
+                )
+                stream = self._stream_from("openai", continuation)
+                if prefix:
+                    stream = _skip_repeated_prefix(prefix, stream)
+                async with aclosing(stream) as tokens:
+                    async for token in tokens:
+                        yield token
                 return
             except Exception as e:
                 logger.error("OpenAI fallback streaming failed", error=str(e))
                 raise
 
+        if ollama_error is not None:
+            # Without a fallback, Ollama's own error says best what went wrong
+            raise ollama_error
         raise RuntimeError("No LLM providers available for streaming")
 
     async def embed(self, text: str) -> list[float]:
         """Generate embeddings (Ollama only for now)."""
-        if not self._primary_available:
+        if not self._usable("embeddings"):
             raise RuntimeError("Ollama not available for embeddings")
 
-        return await self.ollama.embed(text)
+        embedding = await self._call("embeddings", self.ollama.embed, text)
+        return cast(list[float], embedding)
 
-    async def embed_batch(self, texts: list[str]) -> list[list[float]]:
-        """Generate embeddings for multiple texts."""
-        if not self._primary_available:
+    async def embed_batch(
+        self,
+        texts: list[str],
+        return_exceptions: bool = False,
+    ) -> list[EmbeddingResult]:
+        """Generate embeddings for multiple texts, in input order."""
+        if not self._usable("embeddings"):
             raise RuntimeError("Ollama not available for embeddings")
 
-        return await self.ollama.embed_batch(texts)
+        embeddings = await self._call(
+            "embeddings", self.ollama.embed_batch, texts, return_exceptions
+        )
+        return cast(list[EmbeddingResult], embeddings)
 
     @property
     def llm(self) -> Any:
@@ -127,5 +801,14 @@ class LLMRouter:
 
     async def close(self) -> None:
         """Close all client connections."""
+        for task in (self._probe_task, self._warmup_task):
+            if task is not None:
+                task.cancel()
+                with suppress(asyncio.CancelledError):
+                    await task
+        self._probe_task = self._warmup_task = None
+
         await self.ollama.close()
         await self.openai.close()
+        if self.cache is not None:
+            self.cache.close()
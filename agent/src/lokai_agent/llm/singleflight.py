@@ -0,0 +1,63 @@
+"""Coalescing of identical concurrent calls."""
+
+import asyncio
+from collections.abc import Awaitable, Callable, Hashable
+from typing import Any, Generic, TypeVar
+
+T = TypeVar("T")
+
+
+class _Flight(Generic[T]):
+    """One in-flight call and the number of callers waiting on it."""
+
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task: asyncio.Task[T]) -> None:
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight(Generic[T]):
+    """Runs at most one call per key at a time, sharing its result with every caller.
+
+    The call runs in its own task, so a caller that is cancelled only detaches from
+    it. The call itself is cancelled once the last waiting caller is gone.
+    """
+
+    def __init__(self) -> None:
+        self._flights: dict[Hashable, _Flight[T]] = {}
+        self.started = 0
+        self.coalesced = 0
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[T]]) -> T:
+        """Run ``func`` for ``key``, or join the call already running for it."""
+        flight = self._flights.get(key)
+        if flight is None:
+            new = _Flight(asyncio.ensure_future(func()))
+            new.task.add_done_callback(lambda _: self._forget(key, new))
+            self._flights[key] = flight = new
+            self.started += 1
+        else:
+            self.coalesced += 1
+
+        flight.waiters += 1
+        try:
+            return await asyncio.shield(flight.task)
+        finally:
+            flight.waiters -= 1
+            if flight.waiters == 0 and not flight.task.done():
+                # Nobody wants the result any more; later callers start afresh
+                self._forget(key, flight)
+                flight.task.cancel()
+
+    def stats(self) -> dict[str, Any]:
+        """Coalescing statistics."""
+        return {
+            "in_flight": len(self._flights),
+            "started": self.started,
+            "coalesced": self.coalesced,
+        }
+
+    def _forget(self, key: Hashable, flight: _Flight[T]) -> None:
+        if self._flights.get(key) is flight:
+            del self._flights[key]
@@ -0,0 +1,220 @@
+"""Validation of schema-constrained JSON generations."""
+
+from typing import Any, cast
+
+import orjson
+
+_TYPES: dict[str, tuple[type, ...]] = {
+    "object": (dict,),
+    "array": (list,),
+    "string": (str,),
+    "number": (int, float),
+    "integer": (int,),
+    "boolean": (bool,),
+    "null": (type(None),),
+}
+
+
+class StructuredOutputError(ValueError):
+    """A generation that is not valid JSON for the requested schema."""
+
+
+def validate(value: Any, schema: dict[str, Any], path: str = "$") -> None:
+    """Check a value against the subset of JSON Schema used by our prompts.
+
+    Supports type, enum, properties, required, additionalProperties, items,
+    minimum and maximum.
+
+    Raises:
+        StructuredOutputError: On the first violation found
+    """
+    expected = schema.get("type")
+    if expected is not None:
+        names = expected if isinstance(expected, list) else [expected]
+        if not any(_is_type(value, name) for name in names):
+            raise StructuredOutputError(f"{path}: expected {'/'.join(names)}")
+
+    if "enum" in schema and value not in schema["enum"]:
+        raise StructuredOutputError(f"{path}: {value!r} is not one of {schema['enum']}")
+
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        if "minimum" in schema and value < schema["minimum"]:
+            raise StructuredOutputError(f"{path}: {value} is below {schema['minimum']}")
+        if "maximum" in schema and value > schema["maximum"]:
+            raise StructuredOutputError(f"{path}: {value} is above {schema['maximum']}")
+
+    if isinstance(value, dict):
+        properties = schema.get("properties", {})
+        for key in schema.get("required", []):
+            if key not in value:
+                raise StructuredOutputError(f"{path}: missing required field {key!r}")
+        for key, item in value.items():
+            if key in properties:
+                validate(item, properties[key], f"{path}.{key}")
+            elif schema.get("additionalProperties") is False:
+                raise StructuredOutputError(f"{path}: unexpected field {key!r}")
+
+    if isinstance(value, list) and "items" in schema:
+        for index, item in enumerate(value):
+            validate(item, schema["items"], f"{path}[{index}]")
+
+
+def _is_type(value: Any, name: str) -> bool:
+    if name in ("number", "integer") and isinstance(value, bool):
+        return False
+    if name == "integer" and isinstance(value, float):
+        return value.is_integer()
+    return isinstance(value, _TYPES.get(name, (object,)))
+
+
+class IncrementalValidator:
+    """Validates a JSON object against a schema while it is still being generated.
+
+    Text is fed in as tokens arrive. Each top-level field is checked as soon as
+    its value is complete, so a generation that goes wrong (prose instead of JSON,
+    an unknown field, an out-of-range value) is rejected without waiting for the
+    rest of the output. finish() validates the complete object.
+    """
+
+    def __init__(self, schema: dict[str, Any], max_chars: int = 32000) -> None:
+        self.schema = schema
+        self.max_chars = max_chars
+        self._properties: dict[str, Any] = schema.get("properties", {})
+        self._closed_keys = schema.get("additionalProperties") is False
+
+        self._text: list[str] = []
+        self._buffer = ""
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+        self._start: int | None = None
+        self._end: int | None = None
+        self._expect_key = True
+        self._token_start: int | None = None
+        self._key: str | None = None
+
+    @property
+    def complete(self) -> bool:
+        """Whether the top-level object has been closed."""
+        return self._end is not None
+
+    def feed(self, chunk: str) -> None:
+        """Consume more generated text.
+
+        Raises:
+            StructuredOutputError: As soon as the output can no longer be valid
+        """
+        if self.complete:
+            return
+
+        self._buffer += chunk
+        if len(self._buffer) > self.max_chars:
+            raise StructuredOutputError(f"Output exceeds {self.max_chars} characters")
+
+        text = self._buffer
+        for i in range(self._pos, len(text)):
+            self._step(text, i, text[i])
+            if self.complete:
+                break
+        self._pos = len(text)
+
+    def finish(self) -> dict[str, Any]:
+        """Parse and validate the complete object.
+
+        Raises:
+            StructuredOutputError: If the output is truncated, malformed or invalid
+        """
+        if self._start is None or self._end is None:
+            raise StructuredOutputError("Output ended before the JSON object was complete")
+
+        try:
+            value = orjson.loads(self._buffer[self._start : self._end + 1])
+        except orjson.JSONDecodeError as e:
+            raise StructuredOutputError(f"Malformed JSON: {e}") from e
+
+        validate(value, self.schema)
+        return cast(dict[str, Any], value)
+
+    def _step(self, text: str, i: int, c: str) -> None:
+        if self._in_string:
+            if self._escaped:
+                self._escaped = False
+            elif c == "\\":
+                self._escaped = True
+            elif c == '"':
+                self._in_string = False
+                if self._depth == 1 and self._expect_key:
+                    self._key = self._decode(text[self._token_start : i + 1])
+                    self._token_start = None
+            return
+
+        if c.isspace():
+            return
+
+        if self._depth == 0:
+            if c != "{":
+                raise StructuredOutputError(f"Expected a JSON object, got {text[i:i + 20]!r}")
+            self._start = i
+            self._depth = 1
+            return
+
+        if c == '"':
+            self._in_string = True
+            if self._depth == 1 and self._token_start is None:
+                self._token_start = i
+            return
+
+        if self._depth > 1:
+            if c in "{[":
+                self._depth += 1
+            elif c in "}]":
+                self._depth -= 1
+            return
+
+        # Depth 1: between the keys and values of the top-level object
+        if self._expect_key:
+            if c == ":":
+                self._check_key()
+                self._expect_key = False
+            elif c == "}":
+                self._close(i)
+            elif c != ",":
+                raise StructuredOutputError(f"Unexpected {c!r} in object")
+            return
+
+        if c in ",}":
+            self._check_value(text[self._token_start : i] if self._token_start is not None else "")
+            self._expect_key = True
+            self._key = None
+            self._token_start = None
+            if c == "}":
+                self._close(i)
+            return
+
+        if self._token_start is None:
+            self._token_start = i
+        if c in "{[":
+            self._depth += 1
+
+    def _close(self, i: int) -> None:
+        self._depth = 0
+        self._end = i
+
+    def _check_key(self) -> None:
+        if self._key is None:
+            raise StructuredOutputError("Object key is not a string")
+        if self._closed_keys and self._key not in self._properties:
+            raise StructuredOutputError(f"$: unexpected field {self._key!r}")
+
+    def _check_value(self, raw: str) -> None:
+        value = self._decode(raw.strip())
+        if self._key in self._properties:
+            validate(value, self._properties[self._key], f"$.{self._key}")
+
+    @staticmethod
+    def _decode(raw: str) -> Any:
+        try:
+            return orjson.loads(raw)
+        except orjson.JSONDecodeError as e:
+            raise StructuredOutputError(f"Malformed JSON value {raw[:40]!r}") from e
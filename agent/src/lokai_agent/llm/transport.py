@@ -0,0 +1,132 @@
+"""Shared HTTP transport for the LLM clients.
+
+Provides one factory for tuned httpx clients and incremental parsers for the two
+streaming formats the providers use: NDJSON (Ollama) and server-sent events
+(OpenAI). The parsers split raw response bytes into lines themselves and decode
+each payload with orjson.
+"""
+
+from collections.abc import AsyncIterator, Iterable, Iterator
+from typing import Any
+
+import httpx
+import orjson
+import structlog
+
+from lokai_agent.config import settings
+
+logger = structlog.get_logger()
+
+_SSE_DONE = b"[DONE]"
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def create_client(
+    base_url: str,
+    headers: dict[str, str] | None = None,
+    http2: bool = False,
+) -> httpx.AsyncClient:
+    """Create an HTTP client with the configured pool limits and timeouts.
+
+    Args:
+        base_url: Base URL of the provider
+        headers: Default headers sent with every request
+        http2: Negotiate HTTP/2 when the optional h2 package is installed
+
+    Returns:
+        Configured client
+    """
+    if http2 and not _http2_available():
+        logger.info("h2 is not installed, using HTTP/1.1", base_url=base_url)
+        http2 = False
+
+    return httpx.AsyncClient(
+        base_url=base_url,
+        headers=headers,
+        http2=http2,
+        limits=httpx.Limits(
+            max_connections=settings.http_max_connections,
+            max_keepalive_connections=settings.http_max_keepalive_connections,
+            keepalive_expiry=settings.http_keepalive_expiry,
+        ),
+        timeout=httpx.Timeout(settings.http_timeout, connect=settings.http_connect_timeout),
+    )
+
+
+class LineBuffer:
+    """Splits a byte stream into lines without decoding it."""
+
+    def __init__(self) -> None:
+        self._buffer = bytearray()
+
+    def feed(self, chunk: bytes) -> list[bytes]:
+        """Add a chunk and return the lines it completed, without line endings."""
+        self._buffer += chunk
+        end = self._buffer.rfind(b"\n")
+        if end < 0:
+            return []
+
+        lines = bytes(self._buffer[:end]).split(b"\n")
+        del self._buffer[: end + 1]
+        return [line[:-1] if line.endswith(b"\r") else line for line in lines]
+
+    def flush(self) -> bytes:
+        """Return whatever is left after the last line ending."""
+        rest = bytes(self._buffer).rstrip(b"\r")
+        self._buffer.clear()
+        return rest
+
+
+def parse_ndjson(lines: Iterable[bytes]) -> Iterator[dict[str, Any]]:
+    """Decode NDJSON lines, skipping blank ones."""
+    for line in lines:
+        if line.strip():
+            yield orjson.loads(line)
+
+
+def parse_sse(lines: Iterable[bytes]) -> Iterator[dict[str, Any] | None]:
+    """Decode the JSON payloads of SSE ``data:`` lines.
+
+    Yields None for the ``[DONE]`` sentinel so callers can stop reading.
+    """
+    for line in lines:
+        if not line.startswith(b"data:"):
+            continue
+        data = line[5:].strip()
+        if data == _SSE_DONE:
+            yield None
+        elif data:
+            yield orjson.loads(data)
+
+
+async def aiter_ndjson(response: httpx.Response) -> AsyncIterator[dict[str, Any]]:
+    """Iterate over the objects of a streaming NDJSON response."""
+    buffer = LineBuffer()
+    async for chunk in response.aiter_bytes():
+        for event in parse_ndjson(buffer.feed(chunk)):
+            yield event
+
+    for event in parse_ndjson([buffer.flush()]):
+        yield event
+
+
+async def aiter_sse(response: httpx.Response) -> AsyncIterator[dict[str, Any]]:
+    """Iterate over the JSON events of a streaming SSE response until ``[DONE]``."""
+    buffer = LineBuffer()
+    async for chunk in response.aiter_bytes():
+        for event in parse_sse(buffer.feed(chunk)):
+            if event is None:
+                return
+            yield event
+
+    for event in parse_sse([buffer.flush()]):
+        if event is None:
+            return
+        yield event
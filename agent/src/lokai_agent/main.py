@@ -1,27 +1,44 @@
-"""Lokai Agent main entry point - JSON-RPC server over stdio."""
+"""Lokai Agent main entry point - JSON-RPC server over stdio or a Unix socket."""
 
+import argparse
 import asyncio
-import json
+import importlib
+import logging
 import sys
-from typing import Any
+from contextlib import aclosing
+from contextvars import ContextVar
+from typing import TYPE_CHECKING, Any
 
 import structlog
-from pydantic import BaseModel
+from pydantic import BaseModel, ValidationError
 
 from lokai_agent.config import settings
-from lokai_agent.graph.graph import create_agent_graph
-from lokai_agent.llm.router import LLMRouter
+from lokai_agent.rpc import (
+    LOCAL_CLIENT,
+    FramingError,
+    MessageTransport,
+    MessageWriter,
+    RequestDispatcher,
+    coalesce_tokens,
+    open_stdio_transport,
+    serializer,
+    serve_unix_socket,
+)
+
+if TYPE_CHECKING:
+    from lokai_agent.graph.intent_index import IntentIndex
+    from lokai_agent.llm.router import LLMRouter
 
 # Configure structured logging
 structlog.configure(
     processors=[
-        structlog.stdlib.filter_by_level,
-        structlog.stdlib.add_logger_name,
-        structlog.stdlib.add_log_level,
+        structlog.processors.add_log_level,
         structlog.processors.TimeStamper(fmt="iso"),
         structlog.processors.JSONRenderer(),
     ],
-    wrapper_class=structlog.stdlib.BoundLogger,
+    wrapper_class=structlog.make_filtering_bound_logger(
+        logging.getLevelNamesMapping().get(settings.log_level.upper(), logging.INFO)
+    ),
     context_class=dict,
     logger_factory=structlog.PrintLoggerFactory(file=sys.stderr),
     cache_logger_on_first_use=True,
@@ -29,6 +46,9 @@ structlog.configure(
 
 logger = structlog.get_logger()
 
+# JSON-RPC error code for requests aborted by a `cancel` call (as used by LSP)
+REQUEST_CANCELLED = -32800
+
 
 class JsonRpcRequest(BaseModel):
     """JSON-RPC 2.0 request."""
@@ -48,22 +68,28 @@ class JsonRpcResponse(BaseModel):
     error: dict[str, Any] | None = None
 
 
-class JsonRpcStreamingToken(BaseModel):
-    """Streaming token response."""
+class Connection:
+    """A connected client: where its responses go and how its requests are keyed."""
 
-    jsonrpc: str = "2.0"
-    id: int
-    streaming: bool = True
-    token: str
+    def __init__(self, transport: MessageTransport, writer: MessageWriter, client: str) -> None:
+        self.transport = transport
+        self.writer = writer
+        self.client = client
 
 
-class JsonRpcStreamingComplete(BaseModel):
-    """Streaming complete response."""
+# The connection being served; request tasks inherit it from the read loop
+_connection: ContextVar[Connection] = ContextVar("lokai_connection")
+
+
+def _final_content(state: dict[str, Any]) -> str:
+    """Extract the assistant response from a final graph state."""
+    messages = state.get("messages") or []
+    return messages[-1].get("content", "") if messages else ""
 
-    jsonrpc: str = "2.0"
-    id: int
-    complete: bool = True
-    result: str
+
+def _error_message(request_id: Any, code: int, message: str) -> dict[str, Any]:
+    """Build a JSON-RPC error response."""
+    return {"jsonrpc": "2.0", "id": request_id, "error": {"code": code, "message": message}}
 
 
 class LokaiAgent:
@@ -72,38 +98,146 @@ class LokaiAgent:
     def __init__(self) -> None:
         self.llm_router: LLMRouter | None = None
         self.graph: Any = None
+        self.intent_index: IntentIndex | None = None
         self._running = True
+        self._init_task: asyncio.Task[None] | None = None
+        self._init_error: str | None = None
+        self._init_failed = False
+        self._batches: dict[asyncio.Task[None], str] = {}
+        self._dispatcher = RequestDispatcher(
+            self.handle_request,
+            max_concurrency=settings.max_concurrent_requests,
+        )
 
     async def initialize(self) -> None:
-        """Initialize the agent components."""
+        """Start initializing the agent components in the background.
+
+        Returns immediately so `ping` can be answered while the LLM providers are
+        checked and the graph is compiled; requests that need them wait in
+        wait_ready().
+        """
+        if self._init_task is None:
+            self._init_task = asyncio.create_task(self._initialize_components())
+
+    async def _initialize_components(self) -> None:
+        """Initialize the components, retrying with backoff until attempts run out.
+
+        The last error is kept in _init_error, so `ping` reports it while later
+        attempts are pending.
+        """
+        delay = settings.agent_init_retry_delay
+        for attempt in range(1, settings.agent_init_attempts + 1):
+            try:
+                await self._initialize_once()
+            except Exception as e:
+                logger.exception(
+                    "Failed to initialize Lokai agent", attempt=attempt, error=str(e)
+                )
+                self._init_error = str(e)
+                await self._discard_components()
+            else:
+                self._init_error = None
+                logger.info("Lokai agent initialized successfully")
+                return
+
+            if attempt < settings.agent_init_attempts:
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, settings.agent_init_retry_max_delay)
+
+        self._init_failed = True
+
+    async def _initialize_once(self) -> None:
+        """Initialize the LLM router and compile the agent graph."""
         logger.info("Initializing Lokai agent...")
 
+        # Heavy imports (LangGraph, httpx) run off the event loop thread, and the
+        # graph import overlaps with the LLM provider health checks
+        graph_import = asyncio.ensure_future(
+            asyncio.to_thread(importlib.import_module, "lokai_agent.graph")
+        )
+        router_module = await asyncio.to_thread(
+            importlib.import_module, "lokai_agent.llm.router"
+        )
+
         # Initialize LLM router
-        self.llm_router = LLMRouter()
-        await self.llm_router.initialize()
+        self.llm_router = router_module.LLMRouter()
+        _, graph_module = await asyncio.gather(self.llm_router.initialize(), graph_import)
 
         # Create the agent graph
-        self.graph = create_agent_graph(self.llm_router)
+        if settings.intent_fast_path:
+            self.intent_index = graph_module.IntentIndex(
+                self.llm_router,
+                threshold=settings.intent_similarity_threshold,
+                margin=settings.intent_similarity_margin,
+                learn_confidence=settings.intent_learn_confidence,
+                max_exemplars=settings.intent_max_exemplars,
+                path=settings.intent_exemplars_path,
+            )
+            self.intent_index.start()
+        self.graph = graph_module.create_agent_graph(self.llm_router, self.intent_index)
+
+    async def _discard_components(self) -> None:
+        """Drop what a failed initialization attempt built, closing its connections."""
+        router, self.llm_router = self.llm_router, None
+        self.intent_index = None
+        self.graph = None
+        if router is not None:
+            try:
+                await router.close()
+            except Exception as e:
+                logger.warning("Failed to close LLM router", error=str(e))
+
+    @property
+    def readiness(self) -> str:
+        """Initialization state: "starting", "ready" or "failed"."""
+        if self._init_task is None or not self._init_task.done():
+            return "starting"
+        return "failed" if self._init_failed else "ready"
 
-        logger.info("Lokai agent initialized successfully")
+    async def wait_ready(self) -> None:
+        """Wait for background initialization, raising if it failed."""
+        if self._init_task is None:
+            await self.initialize()
+
+        if self._init_task is not None:
+            # Shield so a cancelled request doesn't abort initialization
+            await asyncio.shield(self._init_task)
+
+        if self._init_failed:
+            raise RuntimeError(f"Agent failed to initialize: {self._init_error}")
 
     async def handle_request(self, request: JsonRpcRequest) -> JsonRpcResponse:
         """Handle a JSON-RPC request."""
         try:
             if request.method == "ping":
-                return JsonRpcResponse(id=request.id, result={"status": "ok"})
+                result: dict[str, Any] = {
+                    "status": "error" if self._init_failed else "ok",
+                    "ready": self.readiness == "ready",
+                    "state": self.readiness,
+                }
+                if self._init_error is not None:
+                    result["error"] = self._init_error
+                result["outbound_queue"] = _connection.get().writer.stats()
+                return JsonRpcResponse(id=request.id, result=result)
 
             elif request.method == "process_message":
                 params = request.params or {}
                 message = params.get("message", "")
                 streaming = params.get("streaming", False)
 
+                session_id = params.get("session_id")
+
                 if streaming:
                     # Handle streaming response
-                    await self._process_message_streaming(request.id, message)
+                    await self._process_message_streaming(
+                        request.id,
+                        message,
+                        events=params.get("events", False),
+                        session_id=session_id,
+                    )
                     return JsonRpcResponse(id=request.id, result={"streaming": True})
                 else:
-                    result = await self._process_message(message)
+                    result = await self._process_message(message, session_id)
                     return JsonRpcResponse(id=request.id, result=result)
 
             elif request.method == "execute_tool":
@@ -114,13 +248,23 @@ class LokaiAgent:
                 return JsonRpcResponse(id=request.id, result=result)
 
             elif request.method == "cancel":
-                # Cancel current operation
-                return JsonRpcResponse(id=request.id, result={"cancelled": True})
+                # Cancel one request by id, or everything in flight
+                params = request.params or {}
+                cancelled = self._dispatcher.cancel(
+                    _connection.get().client, params.get("request_id")
+                )
+                return JsonRpcResponse(
+                    id=request.id,
+                    result={"cancelled": bool(cancelled), "request_ids": cancelled},
+                )
 
             elif request.method == "get_context":
                 context = await self._get_context()
                 return JsonRpcResponse(id=request.id, result=context)
 
+            elif request.method == "get_metrics":
+                return JsonRpcResponse(id=request.id, result=self._get_metrics())
+
             else:
                 return JsonRpcResponse(
                     id=request.id,
@@ -134,54 +278,123 @@ class LokaiAgent:
                 error={"code": -32603, "message": str(e)},
             )
 
-    async def _process_message(self, message: str) -> dict[str, Any]:
+    async def _process_message(self, message: str, session_id: str | None = None) -> dict[str, Any]:
         """Process a user message and return the response."""
-        if not self.graph:
-            raise RuntimeError("Agent not initialized")
+        await self.wait_ready()
 
         # Run the agent graph
-        state = {"messages": [{"role": "user", "content": message}]}
+        state = {
+            "messages": [{"role": "user", "content": message}],
+            "session_id": session_id,
+            "client": _connection.get().client,
+        }
         result = await self.graph.ainvoke(state)
 
-        # Extract the response
-        response_message = result.get("messages", [])[-1] if result.get("messages") else None
-
         return {
-            "content": response_message.get("content", "") if response_message else "",
+            "content": _final_content(result),
             "tool_calls": result.get("tool_calls", []),
         }
 
-    async def _process_message_streaming(self, request_id: int, message: str) -> None:
-        """Process a message with streaming response."""
-        if not self.llm_router:
-            raise RuntimeError("Agent not initialized")
-
-        full_response = ""
+    async def _process_message_streaming(
+        self,
+        request_id: int,
+        message: str,
+        events: bool = False,
+        session_id: str | None = None,
+    ) -> None:
+        """Process a message through the agent graph, streaming the response.
+
+        Tokens from the response generator are sent as they are produced. With
+        ``events`` set, node transitions are sent as ``event`` messages too.
+        """
+        await self.wait_ready()
+        from lokai_agent.graph.streaming import stream_graph
+
+        state = {
+            "messages": [{"role": "user", "content": message}],
+            "session_id": session_id,
+            "client": _connection.get().client,
+        }
+        parts: list[str] = []
+        final_state: dict[str, Any] = {}
+        frames = coalesce_tokens(
+            stream_graph(self.graph, state),
+            window=settings.stream_coalesce_ms / 1000,
+            max_bytes=settings.stream_coalesce_bytes,
+        )
 
         try:
-            async for token in self.llm_router.stream(message):
-                full_response += token
-                # Send streaming token
-                streaming_response = JsonRpcStreamingToken(id=request_id, token=token)
-                self._send_response(streaming_response.model_dump())
+            # aclosing() tears the graph run and its HTTP streams down as soon as we
+            # stop consuming, including on cancellation
+            async with aclosing(frames):
+                async for item in frames:
+                    if isinstance(item, str):
+                        parts.append(item)
+                        # Send a frame of one or more coalesced tokens
+                        await self._send_token(request_id, item)
+                    elif item["type"] == "node":
+                        if events:
+                            self._send(
+                                serializer.encode_event(request_id, "node", node=item["node"]),
+                                request_id,
+                            )
+                    elif item["type"] == "event":
+                        # Sent regardless of ``events``: they affect how text is shown
+                        fields = {k: v for k, v in item.items() if k not in ("type", "event")}
+                        self._send(
+                            serializer.encode_event(request_id, item["event"], **fields),
+                            request_id,
+                        )
+                    elif item["type"] == "result":
+                        final_state = item["state"]
+
+            # Responses that weren't generated token by token (tool results,
+            # clarifications, greetings) are sent as a single frame
+            content = "".join(parts) or _final_content(final_state)
+            if not parts and content:
+                self._send(serializer.encode_token(request_id, content), request_id)
 
             # Send completion
-            complete_response = JsonRpcStreamingComplete(id=request_id, result=full_response)
-            self._send_response(complete_response.model_dump())
+            self._send(serializer.encode_complete(request_id, content), request_id)
 
         except Exception as e:
             logger.exception("Error in streaming", error=str(e))
-            error_response = JsonRpcResponse(
-                id=request_id,
-                error={"code": -32603, "message": str(e)},
-            )
-            self._send_response(error_response.model_dump())
+            self._send(serializer.encode_error(request_id, -32603, str(e)), request_id)
 
     async def _execute_tool(self, tool_name: str, params: dict[str, Any]) -> dict[str, Any]:
         """Execute a specific tool."""
         # Tool execution will be implemented with LangChain tools
         return {"executed": tool_name, "params": params, "result": "Tool execution pending"}
 
+    def _get_metrics(self) -> dict[str, Any]:
+        """Collect LLM telemetry and the statistics of the agent's caches and queues.
+
+        Only what has been initialized so far is included, so it never waits for
+        startup.
+        """
+        metrics: dict[str, Any] = {
+            "state": self.readiness,
+            "outbound_queue": _connection.get().writer.stats(),
+        }
+
+        router = self.llm_router
+        if router is not None:
+            metrics.update(
+                llm=router.metrics.snapshot(),
+                providers=router.health(),
+                hedging=router.hedge_stats(),
+                coalescing=router.coalescing_stats(),
+                structured=router.structured_stats(),
+                embedding_cache=router.ollama.embedding_cache.stats(),
+            )
+            if router.cache is not None:
+                metrics["response_cache"] = router.cache.stats()
+
+        if self.intent_index is not None:
+            metrics["intent_index"] = self.intent_index.stats()
+
+        return metrics
+
     async def _get_context(self) -> dict[str, Any]:
         """Get current context information."""
         import os
@@ -196,46 +409,187 @@ class LokaiAgent:
 
     def _send_response(self, response: dict[str, Any]) -> None:
         """Send a JSON-RPC response to stdout."""
-        print(json.dumps(response), flush=True)
+        self._send(serializer.dumps(response), response.get("id"))
+
+    def _send(self, payload: bytes, request_id: Any = None) -> None:
+        """Queue an already-encoded message for the current client.
+
+        Messages that belong to a request pass its id, so that tokens streamed
+        after them are not merged into an earlier frame.
+        """
+        connection = _connection.get(None)
+        if connection is None:
+            raise RuntimeError("No client connection")
+
+        connection.writer.send_nowait(payload, request_id)
+
+    async def _send_token(self, request_id: int, token: str) -> None:
+        """Queue a streaming token, waiting or merging if the client falls behind."""
+        await _connection.get().writer.send_token(request_id, token)
 
     async def run(self) -> None:
         """Run the agent, reading from stdin and writing to stdout."""
         await self.initialize()
 
+        transport = await open_stdio_transport(
+            framing=settings.rpc_framing,
+            max_message_bytes=settings.rpc_max_message_bytes,
+        )
+
         logger.info("Lokai agent ready, listening for requests...")
 
+        await self.serve(transport, LOCAL_CLIENT)
+
+    async def run_server(self, socket_path: str) -> None:
+        """Run the agent as a Unix socket server shared by many clients."""
+        await self.initialize()
+
+        logger.info("Lokai agent ready, serving clients...", socket=socket_path)
+
+        await serve_unix_socket(
+            socket_path,
+            lambda transport, client: self.serve(transport, client, cancel_on_close=True),
+            framing=settings.rpc_framing,
+            max_message_bytes=settings.rpc_max_message_bytes,
+        )
+
+    async def serve(
+        self,
+        transport: MessageTransport,
+        client: str,
+        cancel_on_close: bool = False,
+    ) -> None:
+        """Serve one client connection until its input ends.
+
+        Args:
+            transport: The client's message transport
+            client: Key scoping the client's sessions, cancellation and scheduling
+            cancel_on_close: Cancel the client's outstanding requests when it
+                disconnects instead of letting them finish
+        """
+        writer = MessageWriter(
+            transport,
+            max_pending=settings.rpc_write_queue_size,
+            token_overflow=settings.rpc_token_overflow,
+        )
+        writer.start()
+        _connection.set(Connection(transport, writer, client))
+
         while self._running:
             try:
-                # Read a line from stdin
-                line = await asyncio.get_event_loop().run_in_executor(None, sys.stdin.readline)
-
-                if not line:
+                # Read the next framed message from the client
+                try:
+                    raw = await transport.read_message()
+                except FramingError as e:
+                    self._send(serializer.encode_error(None, -32700, f"Parse error: {e}"))
+                    continue
+                except (asyncio.IncompleteReadError, ConnectionError):
                     break
 
-                line = line.strip()
-                if not line:
-                    continue
+                if raw is None:
+                    break
 
-                # Parse the JSON-RPC request
+                # Parse the JSON-RPC message
                 try:
-                    data = json.loads(line)
-                    request = JsonRpcRequest(**data)
-                except json.JSONDecodeError as e:
-                    error_response = {
-                        "jsonrpc": "2.0",
-                        "id": None,
-                        "error": {"code": -32700, "message": f"Parse error: {e}"},
-                    }
-                    self._send_response(error_response)
+                    data = serializer.loads(raw)
+                except serializer.JSONDecodeError as e:
+                    self._send(serializer.encode_error(None, -32700, f"Parse error: {e}"))
                     continue
 
-                # Handle the request
-                response = await self.handle_request(request)
-                self._send_response(response.model_dump())
+                # Handle requests concurrently so slow requests don't block others
+                if isinstance(data, list):
+                    self._dispatch_batch(data)
+                else:
+                    self._dispatch_single(data)
 
             except Exception as e:
                 logger.exception("Error in main loop", error=str(e))
 
+        if cancel_on_close:
+            self._dispatcher.cancel(client)
+
+        # Let in-flight requests and batches finish before returning
+        await self._dispatcher.join(client)
+        batches = [task for task, owner in self._batches.items() if owner == client]
+        if batches:
+            await asyncio.gather(*batches, return_exceptions=True)
+
+        # Flush everything still queued for the client
+        await writer.close()
+
+    def _parse_request(self, data: Any) -> JsonRpcRequest | dict[str, Any]:
+        """Validate a decoded message, returning an error response if invalid."""
+        if not isinstance(data, dict):
+            return _error_message(None, -32600, "Invalid Request")
+
+        try:
+            return JsonRpcRequest(**data)
+        except ValidationError as e:
+            return _error_message(data.get("id"), -32600, f"Invalid Request: {e}")
+
+    def _dispatch_single(self, data: Any) -> None:
+        """Dispatch a single request and send its response when it finishes."""
+        request = self._parse_request(data)
+        if isinstance(request, dict):
+            self._send_response(request)
+            return
+
+        task = self._dispatcher.dispatch(request, _connection.get().client)
+        request_id = request.id
+        task.add_done_callback(
+            lambda t: self._send_response(self._response_message(request_id, t))
+        )
+
+    def _dispatch_batch(self, batch: list[Any]) -> None:
+        """Dispatch all members of a batch at once and reply with one array."""
+        if not batch:
+            self._send_response(_error_message(None, -32600, "Invalid Request: empty batch"))
+            return
+
+        client = _connection.get().client
+        entries: list[tuple[int, asyncio.Task[JsonRpcResponse]] | dict[str, Any]] = []
+        for data in batch:
+            request = self._parse_request(data)
+            if isinstance(request, dict):
+                entries.append(request)
+            else:
+                entries.append((request.id, self._dispatcher.dispatch(request, client)))
+
+        task = asyncio.create_task(self._collect_batch(entries))
+        self._batches[task] = client
+        task.add_done_callback(lambda t: self._batches.pop(t, None))
+
+    async def _collect_batch(
+        self,
+        entries: list[tuple[int, "asyncio.Task[JsonRpcResponse]"] | dict[str, Any]],
+    ) -> None:
+        """Wait for every member of a batch and send the responses together."""
+        tasks = [entry[1] for entry in entries if isinstance(entry, tuple)]
+        if tasks:
+            await asyncio.wait(tasks)
+
+        responses = [
+            entry if isinstance(entry, dict) else self._response_message(*entry)
+            for entry in entries
+        ]
+        self._send(serializer.dumps(responses))
+
+    def _response_message(
+        self,
+        request_id: int,
+        task: "asyncio.Task[JsonRpcResponse]",
+    ) -> dict[str, Any]:
+        """Build the response message for a finished request task."""
+        if task.cancelled():
+            return _error_message(request_id, REQUEST_CANCELLED, "Request cancelled")
+
+        error = task.exception()
+        if error is not None:
+            logger.error("Request task failed", error=str(error))
+            return _error_message(request_id, -32603, str(error))
+
+        return task.result().model_dump()
+
     def stop(self) -> None:
         """Stop the agent."""
         self._running = False
@@ -243,8 +597,20 @@ class LokaiAgent:
 
 async def main() -> None:
     """Main entry point."""
+    parser = argparse.ArgumentParser(prog="lokai_agent", description="Lokai JSON-RPC agent")
+    parser.add_argument(
+        "--socket",
+        metavar="PATH",
+        default=settings.agent_socket_path,
+        help="serve clients on a Unix socket instead of stdio",
+    )
+    args = parser.parse_args()
+
     agent = LokaiAgent()
-    await agent.run()
+    if args.socket:
+        await agent.run_server(args.socket)
+    else:
+        await agent.run()
 
 
 if __name__ == "__main__":
@@ -1,7 +1,23 @@
 """Prompt templates for the Lokai agent."""
 
 from lokai_agent.prompts.system import SYSTEM_PROMPT
-from lokai_agent.prompts.intent import INTENT_CLASSIFICATION_PROMPT
-from lokai_agent.prompts.planning import ACTION_PLANNING_PROMPT
+from lokai_agent.prompts.intent import INTENT_CLASSIFICATION_PROMPT, INTENT_EXEMPLARS
+from lokai_agent.prompts.planning import ACTION_PLANNING_PROMPT, FUSED_PLANNING_PROMPT
+from lokai_agent.prompts.schemas import (
+    ACTION_PLAN_SCHEMA,
+    INTENT_PLAN_SCHEMA,
+    INTENT_SCHEMA,
+    STRUCTURED_RETRY_PROMPT,
+)
 
-__all__ = ["SYSTEM_PROMPT", "INTENT_CLASSIFICATION_PROMPT", "ACTION_PLANNING_PROMPT"]
+__all__ = [
+    "SYSTEM_PROMPT",
+    "INTENT_CLASSIFICATION_PROMPT",
+    "INTENT_EXEMPLARS",
+    "ACTION_PLANNING_PROMPT",
+    "FUSED_PLANNING_PROMPT",
+    "INTENT_SCHEMA",
+    "ACTION_PLAN_SCHEMA",
+    "INTENT_PLAN_SCHEMA",
+    "STRUCTURED_RETRY_PROMPT",
+]
@@ -63,3 +63,73 @@ Respond in JSON format:
   "raw_entities": []
 }}
 """
+
+# Labelled example messages seeding the embedding fast path of intent
+# classification. Only unambiguous phrasings belong here: a message is classified
+# without the LLM when it is close enough to one of them.
+INTENT_EXEMPLARS: dict[str, list[str]] = {
+    "GREETING": [
+        "hi",
+        "hello",
+        "hey there",
+        "good morning",
+        "good evening",
+        "hi, how are you?",
+        "thanks!",
+        "thank you, that's all",
+    ],
+    "QUESTION": [
+        "what is a symbolic link?",
+        "what's the difference between a process and a thread?",
+        "how does git rebase work?",
+        "explain what an environment variable is",
+        "what does chmod 755 mean?",
+        "why is Python called Python?",
+    ],
+    "FILESYSTEM_READ": [
+        "list files in ~/Downloads",
+        "show me what's in my Documents folder",
+        "what files are in this directory?",
+        "read the file notes.txt",
+        "open ~/.bashrc and show me its contents",
+        "show the contents of README.md",
+    ],
+    "FILESYSTEM_WRITE": [
+        "create a file called todo.txt",
+        "write 'hello world' to hello.txt",
+        "make a new folder named projects",
+        "rename report.docx to report-final.docx",
+        "move photo.jpg to ~/Pictures",
+    ],
+    "FILESYSTEM_DELETE": [
+        "delete the file old.log",
+        "remove the folder ~/tmp/build",
+        "delete everything in ~/Downloads/old",
+        "clean up the temp files in this directory",
+    ],
+    "TERMINAL_COMMAND": [
+        "run npm install",
+        "run the tests",
+        "execute ls -la",
+        "check how much disk space is free",
+        "show running processes",
+    ],
+    "GIT_OPERATION": [
+        "git status",
+        "show the git log",
+        "commit my changes",
+        "create a new branch called feature/login",
+        "pull the latest changes",
+    ],
+    "BROWSER_ACTION": [
+        "open github.com in the browser",
+        "search the web for python asyncio tutorials",
+        "go to https://example.com",
+    ],
+    "CODE_ANALYSIS": [
+        "explain what main.py does",
+        "find bugs in this function",
+        "review the code in src/app.ts",
+        "what does the parse_args function in cli.py do?",
+    ],
+}
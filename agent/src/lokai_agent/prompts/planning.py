@@ -35,6 +35,63 @@ Respond in JSON format:
 }}
 """
 
+FUSED_PLANNING_PROMPT = """Classify the user's intent and, if it calls for actions, plan them.
+
+User Message: "{message}"
+Current Context:
+- Working Directory: {current_directory}
+- Files Here: {recent_files}
+
+Classify the intent into one of these categories:
+- FILESYSTEM_READ: User wants to read or view files/directories
+- FILESYSTEM_WRITE: User wants to create or modify files
+- FILESYSTEM_DELETE: User wants to delete files or directories
+- TERMINAL_COMMAND: User wants to execute a shell command
+- GIT_OPERATION: User wants to perform git operations
+- BROWSER_ACTION: User wants to interact with a browser
+- CODE_ANALYSIS: User wants to understand or analyze code
+- QUESTION: User is asking a question that doesn't require actions
+- CLARIFICATION_NEEDED: The intent is unclear and needs clarification
+- GREETING: User is greeting or making small talk
+- OTHER: Doesn't fit any category
+
+For QUESTION, GREETING, CLARIFICATION_NEEDED and OTHER, set "plan" to null.
+Otherwise create a step-by-step plan. For each step, specify the tool, its
+parameters, what the step accomplishes and which earlier steps it depends on.
+
+Respond in JSON format:
+{{
+  "intent": "CATEGORY",
+  "confidence": 0.0-1.0,
+  "risk_level": "low|medium|high",
+  "requires_approval": true|false,
+  "entities": {{
+    "paths": [],
+    "commands": [],
+    "urls": [],
+    "other": []
+  }},
+  "explanation": "Brief explanation of why this classification was chosen",
+  "plan": {{
+    "plan_summary": "Brief description of what will be done",
+    "steps": [
+      {{
+        "step_number": 1,
+        "tool": "tool_name",
+        "parameters": {{}},
+        "description": "What this step does",
+        "depends_on": [],
+        "risk_level": "low|medium|high",
+        "requires_approval": true|false
+      }}
+    ],
+    "total_risk_level": "low|medium|high",
+    "requires_user_confirmation": true|false,
+    "confirmation_message": "Message to show user if confirmation needed"
+  }}
+}}
+"""
+
 ROLLBACK_PLAN_PROMPT = """Create a rollback plan for the following action:
 
 Action: {action}
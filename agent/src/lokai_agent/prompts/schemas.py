@@ -0,0 +1,101 @@
+"""JSON schemas for structured LLM outputs.
+
+Sent to the providers to constrain generation (Ollama ``format``, OpenAI
+``response_format``) and used to validate what comes back.
+"""
+
+from typing import Any
+
+RISK_LEVELS = ["low", "medium", "high"]
+
+INTENT_CATEGORIES = [
+    "FILESYSTEM_READ",
+    "FILESYSTEM_WRITE",
+    "FILESYSTEM_DELETE",
+    "TERMINAL_COMMAND",
+    "GIT_OPERATION",
+    "BROWSER_ACTION",
+    "CODE_ANALYSIS",
+    "QUESTION",
+    "CLARIFICATION_NEEDED",
+    "GREETING",
+    "OTHER",
+]
+
+_STRING_LIST: dict[str, Any] = {"type": "array", "items": {"type": "string"}}
+
+INTENT_SCHEMA: dict[str, Any] = {
+    "type": "object",
+    "properties": {
+        "intent": {"type": "string", "enum": INTENT_CATEGORIES},
+        "confidence": {"type": "number", "minimum": 0, "maximum": 1},
+        "risk_level": {"type": "string", "enum": RISK_LEVELS},
+        "requires_approval": {"type": "boolean"},
+        "entities": {
+            "type": "object",
+            "properties": {
+                "paths": _STRING_LIST,
+                "commands": _STRING_LIST,
+                "urls": _STRING_LIST,
+                "other": _STRING_LIST,
+            },
+        },
+        "explanation": {"type": "string"},
+    },
+    "required": [
+        "intent",
+        "confidence",
+        "risk_level",
+        "requires_approval",
+        "entities",
+        "explanation",
+    ],
+    "additionalProperties": False,
+}
+
+ACTION_PLAN_SCHEMA: dict[str, Any] = {
+    "type": "object",
+    "properties": {
+        "plan_summary": {"type": "string"},
+        "steps": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "step_number": {"type": "integer"},
+                    "tool": {"type": "string"},
+                    "parameters": {"type": "object"},
+                    "description": {"type": "string"},
+                    "depends_on": {"type": "array", "items": {"type": "integer"}},
+                    "risk_level": {"type": "string", "enum": RISK_LEVELS},
+                    "requires_approval": {"type": "boolean"},
+                },
+                "required": ["tool", "parameters", "description"],
+            },
+        },
+        "total_risk_level": {"type": "string", "enum": RISK_LEVELS},
+        "requires_user_confirmation": {"type": "boolean"},
+        "confirmation_message": {"type": ["string", "null"]},
+    },
+    "required": ["plan_summary", "steps", "total_risk_level", "requires_user_confirmation"],
+    "additionalProperties": False,
+}
+
+# Intent and action plan in one object, for the fused classification-and-planning
+# call; the plan is null for intents that need no actions
+INTENT_PLAN_SCHEMA: dict[str, Any] = {
+    "type": "object",
+    "properties": {
+        **INTENT_SCHEMA["properties"],
+        "plan": {**ACTION_PLAN_SCHEMA, "type": ["object", "null"]},
+    },
+    "required": [*INTENT_SCHEMA["required"], "plan"],
+    "additionalProperties": False,
+}
+
+# Retry prompt after structured output failed validation, telling the model what
+# was wrong with its previous answer
+STRUCTURED_RETRY_PROMPT = """{prompt}
+
+Your previous answer was rejected: {error}
+Respond again with a single JSON object that matches the required schema."""
@@ -63,3 +63,6 @@ Would you like me to:
 
 Please let me know how you'd like to proceed.
 """
+
+CONTINUATION_PROMPT = """Your previous reply was cut off. Continue it exactly where it stopped, \
+without repeating any of it and without any preamble."""
@@ -0,0 +1,18 @@
+"""JSON-RPC transport and dispatch for the Lokai agent."""
+
+from lokai_agent.rpc.coalescer import coalesce_tokens
+from lokai_agent.rpc.dispatcher import LOCAL_CLIENT, RequestDispatcher
+from lokai_agent.rpc.server import serve_unix_socket
+from lokai_agent.rpc.transport import FramingError, MessageTransport, open_stdio_transport
+from lokai_agent.rpc.writer import MessageWriter
+
+__all__ = [
+    "coalesce_tokens",
+    "LOCAL_CLIENT",
+    "RequestDispatcher",
+    "serve_unix_socket",
+    "FramingError",
+    "MessageTransport",
+    "MessageWriter",
+    "open_stdio_transport",
+]
@@ -0,0 +1,109 @@
+"""Coalescing of streamed LLM tokens into larger frames."""
+
+import asyncio
+from collections.abc import AsyncGenerator, AsyncIterator
+from typing import Any
+
+
+async def _next(iterator: AsyncIterator[Any]) -> Any:
+    return await anext(iterator)
+
+
+def _discard(task: "asyncio.Task[Any]") -> None:
+    """Mark a finished task's exception as retrieved."""
+    if task.done() and not task.cancelled():
+        task.exception()
+
+
+async def coalesce_tokens(
+    tokens: AsyncIterator[Any],
+    window: float,
+    max_bytes: int,
+) -> AsyncGenerator[Any, None]:
+    """Group a token stream into frames.
+
+    A frame opens with the first token that arrives and is emitted once ``window``
+    seconds have passed or it holds at least ``max_bytes`` of UTF-8 text, whichever
+    comes first. The first token is never delayed beyond the window, so perceived
+    latency stays the same while the number of messages drops sharply. The next
+    token is fetched in the background while a frame is being sent.
+
+    Items that are not strings (such as graph events) close the current frame and
+    are passed through unchanged, so ordering relative to tokens is preserved.
+
+    Args:
+        tokens: The source token stream
+        window: Maximum time in seconds to hold a frame open; 0 disables coalescing
+        max_bytes: Byte budget at which a frame is emitted early
+
+    Yields:
+        Concatenated token frames and pass-through items, in order
+    """
+    if window <= 0:
+        async for token in tokens:
+            yield token
+        return
+
+    loop = asyncio.get_running_loop()
+    pending: asyncio.Task[Any] | None = None
+
+    try:
+        while True:
+            # Wait as long as it takes for the token that opens the next frame
+            if pending is None:
+                pending = asyncio.ensure_future(_next(tokens))
+            try:
+                first = await pending
+            except StopAsyncIteration:
+                pending = None
+                return
+            pending = None
+
+            if not isinstance(first, str):
+                yield first
+                continue
+
+            parts = [first]
+            size = len(first.encode())
+            deadline = loop.time() + window
+            exhausted = False
+            barrier = None
+
+            while size < max_bytes:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+
+                pending = asyncio.ensure_future(_next(tokens))
+                done, _ = await asyncio.wait({pending}, timeout=remaining)
+                if not done:
+                    # Keep the in-flight fetch; it opens the next frame
+                    break
+
+                task, pending = pending, None
+                try:
+                    token = task.result()
+                except StopAsyncIteration:
+                    exhausted = True
+                    break
+                if not isinstance(token, str):
+                    barrier = token
+                    break
+                parts.append(token)
+                size += len(token.encode())
+
+            yield "".join(parts)
+            if barrier is not None:
+                yield barrier
+
+            if exhausted:
+                return
+    finally:
+        if pending is not None:
+            if not pending.done():
+                pending.cancel()
+                await asyncio.wait({pending})
+            _discard(pending)
+        aclose = getattr(tokens, "aclose", None)
+        if aclose is not None:
+            await aclose()
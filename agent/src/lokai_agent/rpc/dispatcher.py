@@ -0,0 +1,203 @@
+"""Concurrent dispatch of JSON-RPC requests."""
+
+import asyncio
+from collections import OrderedDict, deque
+from collections.abc import Callable, Coroutine
+from typing import Any
+
+import structlog
+
+logger = structlog.get_logger()
+
+# Methods that answer immediately and must never queue behind long-running work
+CONTROL_METHODS = frozenset({"ping", "cancel", "get_context", "get_metrics"})
+
+# Session used for requests that do not carry a session_id
+DEFAULT_SESSION = "default"
+
+# Client key for the single stdio peer
+LOCAL_CLIENT = "stdio"
+
+
+class FairLimiter:
+    """Concurrency limiter that hands free slots to waiting clients round-robin.
+
+    A plain semaphore admits waiters in arrival order, so one client that floods
+    requests delays everyone else. Here each client has its own queue and a freed
+    slot goes to the next client in turn.
+    """
+
+    def __init__(self, limit: int) -> None:
+        self._limit = max(1, limit)
+        self._active = 0
+        self._waiters: OrderedDict[str, deque[asyncio.Future[None]]] = OrderedDict()
+
+    @property
+    def waiting(self) -> int:
+        """Number of requests waiting for a slot."""
+        return sum(len(queue) for queue in self._waiters.values())
+
+    async def acquire(self, client: str) -> None:
+        """Wait for a slot on behalf of a client."""
+        if self._active < self._limit and not self._waiters:
+            self._active += 1
+            return
+
+        future: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+        self._waiters.setdefault(client, deque()).append(future)
+
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # The slot was handed over just as we were cancelled; pass it on
+                self.release()
+            else:
+                self._remove(client, future)
+            raise
+
+    def release(self) -> None:
+        """Free a slot, transferring it to the next waiting client if any."""
+        while self._waiters:
+            client, queue = next(iter(self._waiters.items()))
+            future = queue.popleft()
+
+            # Rotate so the next slot goes to a different client
+            if queue:
+                self._waiters.move_to_end(client)
+            else:
+                del self._waiters[client]
+
+            if not future.done():
+                future.set_result(None)
+                return
+
+        self._active -= 1
+
+    def _remove(self, client: str, future: asyncio.Future[None]) -> None:
+        queue = self._waiters.get(client)
+        if queue is None:
+            return
+        try:
+            queue.remove(future)
+        except ValueError:
+            return
+        if not queue:
+            del self._waiters[client]
+
+
+class RequestDispatcher:
+    """Runs each JSON-RPC request as its own asyncio task.
+
+    Control methods bypass all queuing. Other requests are admitted through a
+    bounded pool shared fairly between clients, and chained per session: requests
+    sharing a client and session run one after another in arrival order, while
+    different sessions proceed concurrently.
+    """
+
+    def __init__(
+        self,
+        handler: Callable[[Any], Coroutine[Any, Any, Any]],
+        max_concurrency: int = 4,
+    ) -> None:
+        self._handler = handler
+        self._limiter = FairLimiter(max_concurrency)
+        self._session_tails: dict[tuple[str, str], asyncio.Task[Any]] = {}
+        self._tasks: dict[asyncio.Task[Any], str] = {}
+        self._cancellable: dict[tuple[str, Any], asyncio.Task[Any]] = {}
+
+    def dispatch(self, request: Any, client: str = LOCAL_CLIENT) -> asyncio.Task[Any]:
+        """Schedule a request and return the task producing its response."""
+        if request.method in CONTROL_METHODS:
+            task = asyncio.create_task(self._handler(request))
+        else:
+            session = (client, self.session_of(request))
+            previous = self._session_tails.get(session)
+            task = asyncio.create_task(self._run_ordered(request, client, previous))
+            self._session_tails[session] = task
+            task.add_done_callback(lambda t: self._release_session(session, t))
+
+            key = (client, request.id)
+            self._cancellable[key] = task
+            task.add_done_callback(lambda t: self._release_key(key, t))
+
+        self._tasks[task] = client
+        task.add_done_callback(lambda t: self._tasks.pop(t, None))
+        return task
+
+    def cancel(self, client: str = LOCAL_CLIENT, request_id: Any | None = None) -> list[Any]:
+        """Cancel one of a client's in-flight requests, or all of them when no id is given.
+
+        Cancellation is delivered into the running task, so LLM streams, HTTP
+        requests and tool subprocesses awaiting inside it are torn down at once.
+
+        Returns:
+            The ids of the requests that were cancelled
+        """
+        if request_id is None:
+            targets = [(key, task) for key, task in self._cancellable.items() if key[0] == client]
+        elif (client, request_id) in self._cancellable:
+            targets = [((client, request_id), self._cancellable[(client, request_id)])]
+        else:
+            targets = []
+
+        cancelled = []
+        for (_, rid), task in targets:
+            if task.cancel():
+                cancelled.append(rid)
+
+        if cancelled:
+            logger.info("Requests cancelled", client=client, request_ids=cancelled)
+
+        return cancelled
+
+    @staticmethod
+    def session_of(request: Any) -> str:
+        """Get the ordering session a request belongs to."""
+        params = request.params or {}
+        return str(params.get("session_id") or DEFAULT_SESSION)
+
+    @property
+    def in_flight(self) -> int:
+        """Number of requests scheduled but not yet finished."""
+        return len(self._tasks)
+
+    @property
+    def waiting(self) -> int:
+        """Number of requests waiting for a free slot."""
+        return self._limiter.waiting
+
+    async def join(self, client: str | None = None) -> None:
+        """Wait for every scheduled request, or every request of one client, to finish."""
+        while True:
+            tasks = [t for t, c in self._tasks.items() if client is None or c == client]
+            if not tasks:
+                return
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _run_ordered(
+        self,
+        request: Any,
+        client: str,
+        previous: asyncio.Task[Any] | None,
+    ) -> Any:
+        """Run a request after its session predecessor, within the concurrency cap."""
+        if previous is not None and not previous.done():
+            # asyncio.wait never propagates our own cancellation to the predecessor
+            await asyncio.wait({previous})
+
+        await self._limiter.acquire(client)
+        try:
+            return await self._handler(request)
+        finally:
+            self._limiter.release()
+
+    def _release_key(self, key: tuple[str, Any], task: asyncio.Task[Any]) -> None:
+        """Stop tracking a finished request for cancellation."""
+        if self._cancellable.get(key) is task:
+            del self._cancellable[key]
+
+    def _release_session(self, session: tuple[str, str], task: asyncio.Task[Any]) -> None:
+        """Forget a session tail once its last request has finished."""
+        if self._session_tails.get(session) is task:
+            del self._session_tails[session]
@@ -0,0 +1,57 @@
+"""Fast JSON-RPC message serialization.
+
+Outgoing messages are encoded straight to bytes with orjson. The hot message types
+(streaming tokens, completions and events) are built as plain dicts, skipping
+pydantic model construction.
+"""
+
+from typing import Any
+
+import orjson
+
+loads = orjson.loads
+JSONDecodeError = orjson.JSONDecodeError
+
+
+def _default(obj: Any) -> Any:
+    """Serialize objects orjson doesn't handle natively."""
+    if hasattr(obj, "model_dump"):
+        return obj.model_dump()
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(message: Any) -> bytes:
+    """Encode a JSON-RPC message to bytes."""
+    return orjson.dumps(message, default=_default)
+
+
+def encode_result(request_id: Any, result: Any) -> bytes:
+    """Encode a successful response."""
+    return orjson.dumps({"jsonrpc": "2.0", "id": request_id, "result": result}, default=_default)
+
+
+def encode_error(request_id: Any, code: int, message: str) -> bytes:
+    """Encode an error response."""
+    return orjson.dumps(
+        {"jsonrpc": "2.0", "id": request_id, "error": {"code": code, "message": message}}
+    )
+
+
+def encode_token(request_id: Any, token: str) -> bytes:
+    """Encode a streaming token message."""
+    return orjson.dumps({"jsonrpc": "2.0", "id": request_id, "streaming": True, "token": token})
+
+
+def encode_complete(request_id: Any, result: str) -> bytes:
+    """Encode a streaming completion message."""
+    return orjson.dumps({"jsonrpc": "2.0", "id": request_id, "complete": True, "result": result})
+
+
+def encode_event(request_id: Any, event: str, **fields: Any) -> bytes:
+    """Encode a streaming progress event, such as a graph node transition."""
+    return orjson.dumps(
+        {"jsonrpc": "2.0", "id": request_id, "streaming": True, "event": event, **fields},
+        default=_default,
+    )
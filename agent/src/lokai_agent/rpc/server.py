@@ -0,0 +1,87 @@
+"""Unix domain socket server so many clients can share one warm agent."""
+
+import asyncio
+import itertools
+import os
+import stat
+from collections.abc import Awaitable, Callable
+
+import structlog
+
+from lokai_agent.rpc.transport import MessageTransport
+
+logger = structlog.get_logger()
+
+ConnectionHandler = Callable[[MessageTransport, str], Awaitable[None]]
+
+
+def _remove_stale_socket(path: str) -> None:
+    """Remove a socket file left behind by a previous run."""
+    try:
+        mode = os.lstat(path).st_mode
+    except FileNotFoundError:
+        return
+
+    if not stat.S_ISSOCK(mode):
+        raise FileExistsError(f"Refusing to replace non-socket file: {path}")
+
+    os.unlink(path)
+
+
+async def serve_unix_socket(
+    path: str,
+    handle_connection: ConnectionHandler,
+    framing: str = "auto",
+    max_message_bytes: int = 64 * 1024 * 1024,
+) -> None:
+    """Accept JSON-RPC clients on a Unix socket until cancelled.
+
+    Every connection gets its own MessageTransport and a unique client key, and is
+    served by ``handle_connection`` concurrently with all other connections. The
+    socket is created with owner-only permissions since clients can run tools.
+
+    Args:
+        path: Filesystem path of the socket
+        handle_connection: Coroutine serving one connection until it closes
+        framing: Message framing, as for the stdio transport
+        max_message_bytes: Largest accepted message
+    """
+    client_ids = itertools.count(1)
+
+    async def on_connect(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        client = f"socket-{next(client_ids)}"
+        logger.info("Client connected", client=client)
+        transport = MessageTransport(
+            reader, writer, framing=framing, max_message_bytes=max_message_bytes
+        )
+        try:
+            await handle_connection(transport, client)
+        except Exception:
+            logger.exception("Error serving client", client=client)
+        finally:
+            try:
+                await transport.close()
+            except (ConnectionError, OSError):
+                pass
+            logger.info("Client disconnected", client=client)
+
+    path = os.path.expanduser(path)
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    _remove_stale_socket(path)
+
+    # Create the socket owner-only from the start, without a chmod race
+    previous_umask = os.umask(0o177)
+    try:
+        server = await asyncio.start_unix_server(on_connect, path=path, limit=max_message_bytes)
+    finally:
+        os.umask(previous_umask)
+    logger.info("Listening on Unix socket", path=path)
+
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
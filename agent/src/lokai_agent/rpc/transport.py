@@ -0,0 +1,201 @@
+"""Asyncio stdio transport with newline or Content-Length framing."""
+
+import asyncio
+import os
+import stat
+import sys
+import threading
+from typing import Any, BinaryIO, Protocol
+
+import structlog
+
+logger = structlog.get_logger()
+
+FRAMING_MODES = ("auto", "newline", "content-length")
+
+_CONTENT_LENGTH = b"content-length:"
+
+
+class FramingError(ValueError):
+    """Raised when an incoming message is not correctly framed."""
+
+
+class MessageWriter(Protocol):
+    """The subset of asyncio.StreamWriter used by the transport."""
+
+    def write(self, data: bytes) -> None: ...
+
+    async def drain(self) -> None: ...
+
+    def close(self) -> None: ...
+
+
+class MessageTransport:
+    """Reads and writes framed JSON-RPC messages over asyncio streams.
+
+    Supported framings:
+        newline: one JSON document per line
+        content-length: LSP-style ``Content-Length: N`` headers followed by N bytes
+        auto: detect per message; replies switch to Content-Length framing once the
+            peer has used it
+    """
+
+    def __init__(
+        self,
+        reader: asyncio.StreamReader,
+        writer: MessageWriter,
+        framing: str = "auto",
+        max_message_bytes: int = 64 * 1024 * 1024,
+    ) -> None:
+        if framing not in FRAMING_MODES:
+            raise ValueError(f"Unknown framing mode: {framing}")
+
+        self._reader = reader
+        self._writer = writer
+        self._framing = framing
+        self._max_message_bytes = max_message_bytes
+        self._header_framed = framing == "content-length"
+
+    async def read_message(self) -> bytes | None:
+        """Read the next message body, or None at end of input."""
+        while True:
+            try:
+                line = await self._reader.readline()
+            except ValueError as e:
+                # StreamReader raises ValueError when a line exceeds its limit
+                raise FramingError(f"Message exceeds {self._max_message_bytes} bytes") from e
+
+            if not line:
+                return None
+
+            stripped = line.strip()
+            if not stripped:
+                continue
+
+            if self._framing != "newline" and stripped[: len(_CONTENT_LENGTH)].lower() == _CONTENT_LENGTH:
+                length = await self._read_headers(stripped)
+                # readexactly() collects the body incrementally as chunks arrive
+                body = await self._reader.readexactly(length)
+                self._header_framed = True
+                return body
+
+            if self._framing == "content-length":
+                raise FramingError("Expected a Content-Length header")
+
+            return stripped
+
+    async def _read_headers(self, first_line: bytes) -> int:
+        """Parse a Content-Length header block and return the body length."""
+        try:
+            length = int(first_line[len(_CONTENT_LENGTH):].strip())
+        except ValueError as e:
+            raise FramingError(f"Invalid Content-Length header: {first_line!r}") from e
+
+        if length < 0 or length > self._max_message_bytes:
+            raise FramingError(f"Content-Length out of range: {length}")
+
+        # Skip any remaining headers (e.g. Content-Type) up to the blank line
+        while True:
+            header = await self._reader.readline()
+            if not header:
+                raise FramingError("Unexpected end of input in message headers")
+            if not header.strip():
+                return length
+
+    def write_message(self, payload: bytes) -> None:
+        """Write one message body using the negotiated framing."""
+        if self._header_framed:
+            self._writer.write(b"Content-Length: %d\r\n\r\n" % len(payload) + payload)
+        else:
+            self._writer.write(payload + b"\n")
+
+    async def drain(self) -> None:
+        """Wait until the peer has consumed buffered output."""
+        await self._writer.drain()
+
+    async def close(self) -> None:
+        """Flush and close the output side."""
+        try:
+            await self._writer.drain()
+        finally:
+            self._writer.close()
+
+
+class _BlockingWriter:
+    """Writer over a regular file or terminal, where pipe transports can't be used."""
+
+    def __init__(self, stream: BinaryIO) -> None:
+        self._stream = stream
+
+    def write(self, data: bytes) -> None:
+        self._stream.write(data)
+        self._stream.flush()
+
+    async def drain(self) -> None:
+        return None
+
+    def close(self) -> None:
+        self._stream.flush()
+
+
+def _is_pipe_or_socket(fd: int) -> bool:
+    """Check whether a file descriptor can back an asyncio pipe transport."""
+    try:
+        mode = os.fstat(fd).st_mode
+    except OSError:
+        return False
+    return stat.S_ISFIFO(mode) or stat.S_ISSOCK(mode)
+
+
+def _feed_from_thread(
+    loop: asyncio.AbstractEventLoop,
+    reader: asyncio.StreamReader,
+    stream: BinaryIO,
+) -> None:
+    """Feed a StreamReader from a blocking stream on a daemon thread."""
+
+    def pump() -> None:
+        try:
+            while chunk := stream.read1(65536):  # type: ignore[attr-defined]
+                loop.call_soon_threadsafe(reader.feed_data, chunk)
+        except RuntimeError:
+            # Event loop closed underneath us
+            return
+        finally:
+            try:
+                loop.call_soon_threadsafe(reader.feed_eof)
+            except RuntimeError:
+                pass
+
+    threading.Thread(target=pump, name="lokai-stdin", daemon=True).start()
+
+
+async def open_stdio_transport(
+    framing: str = "auto",
+    max_message_bytes: int = 64 * 1024 * 1024,
+) -> MessageTransport:
+    """Open a message transport over this process's stdin and stdout.
+
+    Pipes and sockets (the normal case when spawned by the desktop app) are wired
+    straight into the event loop. Terminals and regular files, which asyncio pipe
+    transports don't support, fall back to a reader thread and blocking writes.
+    """
+    loop = asyncio.get_running_loop()
+    reader = asyncio.StreamReader(limit=max_message_bytes)
+
+    if _is_pipe_or_socket(sys.stdin.fileno()):
+        await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), sys.stdin)
+    else:
+        _feed_from_thread(loop, reader, sys.stdin.buffer)
+
+    writer: Any
+    if _is_pipe_or_socket(sys.stdout.fileno()):
+        transport, protocol = await loop.connect_write_pipe(
+            asyncio.streams.FlowControlMixin, sys.stdout
+        )
+        writer = asyncio.StreamWriter(transport, protocol, None, loop)
+    else:
+        writer = _BlockingWriter(sys.stdout.buffer)
+
+    logger.debug("Stdio transport opened", framing=framing)
+    return MessageTransport(reader, writer, framing=framing, max_message_bytes=max_message_bytes)
@@ -0,0 +1,190 @@
+"""Asynchronous, backpressured writer for outbound JSON-RPC messages."""
+
+import asyncio
+from collections import deque
+from typing import Any
+
+import structlog
+
+from lokai_agent.rpc import serializer
+from lokai_agent.rpc.transport import MessageTransport
+
+logger = structlog.get_logger()
+
+TOKEN_OVERFLOW_POLICIES = ("merge", "drop", "block")
+
+# Messages written between drains of the underlying transport
+_WRITE_BATCH = 64
+
+
+class _Entry:
+    """A queued message; streaming tokens stay unencoded so they can be merged."""
+
+    __slots__ = ("request_id", "token", "payload")
+
+    def __init__(self, request_id: Any, token: str | None, payload: bytes | None) -> None:
+        self.request_id = request_id
+        self.token = token
+        self.payload = payload
+
+
+class MessageWriter:
+    """Writes messages to a transport from a dedicated task fed by a bounded queue.
+
+    Producers never block the event loop on a slow reader. Once the queue holds
+    ``max_pending`` messages, send() waits for space (backpressure). Streaming
+    tokens are handled by the overflow policy instead:
+
+        merge: append the token to the request's token frame still waiting in the
+            queue, so no text is lost and the queue doesn't grow
+        drop: discard the token; the completion message still carries the full text
+        block: wait for space like any other message
+
+    Final responses go through send_nowait(), which is never refused, so callers
+    in synchronous callbacks can always deliver them.
+    """
+
+    def __init__(
+        self,
+        transport: MessageTransport,
+        max_pending: int = 256,
+        token_overflow: str = "merge",
+    ) -> None:
+        if token_overflow not in TOKEN_OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown token overflow policy: {token_overflow}")
+
+        self._transport = transport
+        self._max_pending = max(1, max_pending)
+        self._token_overflow = token_overflow
+        self._queue: deque[_Entry] = deque()
+        self._open_tokens: dict[Any, _Entry] = {}
+        self._not_empty = asyncio.Event()
+        self._has_space = asyncio.Event()
+        self._has_space.set()
+        self._closing = False
+        self._broken = False
+        self._task: asyncio.Task[None] | None = None
+
+        self._high_water = 0
+        self._merged = 0
+        self._dropped = 0
+
+    def start(self) -> None:
+        """Start the writer task."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    @property
+    def depth(self) -> int:
+        """Number of messages waiting to be written."""
+        return len(self._queue)
+
+    def stats(self) -> dict[str, Any]:
+        """Queue statistics for diagnostics."""
+        return {
+            "depth": len(self._queue),
+            "max_pending": self._max_pending,
+            "high_water": self._high_water,
+            "merged_tokens": self._merged,
+            "dropped_tokens": self._dropped,
+        }
+
+    async def send(self, payload: bytes, request_id: Any = None) -> None:
+        """Queue an encoded message, waiting while the queue is full.
+
+        Args:
+            payload: The encoded message
+            request_id: Request the message belongs to, if any. Tokens of that
+                request sent afterwards are never merged into earlier frames.
+        """
+        await self._wait_for_space()
+        self._enqueue(_Entry(request_id, None, payload))
+
+    def send_nowait(self, payload: bytes, request_id: Any = None) -> None:
+        """Queue an encoded message immediately, regardless of the bound.
+
+        Args:
+            payload: The encoded message
+            request_id: Request the message belongs to, if any (see send())
+        """
+        self._enqueue(_Entry(request_id, None, payload))
+
+    async def send_token(self, request_id: Any, token: str) -> None:
+        """Queue a streaming token, applying the overflow policy when full."""
+        if len(self._queue) >= self._max_pending and self._token_overflow != "block":
+            if self._token_overflow == "drop":
+                self._dropped += 1
+                return
+
+            entry = self._open_tokens.get(request_id)
+            if entry is not None:
+                entry.token = (entry.token or "") + token
+                self._merged += 1
+                return
+
+        await self._wait_for_space()
+
+        entry = _Entry(request_id, token, None)
+        self._enqueue(entry)
+        self._open_tokens[request_id] = entry
+
+    async def close(self) -> None:
+        """Flush queued messages, stop the writer task and close the transport."""
+        self._closing = True
+        self._not_empty.set()
+        if self._task is not None:
+            await asyncio.gather(self._task, return_exceptions=True)
+
+        try:
+            await self._transport.close()
+        except (ConnectionError, OSError):
+            pass
+
+    async def _wait_for_space(self) -> None:
+        while len(self._queue) >= self._max_pending and not self._broken:
+            self._has_space.clear()
+            await self._has_space.wait()
+
+    def _enqueue(self, entry: _Entry) -> None:
+        if self._broken:
+            return
+
+        # Any other message for this request closes its mergeable token frame
+        if entry.token is None and entry.request_id is not None:
+            self._open_tokens.pop(entry.request_id, None)
+
+        self._queue.append(entry)
+        self._high_water = max(self._high_water, len(self._queue))
+        self._not_empty.set()
+
+    def _encode(self, entry: _Entry) -> bytes:
+        if entry.token is not None:
+            if self._open_tokens.get(entry.request_id) is entry:
+                del self._open_tokens[entry.request_id]
+            return serializer.encode_token(entry.request_id, entry.token)
+        return entry.payload or b""
+
+    async def _run(self) -> None:
+        """Write queued messages, draining the transport to respect the reader's pace."""
+        try:
+            while True:
+                if not self._queue:
+                    if self._closing:
+                        return
+                    self._not_empty.clear()
+                    await self._not_empty.wait()
+                    continue
+
+                for _ in range(min(_WRITE_BATCH, len(self._queue))):
+                    self._transport.write_message(self._encode(self._queue.popleft()))
+
+                if len(self._queue) < self._max_pending:
+                    self._has_space.set()
+
+                await self._transport.drain()
+        except (ConnectionError, OSError) as e:
+            logger.warning("Client stopped reading, dropping output", error=str(e))
+            self._broken = True
+            self._queue.clear()
+            self._open_tokens.clear()
+            self._has_space.set()
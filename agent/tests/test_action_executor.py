@@ -0,0 +1,99 @@
+"""Tests for scheduling planned steps and running their tools."""
+
+import asyncio
+import os
+import subprocess
+from pathlib import Path
+from typing import Any
+
+from lokai_agent.graph.nodes.action_executor import execute_tool, plan_dependencies
+
+
+def step(
+    tool: str,
+    risk: str = "low",
+    depends_on: list[int] | None = None,
+    **params: Any,
+) -> dict[str, Any]:
+    return {"tool": tool, "parameters": params, "risk_level": risk, "depends_on": depends_on}
+
+
+def test_independent_reads_run_together() -> None:
+    steps = [
+        step("filesystem_read", path="/tmp/a"),
+        step("filesystem_read", path="/tmp/a"),
+        step("filesystem_list", path="/tmp"),
+    ]
+    assert plan_dependencies(steps) == [set(), set(), set()]
+
+
+def test_writes_wait_for_overlapping_paths() -> None:
+    steps = [
+        step("filesystem_write", path="/tmp/dir/file"),
+        step("filesystem_read", path="/tmp/dir/file"),
+        step("filesystem_list", path="/tmp/dir"),
+        step("filesystem_write", path="/tmp/other"),
+    ]
+    assert plan_dependencies(steps) == [set(), {0}, {0}, set()]
+
+
+def test_declared_dependencies_only_count_earlier_steps() -> None:
+    steps = [
+        {**step("filesystem_read", path="/a", depends_on=[2]), "step_number": 1},
+        {**step("filesystem_read", path="/b", depends_on=[1]), "step_number": 2},
+    ]
+    assert plan_dependencies(steps) == [set(), {0}]
+
+
+def test_side_effects_on_unknown_paths_are_barriers() -> None:
+    steps = [
+        step("filesystem_read", path="/a"),
+        step("terminal_command", command="make"),
+        step("filesystem_read", path="/b"),
+    ]
+    assert plan_dependencies(steps) == [set(), {0}, {1}]
+
+
+def test_risky_steps_come_before_later_side_effects() -> None:
+    steps = [
+        step("filesystem_write", risk="medium", path="/a"),
+        step("filesystem_write", risk="medium", path="/b"),
+        step("filesystem_read", path="/c"),
+    ]
+    assert plan_dependencies(steps) == [set(), {0}, set()]
+
+
+def test_read_without_path_reads_the_current_directory() -> None:
+    steps = [
+        step("filesystem_list"),
+        step("filesystem_write", path=os.path.join(os.getcwd(), "new.txt")),
+    ]
+    assert plan_dependencies(steps) == [set(), {0}]
+
+
+def live_processes_in_group(pgid: int) -> list[str]:
+    ps = subprocess.run(["ps", "-eo", "pgid=,pid=,stat="], capture_output=True, text=True)
+    return [
+        line
+        for line in ps.stdout.splitlines()
+        if int(line.split()[0]) == pgid and not line.split()[2].startswith("Z")
+    ]
+
+
+async def test_cancelled_command_kills_everything_it_started(tmp_path: Path) -> None:
+    pid_file = tmp_path / "pid"
+    command = f"echo $$ > {pid_file}; sleep 300 & sleep 300 | sleep 300"
+    task = asyncio.create_task(execute_tool("terminal_execute", {"command": command}))
+
+    for _ in range(100):
+        if pid_file.exists() and pid_file.read_text().strip():
+            break
+        await asyncio.sleep(0.05)
+    pgid = int(pid_file.read_text())
+    assert live_processes_in_group(pgid)
+
+    task.cancel()
+    # Children left holding the output pipes would keep the cancelled step waiting
+    await asyncio.wait_for(asyncio.gather(task, return_exceptions=True), timeout=10)
+
+    assert live_processes_in_group(pgid) == []
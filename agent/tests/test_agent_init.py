@@ -0,0 +1,49 @@
+"""Tests for background agent initialization."""
+
+import pytest
+
+from lokai_agent.config import settings
+from lokai_agent.main import LokaiAgent
+
+
+class FlakyInit:
+    """Initialization that fails a given number of times before succeeding."""
+
+    def __init__(self, failures: int) -> None:
+        self.failures = failures
+        self.attempts = 0
+
+    async def __call__(self) -> None:
+        self.attempts += 1
+        if self.attempts <= self.failures:
+            raise ConnectionError(f"attempt {self.attempts} failed")
+
+
+@pytest.fixture(autouse=True)
+def fast_retries(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(settings, "agent_init_attempts", 3)
+    monkeypatch.setattr(settings, "agent_init_retry_delay", 0.0)
+
+
+async def test_initialization_is_retried_after_a_failure(monkeypatch: pytest.MonkeyPatch) -> None:
+    agent = LokaiAgent()
+    init = FlakyInit(failures=2)
+    monkeypatch.setattr(agent, "_initialize_once", init)
+
+    await agent.wait_ready()
+
+    assert init.attempts == 3
+    assert agent.readiness == "ready"
+    assert agent._init_error is None
+
+
+async def test_initialization_fails_once_attempts_run_out(monkeypatch: pytest.MonkeyPatch) -> None:
+    agent = LokaiAgent()
+    init = FlakyInit(failures=3)
+    monkeypatch.setattr(agent, "_initialize_once", init)
+
+    with pytest.raises(RuntimeError, match="attempt 3 failed"):
+        await agent.wait_ready()
+
+    assert init.attempts == 3
+    assert agent.readiness == "failed"
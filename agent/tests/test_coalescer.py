@@ -0,0 +1,57 @@
+"""Tests for coalescing streamed tokens into frames."""
+
+import asyncio
+from collections.abc import AsyncGenerator
+from typing import Any
+
+from lokai_agent.rpc.coalescer import coalesce_tokens
+
+
+async def timed(items: list[tuple[float, Any]]) -> AsyncGenerator[Any, None]:
+    """Yield each item after its delay in seconds."""
+    for delay, item in items:
+        await asyncio.sleep(delay)
+        yield item
+
+
+async def collect(frames: AsyncGenerator[Any, None]) -> list[Any]:
+    return [frame async for frame in frames]
+
+
+async def test_tokens_within_the_window_share_a_frame() -> None:
+    source = timed([(0, "a"), (0, "b"), (0, "c"), (0.1, "d")])
+    assert await collect(coalesce_tokens(source, window=0.05, max_bytes=1024)) == ["abc", "d"]
+
+
+async def test_frame_is_emitted_at_the_byte_budget() -> None:
+    source = timed([(0, "aa"), (0, "bb"), (0, "cc")])
+    assert await collect(coalesce_tokens(source, window=1, max_bytes=4)) == ["aabb", "cc"]
+
+
+async def test_other_items_close_the_frame_in_order() -> None:
+    event = {"type": "node", "node": "response_generator"}
+    source = timed([(0, "a"), (0, event), (0, "b")])
+    assert await collect(coalesce_tokens(source, window=1, max_bytes=1024)) == ["a", event, "b"]
+
+
+async def test_zero_window_passes_tokens_through() -> None:
+    source = timed([(0, "a"), (0, "b")])
+    assert await collect(coalesce_tokens(source, window=0, max_bytes=1024)) == ["a", "b"]
+
+
+async def test_closing_early_closes_the_source() -> None:
+    closed = asyncio.Event()
+
+    async def source() -> AsyncGenerator[str, None]:
+        try:
+            yield "a"
+            await asyncio.sleep(10)
+            yield "b"
+        finally:
+            closed.set()
+
+    frames = coalesce_tokens(source(), window=0.01, max_bytes=1024)
+    assert await anext(frames) == "a"
+    await frames.aclose()
+
+    assert closed.is_set()
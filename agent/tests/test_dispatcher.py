@@ -0,0 +1,182 @@
+"""Tests for concurrent JSON-RPC request dispatch."""
+
+import asyncio
+from types import SimpleNamespace
+from typing import Any
+
+import pytest
+
+from lokai_agent.rpc.dispatcher import FairLimiter, RequestDispatcher
+
+
+def request(request_id: int, method: str = "process_message", **params: Any) -> Any:
+    return SimpleNamespace(id=request_id, method=method, params=params)
+
+
+class Recorder:
+    """Handler that records when requests start and finish and waits on demand."""
+
+    def __init__(self) -> None:
+        self.events: list[tuple[str, int]] = []
+        self.gates: dict[int, asyncio.Event] = {}
+
+    def hold(self, request_id: int) -> asyncio.Event:
+        self.gates[request_id] = asyncio.Event()
+        return self.gates[request_id]
+
+    async def __call__(self, req: Any) -> int:
+        self.events.append(("start", req.id))
+        try:
+            if req.id in self.gates:
+                await self.gates[req.id].wait()
+        finally:
+            self.events.append(("end", req.id))
+        return int(req.id)
+
+
+async def test_requests_of_a_session_run_in_order() -> None:
+    handler = Recorder()
+    gate = handler.hold(1)
+    dispatcher = RequestDispatcher(handler)
+
+    first = dispatcher.dispatch(request(1, session_id="s"))
+    second = dispatcher.dispatch(request(2, session_id="s"))
+    await asyncio.sleep(0.01)
+    assert handler.events == [("start", 1)]
+
+    gate.set()
+    assert await asyncio.gather(first, second) == [1, 2]
+    assert handler.events == [("start", 1), ("end", 1), ("start", 2), ("end", 2)]
+
+
+async def test_sessions_run_concurrently() -> None:
+    handler = Recorder()
+    gate = handler.hold(1)
+    dispatcher = RequestDispatcher(handler)
+
+    first = dispatcher.dispatch(request(1, session_id="a"))
+    second = dispatcher.dispatch(request(2, session_id="b"))
+    assert await second == 2
+    assert not first.done()
+
+    gate.set()
+    await dispatcher.join()
+    assert dispatcher.in_flight == 0
+
+
+async def test_control_methods_bypass_the_concurrency_cap() -> None:
+    handler = Recorder()
+    gate = handler.hold(1)
+    dispatcher = RequestDispatcher(handler, max_concurrency=1)
+
+    dispatcher.dispatch(request(1, session_id="a"))
+    queued = dispatcher.dispatch(request(2, session_id="b"))
+    await asyncio.sleep(0.01)
+    assert dispatcher.waiting == 1
+
+    assert await dispatcher.dispatch(request(3, method="ping")) == 3
+    assert not queued.done()
+
+    gate.set()
+    await dispatcher.join()
+
+
+async def test_cancel_stops_a_request_and_the_session_continues() -> None:
+    handler = Recorder()
+    handler.hold(1)
+    dispatcher = RequestDispatcher(handler)
+
+    first = dispatcher.dispatch(request(1))
+    second = dispatcher.dispatch(request(2))
+    await asyncio.sleep(0.01)
+
+    assert dispatcher.cancel(request_id=1) == [1]
+    with pytest.raises(asyncio.CancelledError):
+        await first
+    assert await second == 2
+    assert ("end", 1) in handler.events
+
+
+async def test_cancel_without_id_cancels_everything() -> None:
+    handler = Recorder()
+    handler.hold(1)
+    handler.hold(2)
+    dispatcher = RequestDispatcher(handler)
+
+    first = dispatcher.dispatch(request(1, session_id="a"))
+    second = dispatcher.dispatch(request(2, session_id="b"))
+    await asyncio.sleep(0.01)
+
+    assert sorted(dispatcher.cancel()) == [1, 2]
+    await dispatcher.join()
+    assert first.cancelled() and second.cancelled()
+
+
+async def test_same_session_id_of_other_clients_is_not_ordered() -> None:
+    handler = Recorder()
+    gate = handler.hold(1)
+    dispatcher = RequestDispatcher(handler)
+
+    dispatcher.dispatch(request(1, session_id="s"), client="a")
+    assert await dispatcher.dispatch(request(2, session_id="s"), client="b") == 2
+
+    gate.set()
+    await dispatcher.join()
+
+
+async def test_cancel_all_of_a_client() -> None:
+    handler = Recorder()
+    handler.hold(1)
+    handler.hold(2)
+    dispatcher = RequestDispatcher(handler)
+
+    dispatcher.dispatch(request(1, session_id="a"), client="x")
+    dispatcher.dispatch(request(2, session_id="b"), client="x")
+    other = dispatcher.dispatch(request(3), client="y")
+    await asyncio.sleep(0.01)
+
+    assert sorted(dispatcher.cancel("x")) == [1, 2]
+    assert await other == 3
+    await dispatcher.join()
+
+
+async def test_fair_limiter_alternates_between_clients() -> None:
+    limiter = FairLimiter(1)
+    await limiter.acquire("a")
+
+    order: list[str] = []
+
+    async def worker(client: str, name: str) -> None:
+        await limiter.acquire(client)
+        order.append(name)
+        limiter.release()
+
+    tasks = [
+        asyncio.create_task(worker("a", "a1")),
+        asyncio.create_task(worker("a", "a2")),
+        asyncio.create_task(worker("a", "a3")),
+        asyncio.create_task(worker("b", "b1")),
+    ]
+    await asyncio.sleep(0)
+    assert limiter.waiting == 4
+
+    limiter.release()
+    await asyncio.gather(*tasks)
+    assert order == ["a1", "b1", "a2", "a3"]
+
+
+async def test_fair_limiter_cancelled_waiter_gives_up_its_place() -> None:
+    limiter = FairLimiter(1)
+    await limiter.acquire("a")
+
+    cancelled = asyncio.create_task(limiter.acquire("b"))
+    waiting = asyncio.create_task(limiter.acquire("c"))
+    await asyncio.sleep(0)
+    cancelled.cancel()
+    await asyncio.gather(cancelled, return_exceptions=True)
+    assert limiter.waiting == 1
+
+    limiter.release()
+    await waiting
+    limiter.release()
+    assert limiter.waiting == 0
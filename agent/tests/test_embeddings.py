@@ -0,0 +1,50 @@
+"""Tests for Ollama embedding requests."""
+
+import json
+
+import httpx
+
+from lokai_agent.llm.ollama_client import OllamaClient
+
+
+def client_for(server_has_batch_endpoint: bool) -> tuple[OllamaClient, list[str]]:
+    paths: list[str] = []
+
+    def handle(request: httpx.Request) -> httpx.Response:
+        paths.append(request.url.path)
+        body = json.loads(request.content)
+        if request.url.path == "/api/embed":
+            if not server_has_batch_endpoint:
+                return httpx.Response(404, text="404 page not found")
+            return httpx.Response(200, json={"embeddings": [[0.6, 0.8] for _ in body["input"]]})
+        return httpx.Response(200, json={"embedding": [3.0, 4.0]})
+
+    client = OllamaClient()
+    client._client = httpx.AsyncClient(
+        transport=httpx.MockTransport(handle), base_url="http://ollama"
+    )
+    return client, paths
+
+
+async def test_both_endpoints_return_unit_vectors() -> None:
+    for batch in (True, False):
+        client, paths = client_for(server_has_batch_endpoint=batch)
+        try:
+            embeddings = await client.embed_batch(["a", "b", "a"])
+        finally:
+            await client.close()
+
+        assert embeddings == [[0.6, 0.8]] * 3
+        assert paths[-1] == ("/api/embed" if batch else "/api/embeddings")
+
+
+async def test_fallback_vectors_are_cached_normalized() -> None:
+    client, paths = client_for(server_has_batch_endpoint=False)
+    try:
+        await client.embed("a")
+        requests = len(paths)
+        assert await client.embed("a") == [0.6, 0.8]
+    finally:
+        await client.close()
+
+    assert len(paths) == requests
@@ -0,0 +1,50 @@
+"""Tests for provider circuit breakers."""
+
+from lokai_agent.llm.health import CLOSED, HALF_OPEN, OPEN, CircuitBreaker
+
+
+def open_breaker() -> CircuitBreaker:
+    breaker = CircuitBreaker("test", failure_threshold=2, reset_timeout=60.0)
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    return breaker
+
+
+def test_failed_probe_opens_the_breaker() -> None:
+    breaker = CircuitBreaker("test")
+    breaker.record_probe(False)
+    assert breaker.state == OPEN
+    assert not breaker.allow()
+
+
+def test_healthy_probe_only_allows_a_trial() -> None:
+    breaker = open_breaker()
+    breaker.record_probe(True)
+
+    assert breaker.state == HALF_OPEN
+    assert breaker.allow()
+    assert not breaker.allow()
+
+    breaker.record_success(0.1)
+    assert breaker.state == CLOSED
+
+
+def test_failed_trial_after_a_healthy_probe_reopens() -> None:
+    breaker = open_breaker()
+    breaker.record_probe(True)
+    # Further healthy probes don't close the breaker before the trial ends
+    breaker.record_probe(True)
+    assert breaker.state == HALF_OPEN
+
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == OPEN
+
+
+def test_healthy_probe_leaves_a_closed_breaker_alone() -> None:
+    breaker = CircuitBreaker("test")
+    breaker.record_probe(True)
+    assert breaker.state == CLOSED
+    assert breaker.allow()
+    assert breaker.allow()
@@ -0,0 +1,73 @@
+"""Tests for hedged LLM requests."""
+
+import asyncio
+from collections.abc import AsyncGenerator
+from typing import Any
+
+import pytest
+
+from lokai_agent.config import settings
+from lokai_agent.llm.router import LLMRouter
+
+
+@pytest.fixture
+async def router(monkeypatch: pytest.MonkeyPatch) -> AsyncGenerator[LLMRouter, None]:
+    monkeypatch.setattr(settings, "llm_cache_enabled", False)
+    monkeypatch.setattr(settings, "llm_hedge_adaptive", True)
+    monkeypatch.setattr(settings, "llm_hedge_min_samples", 3)
+    monkeypatch.setattr(settings, "llm_hedge_min_ms", 10)
+    router = LLMRouter()
+    router._primary_available = router._fallback_available = True
+    yield router
+    await router.close()
+
+
+def answer(delay: float, text: str, calls: list[str]) -> Any:
+    async def stream(prompt: str, *args: Any, **kwargs: Any) -> AsyncGenerator[str, None]:
+        calls.append(prompt)
+        await asyncio.sleep(delay)
+        yield text
+
+    return stream
+
+
+def test_deadline_waits_for_samples_of_the_same_model(router: LLMRouter) -> None:
+    router._first_token_times["small"].extend([0.1, 0.1, 0.1])
+    router._first_token_times["large"].extend([2.0, 2.0])
+
+    assert router.hedge_deadline("small") == pytest.approx(0.1)
+    assert router.hedge_deadline("large") is None
+    assert router.hedge_deadline("unseen") is None
+
+
+async def test_model_without_samples_is_not_hedged(
+    router: LLMRouter, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    ollama: list[str] = []
+    openai: list[str] = []
+    monkeypatch.setattr(router.ollama, "stream", answer(0.1, "slow", ollama))
+    monkeypatch.setattr(router.openai, "stream", answer(0.0, "fast", openai))
+    # Another model's fast samples don't make this one hedge
+    router._first_token_times["other"].extend([0.01, 0.01, 0.01])
+
+    tokens = [token async for token in router.stream("hi", hedge=True)]
+
+    assert tokens == ["slow"]
+    assert openai == []
+    assert router.hedge_stats()["fired"] == 0
+    assert len(router._first_token_times[router.ollama.model]) == 1
+
+
+async def test_model_with_samples_is_hedged(
+    router: LLMRouter, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    ollama: list[str] = []
+    openai: list[str] = []
+    monkeypatch.setattr(router.ollama, "stream", answer(1.0, "slow", ollama))
+    monkeypatch.setattr(router.openai, "stream", answer(0.0, "fast", openai))
+    router._first_token_times[router.ollama.model].extend([0.01, 0.01, 0.01])
+
+    tokens = [token async for token in router.stream("hi", hedge=True)]
+
+    assert tokens == ["fast"]
+    assert router.hedge_stats()["won"] == 1
@@ -0,0 +1,70 @@
+"""Tests for the fused intent classification and planning node."""
+
+from typing import Any
+
+from lokai_agent.graph.nodes.intent_planner import intent_planner
+from lokai_agent.graph.state import Intent
+
+
+def classification(confidence: float) -> dict[str, Any]:
+    return {
+        "intent": "FILE_OPERATION",
+        "confidence": confidence,
+        "risk_level": "low",
+        "requires_approval": False,
+        "entities": {"path": "/tmp"},
+        "explanation": "Lists a directory",
+    }
+
+
+class FakeRouter:
+    """Router whose generate_json returns queued results in order."""
+
+    def __init__(self, *results: dict[str, Any]) -> None:
+        self.results = list(results)
+        self.calls = 0
+
+    async def generate_json(self, *args: Any, **kwargs: Any) -> dict[str, Any]:
+        self.calls += 1
+        return self.results.pop(0)
+
+
+class FakeIndex:
+    """Intent index that never matches and records what it is taught."""
+
+    def __init__(self) -> None:
+        self.learned: list[tuple[str, Intent]] = []
+
+    async def classify(self, message: str) -> Intent | None:
+        return None
+
+    async def learn(self, message: str, intent: Intent, seconds: float) -> None:
+        self.learned.append((message, intent))
+
+
+def state(message: str) -> Any:
+    return {"messages": [{"role": "user", "content": message}]}
+
+
+async def test_fused_classification_is_learned() -> None:
+    llm: Any = FakeRouter({**classification(0.95), "plan": None})
+    index: Any = FakeIndex()
+
+    update = await intent_planner(state("list /tmp"), llm, intent_index=index)
+
+    assert update["intent"]["category"] == "FILE_OPERATION"
+    assert [(message, intent["category"]) for message, intent in index.learned] == [
+        ("list /tmp", "FILE_OPERATION")
+    ]
+
+
+async def test_low_confidence_falls_back_with_the_index() -> None:
+    llm: Any = FakeRouter({**classification(0.2), "plan": None}, classification(0.95))
+    index: Any = FakeIndex()
+
+    update = await intent_planner(state("list /tmp"), llm, intent_index=index)
+
+    # Only the two-stage classification is learned, not the rejected fused one
+    assert llm.calls == 2
+    assert update["intent"]["confidence"] == 0.95
+    assert [intent["confidence"] for _, intent in index.learned] == [0.95]
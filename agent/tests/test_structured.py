@@ -0,0 +1,157 @@
+"""Tests for schema-constrained JSON validation."""
+
+from collections.abc import AsyncGenerator
+from typing import Any
+
+import pytest
+
+from lokai_agent.config import settings
+from lokai_agent.llm.router import LLMRouter
+from lokai_agent.llm.structured import IncrementalValidator, StructuredOutputError, validate
+
+SCHEMA = {
+    "type": "object",
+    "properties": {
+        "category": {"type": "string", "enum": ["QUESTION", "GREETING"]},
+        "confidence": {"type": "number", "minimum": 0, "maximum": 1},
+        "explanation": {"type": "string"},
+        "entities": {"type": "object"},
+    },
+    "required": ["category", "confidence"],
+    "additionalProperties": False,
+}
+
+
+def feed_chars(validator: IncrementalValidator, text: str) -> None:
+    for c in text:
+        validator.feed(c)
+
+
+def test_validates_object_fed_in_chunks() -> None:
+    validator = IncrementalValidator(SCHEMA)
+    for chunk in ['{"categ', 'ory": "QUES', 'TION", "confidence"', ": 0.9}"]:
+        validator.feed(chunk)
+
+    assert validator.complete
+    assert validator.finish() == {"category": "QUESTION", "confidence": 0.9}
+
+
+def test_escapes_and_braces_inside_strings() -> None:
+    text = (
+        '{"explanation": "quote \\" brace } { and backslash \\\\", '
+        '"category": "GREETING", "confidence": 1}'
+    )
+    validator = IncrementalValidator(SCHEMA)
+    feed_chars(validator, text[:-1])
+    assert not validator.complete
+
+    validator.feed(text[-1])
+    assert validator.complete
+    assert validator.finish()["explanation"] == 'quote " brace } { and backslash \\'
+
+
+def test_nested_values_are_skipped_until_closed() -> None:
+    validator = IncrementalValidator(SCHEMA)
+    feed_chars(
+        validator,
+        '{"entities": {"paths": ["/a}", "{b"], "other": {}}, '
+        '"category": "QUESTION", "confidence": 0.5}',
+    )
+
+    assert validator.finish()["entities"] == {"paths": ["/a}", "{b"], "other": {}}
+
+
+def test_text_after_the_object_is_ignored() -> None:
+    validator = IncrementalValidator(SCHEMA)
+    validator.feed('{"category": "QUESTION", "confidence": 0.5}\nHope this helps!')
+
+    assert validator.complete
+    assert validator.finish()["category"] == "QUESTION"
+
+
+def test_rejects_prose_before_the_object() -> None:
+    validator = IncrementalValidator(SCHEMA)
+    with pytest.raises(StructuredOutputError, match="Expected a JSON object"):
+        validator.feed("Sure! {")
+
+
+def test_rejects_unknown_field_at_its_colon() -> None:
+    validator = IncrementalValidator(SCHEMA)
+    validator.feed('{"mood"')
+    with pytest.raises(StructuredOutputError, match="unexpected field 'mood'"):
+        validator.feed(":")
+
+
+def test_rejects_invalid_value_when_it_ends() -> None:
+    validator = IncrementalValidator(SCHEMA)
+    validator.feed('{"category": "WEATHER"')
+    with pytest.raises(StructuredOutputError, match=r"\$\.category"):
+        validator.feed(",")
+
+
+def test_rejects_out_of_range_number() -> None:
+    validator = IncrementalValidator(SCHEMA)
+    with pytest.raises(StructuredOutputError, match="above 1"):
+        validator.feed('{"confidence": 7, ')
+
+
+def test_finish_rejects_truncated_output() -> None:
+    validator = IncrementalValidator(SCHEMA)
+    validator.feed('{"category": "QUESTION", "confi')
+
+    with pytest.raises(StructuredOutputError, match="ended before"):
+        validator.finish()
+
+
+def test_finish_checks_required_fields() -> None:
+    validator = IncrementalValidator(SCHEMA)
+    validator.feed('{"category": "QUESTION"}')
+
+    with pytest.raises(StructuredOutputError, match="missing required field 'confidence'"):
+        validator.finish()
+
+
+def test_rejects_output_over_the_limit() -> None:
+    validator = IncrementalValidator(SCHEMA, max_chars=10)
+    with pytest.raises(StructuredOutputError, match="exceeds"):
+        validator.feed('{"explanation": "far too long"')
+
+
+def test_validate_reports_nested_path() -> None:
+    schema = {
+        "type": "object",
+        "properties": {"steps": {"type": "array", "items": {"type": "integer"}}},
+    }
+    validate({"steps": [1, 2]}, schema)
+
+    with pytest.raises(StructuredOutputError, match=r"\$\.steps\[1\]: expected integer"):
+        validate({"steps": [1, "2"]}, schema)
+
+
+def test_validate_does_not_take_booleans_for_numbers() -> None:
+    with pytest.raises(StructuredOutputError):
+        validate(True, {"type": "integer"})
+    validate(2.0, {"type": "integer"})
+
+
+async def test_retry_tells_the_model_why_it_was_rejected(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(settings, "llm_cache_enabled", False)
+    router = LLMRouter()
+    router._primary_available = True
+    prompts: list[str] = []
+    answers = iter(['{"category": "UNKNOWN"}', '{"category": "QUESTION", "confidence": 0.9}'])
+
+    async def stream(prompt: str, *args: Any, **kwargs: Any) -> AsyncGenerator[str, None]:
+        prompts.append(prompt)
+        yield next(answers)
+
+    monkeypatch.setattr(router.ollama, "stream", stream)
+    try:
+        value = await router.generate_json("Classify: hi", SCHEMA)
+    finally:
+        await router.close()
+
+    assert value == {"category": "QUESTION", "confidence": 0.9}
+    assert prompts[0] == "Classify: hi"
+    assert prompts[1].startswith("Classify: hi\n\nYour previous answer was rejected: ")
+    assert "UNKNOWN" in prompts[1]
@@ -0,0 +1,110 @@
+"""Tests for the backpressured outbound message writer."""
+
+import asyncio
+from typing import Any
+
+import orjson
+
+from lokai_agent.rpc import serializer
+from lokai_agent.rpc.writer import MessageWriter
+
+
+class FakeTransport:
+    """Collects written messages; drain() blocks until the reader is let go."""
+
+    def __init__(self) -> None:
+        self.messages: list[dict[str, Any]] = []
+        self.reading = asyncio.Event()
+        self.closed = False
+
+    def write_message(self, payload: bytes) -> None:
+        self.messages.append(orjson.loads(payload))
+
+    async def drain(self) -> None:
+        await self.reading.wait()
+
+    async def close(self) -> None:
+        self.closed = True
+
+
+async def stalled_writer(policy: str) -> tuple[MessageWriter, FakeTransport]:
+    """A writer with room for two messages whose reader has stopped reading."""
+    transport = FakeTransport()
+    writer = MessageWriter(transport, max_pending=2, token_overflow=policy)
+    writer.start()
+    await writer.send_token(1, "x")
+    # The writer task writes "x" and then waits in drain()
+    await asyncio.sleep(0)
+    return writer, transport
+
+
+def tokens(transport: FakeTransport) -> list[str]:
+    return [m.get("token") or m.get("event") for m in transport.messages]
+
+
+async def test_writes_messages_in_order() -> None:
+    transport = FakeTransport()
+    transport.reading.set()
+    writer = MessageWriter(transport)
+    writer.start()
+
+    await writer.send_token(1, "a")
+    writer.send_nowait(serializer.encode_complete(1, "a"), 1)
+    await writer.close()
+
+    assert transport.messages == [
+        {"jsonrpc": "2.0", "id": 1, "streaming": True, "token": "a"},
+        {"jsonrpc": "2.0", "id": 1, "complete": True, "result": "a"},
+    ]
+    assert transport.closed
+
+
+async def test_merge_appends_tokens_to_the_queued_frame() -> None:
+    writer, transport = await stalled_writer("merge")
+    await writer.send_token(1, "A")
+    await writer.send_token(2, "other")
+    await writer.send_token(1, "B")
+
+    transport.reading.set()
+    await writer.close()
+
+    assert tokens(transport) == ["x", "AB", "other"]
+    assert writer.stats()["merged_tokens"] == 1
+
+
+async def test_merge_never_moves_a_token_before_a_later_message() -> None:
+    writer, transport = await stalled_writer("merge")
+    await writer.send_token(1, "A")
+    writer.send_nowait(serializer.encode_event(1, "provider_switch"), 1)
+
+    sending = asyncio.create_task(writer.send_token(1, "B"))
+    await asyncio.sleep(0)
+    transport.reading.set()
+    await sending
+    await writer.close()
+
+    assert tokens(transport) == ["x", "A", "provider_switch", "B"]
+
+
+async def test_drop_discards_tokens_when_full() -> None:
+    writer, transport = await stalled_writer("drop")
+    await writer.send_token(1, "A")
+    await writer.send_token(1, "B")
+    await writer.send_token(1, "C")
+
+    transport.reading.set()
+    await writer.close()
+
+    assert tokens(transport) == ["x", "A", "B"]
+    assert writer.stats()["dropped_tokens"] == 1
+
+
+async def test_send_nowait_is_never_refused() -> None:
+    writer, transport = await stalled_writer("block")
+    for i in range(5):
+        writer.send_nowait(serializer.encode_complete(i, ""), i)
+    assert writer.depth == 5
+
+    transport.reading.set()
+    await writer.close()
+    assert len(transport.messages) == 6
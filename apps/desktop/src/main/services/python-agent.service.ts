@@ -21,10 +21,31 @@ interface JsonRpcResponse {
   };
 }
 
+type AgentMessage = JsonRpcResponse & {
+  streaming?: boolean;
+  token?: string;
+  complete?: boolean;
+  event?: string;
+  node?: string;
+  // provider_switch events: the answer continues on another LLM after `offset`
+  // characters, so text already shown stays as is
+  from?: string;
+  to?: string;
+  offset?: number;
+};
+
+interface PingResult {
+  ready: boolean;
+  // "starting" while initializing in the background, then "ready" or "failed"
+  state: 'starting' | 'ready' | 'failed';
+  error?: string;
+}
+
 interface StreamingCallback {
   onToken: (token: string) => void;
   onComplete: (response: string) => void;
   onError: (error: Error) => void;
+  onEvent?: (event: string, message: AgentMessage) => void;
 }
 
 export class PythonAgentService extends EventEmitter {
@@ -104,12 +125,24 @@ export class PythonAgentService extends EventEmitter {
         reject(new Error('Python agent startup timeout'));
       }, 30000);
 
+      // ping is answered while the agent initializes in the background, so wait
+      // until it reports "ready" and give up if initialization has failed
       const checkReady = async () => {
+        let status: PingResult;
         try {
-          await this.call('ping', {});
+          status = (await this.call('ping', {})) as PingResult;
+        } catch {
+          setTimeout(checkReady, 500);
+          return;
+        }
+
+        if (status.state === 'ready') {
           clearTimeout(timeout);
           resolve();
-        } catch {
+        } else if (status.state === 'failed') {
+          clearTimeout(timeout);
+          reject(new Error(`Python agent failed to initialize: ${status.error ?? 'unknown error'}`));
+        } else {
           setTimeout(checkReady, 500);
         }
       };
@@ -129,36 +162,12 @@ export class PythonAgentService extends EventEmitter {
       if (!line.trim()) continue;
 
       try {
-        const response = JSON.parse(line) as JsonRpcResponse & {
-          streaming?: boolean;
-          token?: string;
-          complete?: boolean;
-        };
-
-        if (response.streaming && response.token !== undefined) {
-          // Handle streaming token
-          const pending = this.pendingRequests.get(response.id);
-          if (pending?.streaming) {
-            pending.streaming.onToken(response.token);
-          }
-        } else if (response.complete) {
-          // Handle streaming complete
-          const pending = this.pendingRequests.get(response.id);
-          if (pending?.streaming) {
-            pending.streaming.onComplete(response.result as string);
-            this.pendingRequests.delete(response.id);
-          }
-        } else {
-          // Handle regular response
-          const pending = this.pendingRequests.get(response.id);
-          if (pending) {
-            if (response.error) {
-              pending.reject(new Error(response.error.message));
-            } else {
-              pending.resolve(response.result);
-            }
-            this.pendingRequests.delete(response.id);
-          }
+        const parsed = JSON.parse(line) as AgentMessage | AgentMessage[];
+
+        // Batch replies arrive as a single array of responses
+        const messages = Array.isArray(parsed) ? parsed : [parsed];
+        for (const message of messages) {
+          this.handleMessage(message);
         }
       } catch (error) {
         console.error('Failed to parse JSON-RPC response:', line, error);
@@ -166,6 +175,38 @@ export class PythonAgentService extends EventEmitter {
     }
   }
 
+  private handleMessage(response: AgentMessage): void {
+    if (response.streaming && response.token !== undefined) {
+      // Handle streaming token
+      const pending = this.pendingRequests.get(response.id);
+      if (pending?.streaming) {
+        pending.streaming.onToken(response.token);
+      }
+    } else if (response.streaming && response.event !== undefined) {
+      // Handle streaming progress event (e.g. agent graph node transitions)
+      const pending = this.pendingRequests.get(response.id);
+      pending?.streaming?.onEvent?.(response.event, response);
+    } else if (response.complete) {
+      // Handle streaming complete
+      const pending = this.pendingRequests.get(response.id);
+      if (pending?.streaming) {
+        pending.streaming.onComplete(response.result as string);
+        this.pendingRequests.delete(response.id);
+      }
+    } else {
+      // Handle regular response
+      const pending = this.pendingRequests.get(response.id);
+      if (pending) {
+        if (response.error) {
+          pending.reject(new Error(response.error.message));
+        } else {
+          pending.resolve(response.result);
+        }
+        this.pendingRequests.delete(response.id);
+      }
+    }
+  }
+
   async call(method: string, params?: unknown): Promise<unknown> {
     if (!this.process || !this.isRunning) {
       throw new Error('Python agent not running');
@@ -195,6 +236,40 @@ export class PythonAgentService extends EventEmitter {
     });
   }
 
+  // Send several requests as one JSON-RPC batch. The agent runs the members
+  // concurrently and replies with a single array.
+  callBatch(calls: Array<{ method: string; params?: unknown }>): Promise<unknown>[] {
+    if (!this.process || !this.isRunning) {
+      return calls.map(() => Promise.reject(new Error('Python agent not running')));
+    }
+
+    const requests: JsonRpcRequest[] = calls.map(({ method, params }) => ({
+      jsonrpc: '2.0',
+      id: ++this.requestId,
+      method,
+      params,
+    }));
+
+    const promises = requests.map(
+      (request) =>
+        new Promise<unknown>((resolve, reject) => {
+          this.pendingRequests.set(request.id, { resolve, reject });
+
+          // Timeout after 60 seconds
+          setTimeout(() => {
+            if (this.pendingRequests.has(request.id)) {
+              this.pendingRequests.delete(request.id);
+              reject(new Error('Request timeout'));
+            }
+          }, 60000);
+        })
+    );
+
+    this.process?.stdin?.write(JSON.stringify(requests) + '\n');
+
+    return promises;
+  }
+
   async callWithStreaming(
     method: string,
     params: unknown,
@@ -210,7 +285,7 @@ export class PythonAgentService extends EventEmitter {
       jsonrpc: '2.0',
       id,
       method,
-      params: { ...params as object, streaming: true },
+      params: { ...params as object, streaming: true, events: callbacks.onEvent !== undefined },
     };
 
     this.pendingRequests.set(id, {